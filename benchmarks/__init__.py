@@ -0,0 +1 @@
+"""Offline benchmarks for the Swarm orchestration loop. Run modules with `python -m benchmarks.<name>`."""
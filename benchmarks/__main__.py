@@ -0,0 +1,3 @@
+from .bench_loop import main
+
+main()
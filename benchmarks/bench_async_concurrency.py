@@ -0,0 +1,76 @@
+"""
+Drives many concurrent conversations through `AsyncSwarm` on one event loop.
+
+Each conversation makes a tool call that hands off to a second agent, so every
+run covers two completions, one tool execution and one handoff. Completions
+come from a local `FakeCompletionServer` with a fixed per-request latency.
+
+    python -m benchmarks.bench_async_concurrency --conversations 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from openai import AsyncOpenAI
+
+from swarm import Agent, AsyncSwarm, Result
+
+from .fake_server import FakeCompletionServer, tool_call
+
+
+def responder(request: dict) -> dict:
+    last = request["messages"][-1]
+    if last["role"] == "user" and request.get("tools"):
+        return {"tool_calls": [tool_call("lookup", {"query": last["content"]})]}
+    return {"content": "All done."}
+
+
+async def lookup(query: str, context_variables: dict = {}) -> Result:
+    """Looks something up."""
+    await asyncio.sleep(0)
+    return Result(value=f"found {query}", agent=answer_agent, context_variables={"query": query})
+
+
+answer_agent = Agent(name="Answer", instructions="Answer the question.")
+lookup_agent = Agent(name="Lookup", instructions="Look it up.", functions=[lookup])
+
+
+async def converse(swarm: AsyncSwarm, index: int, stream: bool):
+    messages = [{"role": "user", "content": f"question {index}"}]
+    if stream:
+        response = None
+        async for chunk in await swarm.run(lookup_agent, messages, stream=True):
+            response = chunk.get("response", response)
+    else:
+        response = await swarm.run(lookup_agent, messages)
+    assert response.agent.name == "Answer"
+    assert response.context_variables["query"] == f"question {index}"
+    return response
+
+
+async def main_async(conversations: int, latency: float, stream: bool) -> None:
+    with FakeCompletionServer(responder, latency=latency) as server:
+        swarm = AsyncSwarm(client=AsyncOpenAI(base_url=server.base_url, api_key="fake"))
+        start = time.perf_counter()
+        await asyncio.gather(*(converse(swarm, i, stream) for i in range(conversations)))
+        elapsed = time.perf_counter() - start
+
+    serial = conversations * 2 * latency
+    print(
+        f"{conversations} conversations ({'stream' if stream else 'blocking'}), "
+        f"{server.requests} completions in {elapsed:.2f}s "
+        f"({conversations / elapsed:.1f} conv/s; serial lower bound {serial:.2f}s)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.conversations, args.latency, args.stream))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Throughput of `BatchRunner` modes, and resuming an interrupted run.
+
+Writes `--conversations` scripted conversations (the `USER_MESSAGES` mix) to
+a JSONL file and runs them through `orchestrator_agent` against a
+`FakeCompletionServer` with `--latency` seconds per request: one at a time,
+then on threads, asyncio and processes with `--concurrency`. The batch-api
+mode goes through `LocalBatchBackend`, with `--turnaround` seconds per
+batch. Last, a threaded run is stopped halfway, a torn line is appended to
+its output, and the run is resumed; every conversation must be in the
+output exactly once.
+
+    python -m benchmarks.bench_batch --conversations 200 --concurrency 16 --latency 0.05
+"""
+import argparse
+import functools
+import json
+import os
+import tempfile
+
+from openai import AsyncOpenAI, OpenAI
+
+from swarm import AsyncSwarm, Swarm
+from swarm.batch import ASYNCIO, BATCH_API, PROCESSES, THREADS, BatchingClient, BatchRunner, LocalBatchBackend
+
+from .fake_client import FakeOpenAI
+from .fake_server import FakeCompletionServer
+from .scenarios import USER_MESSAGES, AgentResponder
+
+EXPECTED_AGENT = {
+    "Search": "BraveSearchAgent",
+    "List": "TerminalAgent",
+}
+
+
+def write_input(path: str, count: int) -> None:
+    with open(path, "w") as f:
+        for index in range(count):
+            message = USER_MESSAGES[index % len(USER_MESSAGES)]
+            f.write(json.dumps({"id": f"c{index}", "messages": [{"role": "user", "content": message}]}) + "\n")
+
+
+def check_output(path: str, count: int) -> None:
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    lines = sorted(record["line"] for record in records)
+    assert lines == list(range(count)), f"{len(lines)} results, {len(set(lines))} distinct, {count} expected"
+    for record in records:
+        assert "error" not in record, record["error"]
+        message = USER_MESSAGES[record["line"] % len(USER_MESSAGES)]
+        expected = EXPECTED_AGENT.get(message.split()[0], "Instructor")
+        assert record["agent"] == expected, (message, record["agent"])
+
+
+def make_swarm(base_url: str) -> Swarm:
+    return Swarm(client=OpenAI(base_url=base_url, api_key="fake"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--turnaround", type=float, default=0.5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-batch-")
+    input_path = os.path.join(root, "input.jsonl")
+    write_input(input_path, args.conversations)
+
+    with FakeCompletionServer(AgentResponder(), latency=args.latency) as server:
+        configurations = [
+            ("one at a time", THREADS, 1),
+            (f"threads x{args.concurrency}", THREADS, args.concurrency),
+            (f"asyncio x{args.concurrency}", ASYNCIO, args.concurrency),
+            (f"processes x{args.concurrency}", PROCESSES, args.concurrency),
+        ]
+        for name, mode, concurrency in configurations:
+            swarm = swarm_factory = None
+            if mode == THREADS:
+                swarm = make_swarm(server.base_url)
+            elif mode == ASYNCIO:
+                swarm = AsyncSwarm(client=AsyncOpenAI(base_url=server.base_url, api_key="fake"))
+            else:
+                swarm_factory = functools.partial(make_swarm, server.base_url)
+            output_path = os.path.join(root, f"{mode}-{concurrency}.jsonl")
+            runner = BatchRunner(swarm, mode=mode, concurrency=concurrency, swarm_factory=swarm_factory)
+            stats = runner.run(input_path, output_path)
+            check_output(output_path, args.conversations)
+            print(f"{name:>16}: {stats['ran']} conversations in {stats['elapsed']:6.2f}s, "
+                  f"{stats['ran'] / stats['elapsed']:7.1f}/s")
+
+        # resume: stop halfway, tear the last line, then finish
+        output_path = os.path.join(root, "resumed.jsonl")
+        runner = BatchRunner(make_swarm(server.base_url), concurrency=args.concurrency, checkpoint_every=7)
+        first = runner.run(input_path, output_path, limit=args.conversations // 2)
+        with open(output_path, "ab") as f:
+            f.write(b'{"line": 99999, "id": "torn')
+        second = runner.run(input_path, output_path)
+        check_output(output_path, args.conversations)
+        print(f"{'resumed':>16}: {first['ran']} + {second['ran']} conversations, "
+              f"resumed from line {second['resumed_from_line']}, {second['skipped']} skipped")
+
+    # the batch API: every round of requests is one batch file
+    backend = LocalBatchBackend(FakeOpenAI(AgentResponder()), turnaround=args.turnaround)
+    client = BatchingClient(backend, directory=os.path.join(root, "batches"))
+    output_path = os.path.join(root, "batch-api.jsonl")
+    runner = BatchRunner(AsyncSwarm(client=client), mode=BATCH_API, concurrency=args.conversations)
+    stats = runner.run(input_path, output_path)
+    check_output(output_path, args.conversations)
+    print(f"{'batch-api':>16}: {stats['ran']} conversations in {stats['elapsed']:6.2f}s, "
+          f"{client.requests} requests in {backend.batches} batch files of {args.turnaround:g}s turnaround")
+
+
+if __name__ == "__main__":
+    main()
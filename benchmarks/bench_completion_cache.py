@@ -0,0 +1,99 @@
+"""
+Turn latency with a `CompletionCache`, and offline replay of a recorded session.
+
+A scripted `AgentController` session runs against a fake model that takes
+`--latency` seconds per request, first without a cache, then recording into
+an empty cache, then again from the warm cache. Finally the session is
+recorded to disk and replayed in strict replay mode with a client that
+fails every request, and the replies are compared.
+
+    python -m benchmarks.bench_completion_cache --turns 20 --latency 0.05
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from swarm import Swarm
+from swarm.completion_cache import REPLAY, CompletionCache, DiskBackend
+from swarm.controller import AgentController
+
+from .fake_client import FakeOpenAI
+from .scenarios import USER_MESSAGES, AgentResponder
+
+
+class SlowOpenAI(FakeOpenAI):
+    def __init__(self, responder, latency: float):
+        super().__init__(responder)
+        self.latency = latency
+
+    def create(self, **params):
+        time.sleep(self.latency)
+        return super().create(**params)
+
+
+class OfflineClient:
+    """Stands in for the model in replay mode: any request is a failure."""
+
+    class chat:
+        class completions:
+            @staticmethod
+            def create(**params):
+                raise AssertionError("replay made a model request")
+
+
+def run_session(swarm: Swarm, turns: int, stream: bool):
+    controller = AgentController(swarm=swarm)
+    replies, latencies = [], []
+    for turn in range(turns):
+        message = USER_MESSAGES[turn % len(USER_MESSAGES)]
+        start = time.perf_counter()
+        if stream:
+            reply = "".join(controller.handle_message_stream(message))
+        else:
+            reply = controller.handle_message(message)
+        latencies.append(time.perf_counter() - start)
+        if reply.startswith("I encountered"):
+            raise RuntimeError(reply)
+        replies.append(reply)
+    return replies, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    for stream in (False, True):
+        cache = CompletionCache()
+        runs = {
+            "no cache": Swarm(client=SlowOpenAI(AgentResponder(), args.latency)),
+            "cold cache": Swarm(
+                client=SlowOpenAI(AgentResponder(), args.latency), completion_cache=cache),
+            "warm cache": Swarm(
+                client=SlowOpenAI(AgentResponder(), args.latency), completion_cache=cache),
+        }
+        for name, swarm in runs.items():
+            _, latencies = run_session(swarm, args.turns, stream)
+            print(
+                f"{'stream' if stream else 'blocking':>8} {name:>10}: turn mean "
+                f"{statistics.fmean(latencies) * 1e3:7.2f} ms, {swarm.client.requests:3d} model requests"
+            )
+        print(f"{'':>8} cache: {cache.stats()}")
+
+    with tempfile.TemporaryDirectory() as root:
+        recorded, _ = run_session(
+            Swarm(client=FakeOpenAI(AgentResponder()), completion_cache=CompletionCache(DiskBackend(root))),
+            args.turns, stream=True)
+        replay = CompletionCache(DiskBackend(root), mode=REPLAY)
+        replayed, latencies = run_session(
+            Swarm(client=OfflineClient(), completion_cache=replay), args.turns, stream=True)
+        print(
+            f"replay from disk: {replay.hits} recordings served, turn mean "
+            f"{statistics.fmean(latencies) * 1e3:.2f} ms, replies identical: {replayed == recorded}"
+        )
+
+
+if __name__ == "__main__":
+    main()
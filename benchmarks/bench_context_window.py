@@ -0,0 +1,49 @@
+"""
+Per-turn cost of `ContextWindow.select` as a session grows.
+
+Compares re-counting the whole history every turn with the cached counts
+the window keeps, and shows how many messages are sent to the model.
+
+    python -m benchmarks.bench_context_window --turns 3000
+"""
+import argparse
+import time
+
+from swarm.context_window import ContextWindow
+
+
+def message(i: int) -> dict:
+    if i % 4 == 2:
+        return {"role": "assistant", "content": None, "sender": "OrchestratorAgent", "tool_calls": [
+            {"id": f"call_{i}", "type": "function",
+             "function": {"name": "delegate_to_search", "arguments": '{"request": "search the weather"}'}}]}
+    if i % 4 == 3:
+        return {"role": "tool", "tool_call_id": f"call_{i - 1}", "tool_name": "delegate_to_search",
+                "content": "I'll have the Brave Search agent look that up for you."}
+    return {"role": "user" if i % 4 == 0 else "assistant", "content": f"message {i} " + "lorem ipsum " * 40}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=3000)
+    parser.add_argument("--max-tokens", type=int, default=16000)
+    args = parser.parse_args()
+
+    window = ContextWindow(max_tokens=args.max_tokens, reserve_tokens=2000)
+    history = []
+    print(f"{'history':>8} {'sent':>6} {'cached us':>10} {'recount us':>11}")
+    for turn in range(args.turns):
+        history.append(message(turn))
+        start = time.perf_counter()
+        selected = window.select(history)
+        cached = time.perf_counter() - start
+        if (turn + 1) % (args.turns // 6) == 0:
+            start = time.perf_counter()
+            sum(window.counter.count_message(m) for m in history)
+            recount = time.perf_counter() - start
+            assert selected[0]["role"] != "tool"
+            print(f"{len(history):>8} {len(selected):>6} {cached * 1e6:>10.1f} {recount * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
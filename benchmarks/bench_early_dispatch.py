@@ -0,0 +1,115 @@
+"""
+Wall time of a streamed turn with and without early tool dispatch.
+
+The model streams `--calls` tool calls followed by a short reply, with a
+`--token-delay` pause between chunks, and each tool sleeps for `--latency`
+seconds. With early dispatch a tool starts as soon as its arguments are
+complete, so its latency overlaps with the rest of the stream. Agents with
+and without parallel tool calls are both measured.
+
+    python -m benchmarks.bench_early_dispatch --calls 3 --latency 0.2 --token-delay 0.01
+"""
+import argparse
+import json
+import time
+
+from swarm import Agent, Result, Swarm
+
+from .fake_client import FakeOpenAI, ScriptedResponder
+from .fake_server import tool_call
+
+LATENCY = 0.2
+
+
+def slow_search(query: str, context_variables: dict = {}) -> Result:
+    """Pretends to search the web."""
+    time.sleep(LATENCY)
+    return Result(value=f"results for {query}", context_variables={"last_query": query})
+
+
+class PacedOpenAI(FakeOpenAI):
+    """
+    Sleeps `token_delay` seconds before each streamed chunk, like a model
+    decoding tokens, and streams tool calls before the message text.
+    """
+
+    def __init__(self, responder, token_delay: float, chunk_size: int = 4):
+        super().__init__(responder, chunk_size)
+        self.token_delay = token_delay
+
+    def create(self, **params):
+        result = super().create(**params)
+        if not params.get("stream"):
+            return result
+        return self._paced(result)
+
+    def _paced(self, chunks):
+        chunks = list(chunks)
+        text = [c for c in chunks[1:-1] if c.choices[0].delta.content]
+        calls = [c for c in chunks[1:-1] if not c.choices[0].delta.content]
+        for chunk in [chunks[0], *calls, *text, chunks[-1]]:
+            time.sleep(self.token_delay)
+            yield chunk
+
+
+def make_script(calls: int) -> list:
+    query = "latest python release notes and changelog"
+    return [
+        {
+            "role": "assistant",
+            "content": "Let me look that up for you, starting with the release notes.",
+            "tool_calls": [
+                tool_call("slow_search", {"query": f"{query} {i}"}, f"call_{i}")
+                for i in range(calls)
+            ],
+        },
+        {"role": "assistant", "content": "Here is what I found about the latest release."},
+    ]
+
+
+def run_once(swarm: Swarm, agent: Agent) -> tuple:
+    start = time.perf_counter()
+    response = None
+    for event in swarm.run(agent, [{"role": "user", "content": "search"}], stream=True):
+        if "response" in event:
+            response = event["response"]
+    return time.perf_counter() - start, response
+
+
+def main() -> None:
+    global LATENCY
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    LATENCY = args.latency
+
+    for parallel in (True, False):
+        agent = Agent(name="Searcher", functions=[slow_search], parallel_tool_calls=parallel)
+        results = {}
+        for early in (False, True):
+            responder = ScriptedResponder(make_script(args.calls))
+            swarm = Swarm(
+                client=PacedOpenAI(responder, args.token_delay), early_tool_dispatch=early)
+            timings = []
+            for _ in range(args.runs):
+                responder.reset()
+                elapsed, response = run_once(swarm, agent)
+                timings.append(elapsed)
+            results[early] = (min(timings), response)
+
+        # early dispatch must not change what ends up in the conversation
+        baseline, early = results[False][1], results[True][1]
+        assert json.dumps(baseline.messages, sort_keys=True) == json.dumps(early.messages, sort_keys=True)
+        assert baseline.context_variables == early.context_variables
+        print(
+            f"{'parallel' if parallel else 'serial':>8} tools: "
+            f"end of stream {results[False][0] * 1000:7.1f} ms, "
+            f"early {results[True][0] * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Prompt size with and without direct transfers on delegate_* handoffs.
+
+Replays an `AgentController` session through the orchestrator and compares
+the prompt sent to the model per completion and the history kept, with
+`Swarm(direct_transfers=False)` (routing tool call and filler result kept)
+against the default.
+
+    python -m benchmarks.bench_handoff --turns 200
+"""
+import argparse
+import json
+
+from swarm import Swarm
+from swarm.controller import AgentController
+
+from .fake_client import FakeOpenAI
+from .scenarios import USER_MESSAGES, AgentResponder
+
+
+def run(turns: int, direct_transfers: bool):
+    responder = AgentResponder()
+    sent = {"chars": 0, "messages": 0}
+
+    def measuring_responder(request):
+        sent["chars"] += len(json.dumps(request["messages"]))
+        sent["messages"] += len(request["messages"])
+        return responder(request)
+
+    client = FakeOpenAI(measuring_responder)
+    controller = AgentController(swarm=Swarm(client=client, direct_transfers=direct_transfers))
+    for turn in range(turns):
+        controller.handle_message(USER_MESSAGES[turn % len(USER_MESSAGES)])
+    return client.requests, sent, len(controller.state.history)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    for direct in (False, True):
+        completions, sent, history = run(args.turns, direct)
+        print(
+            f"{'direct transfer' if direct else 'kept filler':>15}: {completions} completions, "
+            f"{sent['chars'] / completions / 1024:7.1f} KiB and {sent['messages'] / completions:6.1f} messages "
+            f"per prompt, {history} messages in history"
+        )
+
+
+if __name__ == "__main__":
+    main()
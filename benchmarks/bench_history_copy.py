@@ -0,0 +1,58 @@
+"""
+Per-turn cost of `Swarm.run` as a session grows.
+
+Replays the `AgentController` pattern: the whole history is sent every turn
+and also stored in `context_variables["conversation_history"]`, next to a
+Brave-sized `raw_response` payload. Completions come from `FakeOpenAI`, so the
+timing is the orchestration overhead alone. The `deepcopy` column shows what
+the previous `copy.deepcopy` of messages and context cost at the same size.
+
+    python -m benchmarks.bench_history_copy
+"""
+import copy
+import time
+
+from swarm import Agent, Swarm
+
+from .fake_client import FakeOpenAI
+
+RAW_RESPONSE = {"web": {"results": [
+    {"title": f"Result {i}", "url": f"https://example.com/{i}", "description": "x" * 200,
+     "meta_url": {"hostname": "example.com", "path": f"/{i}"}, "extra_snippets": ["y" * 100] * 3}
+    for i in range(20)
+]}}
+
+
+def make_history(size: int):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " + "z" * 200,
+         "sender": "Instructor", "tool_calls": None}
+        for i in range(size)
+    ]
+
+
+def main(sizes=(10, 100, 1000, 5000), turns: int = 20) -> None:
+    swarm = Swarm(client=FakeOpenAI(lambda request: {"content": "ok"}))
+    agent = Agent(name="Instructor")
+    swarm.run(agent=agent, messages=[{"role": "user", "content": "warm up"}])
+    print(f"{'history':>8} {'run() us/turn':>14} {'deepcopy us/turn':>17}")
+    for size in sizes:
+        history = make_history(size)
+        context = {"conversation_history": history, "raw_response": RAW_RESPONSE, "last_agent": "Instructor"}
+        messages = history + [{"role": "user", "content": "next"}]
+
+        start = time.perf_counter()
+        for _ in range(turns):
+            swarm.run(agent=agent, messages=messages, context_variables=context)
+        run_us = (time.perf_counter() - start) / turns * 1e6
+
+        start = time.perf_counter()
+        for _ in range(max(1, turns // 4)):
+            copy.deepcopy(messages)
+            copy.deepcopy(context)
+        copy_us = (time.perf_counter() - start) / max(1, turns // 4) * 1e6
+        print(f"{size:>8} {run_us:>14.1f} {copy_us:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
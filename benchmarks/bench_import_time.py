@@ -0,0 +1,78 @@
+"""
+Import cost of the package entry points, measured in fresh interpreters.
+
+Each target runs in a new `python -X importtime` process. The report gives
+the best wall time of the whole process over `--repeat` runs (an empty
+interpreter is the baseline), the cumulative import time of the target, and
+the heaviest top-level packages it pulled in.
+
+    python -m benchmarks.bench_import_time --repeat 5 --top 5
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "interpreter": "pass",
+    "swarm": "import swarm",
+    "swarm.Agent": "from swarm import Agent",
+    "controller": "import swarm.controller",
+    "server": "import swarm.server",
+    "Swarm()": "from swarm import Swarm; Swarm(client=object())",
+    "search agent": "from swarm.agents import get_agent; get_agent('BraveSearchAgent')",
+}
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(code: str):
+    """Wall time in seconds and `(module, depth, self_us, cumulative_us)` rows."""
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    rows = []
+    for line in process.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return wall, rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    # modules the bare interpreter imports anyway (site, encodings, ...)
+    _, baseline = measure("pass")
+    startup = {module for module, *_ in baseline}
+
+    for name, code in TARGETS.items():
+        runs = [measure(code) for _ in range(args.repeat)]
+        wall, rows = min(runs, key=lambda run: run[0])
+        rows = [row for row in rows if row[0] not in startup]
+        imported = sum(self_us for _, _, self_us, _ in rows)
+        packages = defaultdict(int)
+        for module, _, self_us, _ in rows:
+            packages[module.partition(".")[0]] += self_us
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[: args.top]
+        print(
+            f"{name:>13}: {wall * 1e3:7.1f} ms wall, {imported / 1e3:7.1f} ms importing "
+            f"{len(rows):4d} modules"
+            + (": " + ", ".join(f"{package} {us / 1e3:.1f}" for package, us in heaviest) if heaviest else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
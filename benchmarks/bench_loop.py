@@ -0,0 +1,126 @@
+"""
+End-to-end benchmark of the orchestration loop with a scripted fake model.
+
+Drives `AgentController` sessions through `orchestrator_agent` and its
+handoffs to the search, terminal and instructor agents, using `FakeOpenAI`
+so no network access or API key is needed. Reports per-turn latency,
+per-turn allocation peak and throughput for streaming and non-streaming runs.
+The scripted workload is identical on every run, so numbers are comparable
+across commits; use `--json` to save them.
+
+    python -m benchmarks.bench_loop --turns 200 --json bench.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from swarm import Swarm
+from swarm.controller import AgentController
+from swarm.tracing import RecordingTracer
+
+from .fake_client import FakeOpenAI
+from .scenarios import USER_MESSAGES, AgentResponder
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_session(turns: int, stream: bool, trace_memory: bool = False, tracer=None):
+    client = FakeOpenAI(AgentResponder())
+    controller = AgentController(swarm=Swarm(client=client, tracer=tracer))
+    latencies, peaks = [], []
+
+    for turn in range(turns):
+        message = USER_MESSAGES[turn % len(USER_MESSAGES)]
+        if trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        if stream:
+            reply = "".join(controller.handle_message_stream(message))
+        else:
+            reply = controller.handle_message(message)
+        latencies.append(time.perf_counter() - start)
+        if trace_memory:
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        if reply.startswith("I encountered"):
+            raise RuntimeError(reply)
+
+    return latencies, peaks, client.requests, len(controller.state.history)
+
+
+def bench(turns: int, stream: bool) -> dict:
+    latencies, _, completions, history = run_session(turns, stream)
+    tracemalloc.start()
+    try:
+        _, peaks, _, _ = run_session(turns, stream, trace_memory=True)
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "mode": "stream" if stream else "blocking",
+        "turns": turns,
+        "completions": completions,
+        "final_history": history,
+        "turn_ms_mean": statistics.fmean(latencies) * 1e3,
+        "turn_ms_p50": percentile(latencies, 0.50) * 1e3,
+        "turn_ms_p99": percentile(latencies, 0.99) * 1e3,
+        "turn_ms_last_10pct": statistics.fmean(latencies[-max(1, turns // 10):]) * 1e3,
+        "alloc_peak_kib_mean": statistics.fmean(peaks) / 1024,
+        "turns_per_s": turns / total,
+        "completions_per_s": completions / total,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--trace", action="store_true", help="print time spent per loop phase")
+    args = parser.parse_args()
+
+    results = [bench(args.turns, stream) for stream in (False, True)]
+    for r in results:
+        print(
+            f"{r['mode']:>8}: {r['turns']} turns / {r['completions']} completions, "
+            f"turn mean {r['turn_ms_mean']:.2f} ms (p50 {r['turn_ms_p50']:.2f}, p99 {r['turn_ms_p99']:.2f}, "
+            f"last 10% {r['turn_ms_last_10pct']:.2f}), alloc peak {r['alloc_peak_kib_mean']:.0f} KiB/turn, "
+            f"{r['turns_per_s']:.0f} turns/s"
+        )
+
+    if args.trace:
+        for stream in (False, True):
+            tracer = RecordingTracer()
+            run_session(args.turns, stream, tracer=tracer)
+            print(f"\nphases ({'stream' if stream else 'blocking'}):")
+            for name, entry in sorted(tracer.summary().items()):
+                print(f"  {name:<20} {entry['count']:>6}x {entry['seconds'] * 1e3:10.2f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Memory per history message and conversion cost: `Message` against dicts and pydantic.
+
+Builds `--messages` history entries from completions of the kind agents
+produce (text answers and tool-call turns) three ways: the JSON round trip
+`Swarm.run` used to do (`json.loads(message.model_dump_json())`), keeping
+the SDK's pydantic `ChatCompletionMessage`, and `Message.from_completion`.
+Reports retained bytes per message, time per conversion, and allocations
+while building the request payload the way `build_completion_params` does.
+
+    python -m benchmarks.bench_message_memory --messages 20000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from openai.types.chat import ChatCompletion
+
+from swarm.message import Message, to_wire
+
+from .fake_server import completion_payload, tool_call
+from .scenarios import INSTRUCTOR_ANSWER
+
+SENDERS = ["OrchestratorAgent", "Instructor", "BraveSearchAgent", "TerminalAgent"]
+
+
+def completions(count: int):
+    """Alternating tool-call and text completions, as in an orchestrated session."""
+    result = []
+    for i in range(count):
+        if i % 2:
+            message = {"content": INSTRUCTOR_ANSWER[: 200 + i % 300]}
+        else:
+            message = {"tool_calls": [tool_call("delegate_to_search", {"request": f"query {i}"})]}
+        result.append(ChatCompletion.model_validate(completion_payload(message, "gpt-4o")).choices[0].message)
+    return result
+
+
+def as_dict(message, sender):
+    message.sender = sender
+    return json.loads(message.model_dump_json())
+
+
+def as_pydantic(message, sender):
+    message.sender = sender
+    return message
+
+
+def as_message(message, sender):
+    return Message.from_completion(message, sender)
+
+
+def pydantic_wire(message):
+    return message.model_dump(exclude_none=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'':>9} {'bytes/message':>14} {'us/conversion':>14} {'request build KiB':>18}")
+    for name, convert, wire in (
+        ("dict", as_dict, lambda m: m),
+        ("pydantic", as_pydantic, pydantic_wire),
+        ("Message", as_message, to_wire),
+    ):
+        tracemalloc.start()
+        sources = completions(args.messages)
+        start = time.perf_counter()
+        history = [convert(source, SENDERS[i % len(SENDERS)]) for i, source in enumerate(sources)]
+        elapsed = time.perf_counter() - start
+        # the completions stay alive only where the history refers to them
+        del sources
+        retained = tracemalloc.get_traced_memory()[0]
+
+        # one request payload, built twice: the second build shows the steady state
+        for _ in range(2):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            messages = [{"role": "system", "content": "You are helpful."}]
+            messages += map(wire, history)
+            build_kib = (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+            del messages
+        tracemalloc.stop()
+        print(
+            f"{name:>9} {retained / len(history):>14.0f} {elapsed / len(history) * 1e6:>14.2f} "
+            f"{build_kib:>18.1f}"
+        )
+        del history
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-script latency of a persistent `ScriptWorker` against spawning `osascript` per script.
+
+Runs `--scripts` short scripts through `SpawnBackend` and through a warm
+`WorkerPool`, then checks a timeout and a crash: each must fail only the
+script involved, and the next script must succeed on a fresh interpreter.
+Uses `stub_osascript` (with `--load-time` seconds of startup) unless
+`--osascript` is given, which needs macOS.
+
+    python -m benchmarks.bench_osascript_worker --scripts 200 --load-time 0.03
+"""
+import argparse
+import os
+import sys
+import time
+
+from swarm.agents.osascript_worker import SpawnBackend, WorkerPool
+
+from .bench_loop import percentile
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_osascript.py")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scripts", type=int, default=200)
+    parser.add_argument("--load-time", type=float, default=0.03)
+    parser.add_argument("--osascript", action="store_true", help="use the real osascript (macOS)")
+    args = parser.parse_args()
+
+    if args.osascript:
+        spawn, pool = SpawnBackend(), WorkerPool(size=1)
+        script, expected = 'return "hello"', "hello"
+        sleepy, crash = "delay 5", None
+    else:
+        stub = [sys.executable, STUB, "--load-time", str(args.load_time)]
+        spawn, pool = SpawnBackend(stub), WorkerPool(size=1, command=stub)
+        script, expected = 'return "hello"', "hello"
+        sleepy, crash = "delay 5", "crash"
+    pool.run(script)  # start the interpreter outside the timing
+
+    for name, backend in (("spawn per call", spawn), ("worker", pool)):
+        latencies = []
+        for _ in range(args.scripts):
+            start = time.perf_counter()
+            result = backend.run(script)
+            latencies.append(time.perf_counter() - start)
+            assert result.ok and result.output == expected, result
+        print(f"{name:>15}: mean {sum(latencies) / len(latencies) * 1e3:7.2f} ms, "
+              f"p50 {percentile(latencies, 0.5) * 1e3:7.2f} ms, p99 {percentile(latencies, 0.99) * 1e3:7.2f} ms")
+
+    result = pool.run('error "The variable x is not defined." number -2753')
+    assert not result.ok and result.error_number == -2753, result
+    result = pool.run(sleepy, timeout=0.5)
+    assert result.timed_out, result
+    assert pool.run(script).ok
+    if crash is not None:
+        result = pool.run(crash)
+        assert not result.ok and not result.timed_out, result
+        assert pool.run(script).ok
+    print(f"{'recovery':>15}: timeout{' and crash' if crash else ''} recovered, {pool.stats()}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
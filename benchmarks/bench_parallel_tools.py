@@ -0,0 +1,55 @@
+"""
+Turn latency of `Swarm.handle_tool_calls` with serial and concurrent dispatch.
+
+Each tool sleeps for `--latency` seconds to stand in for a slow web search.
+
+    python -m benchmarks.bench_parallel_tools --calls 4 --latency 0.1
+"""
+import argparse
+import json
+import time
+
+from swarm import Result, Swarm
+from swarm.swarm_types import ChatCompletionMessageToolCall, Function
+
+LATENCY = 0.1
+
+
+def slow_search(query: str, context_variables: dict = {}) -> Result:
+    """Pretends to search the web."""
+    time.sleep(LATENCY)
+    return Result(value=f"results for {query}", context_variables={"last_query": query})
+
+
+def make_tool_calls(count: int):
+    return [
+        ChatCompletionMessageToolCall(
+            id=f"call_{i}",
+            type="function",
+            function=Function(name="slow_search", arguments=json.dumps({"query": f"q{i}"})),
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    global LATENCY
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    LATENCY = args.latency
+
+    swarm = Swarm(client=object())
+    tool_calls = make_tool_calls(args.calls)
+    for parallel in (False, True):
+        start = time.perf_counter()
+        response = swarm.handle_tool_calls(tool_calls, [slow_search], {}, False, parallel=parallel)
+        elapsed = time.perf_counter() - start
+        assert [m["tool_call_id"] for m in response.messages] == [c.id for c in tool_calls]
+        assert response.context_variables["last_query"] == f"q{args.calls - 1}"
+        print(f"{'parallel' if parallel else 'serial':>8}: {elapsed * 1000:7.1f} ms for {args.calls} tool calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Provider prompt cache hits and instruction cost over a long conversation.
+
+A fake provider caches prompts the way OpenAI does: by exact prefix, in
+128-token blocks once a prompt is 1024 tokens long (a token being 4 bytes of
+the rendered tools and messages here), and reports the hits as
+`usage.prompt_tokens_details.cached_tokens`. `--turns` streamed turns run
+against an agent with callable instructions and a few tools, through a
+`ContextWindow` of `--max-tokens`. Runs with instructions called every turn
+and the window sliding every turn, then with memoized instructions and a
+window trimmed to `trim_to` of its budget at a time.
+
+    python -m benchmarks.bench_prompt_cache --turns 200 --max-tokens 6000
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import time
+
+from openai.types.chat import ChatCompletionChunk
+from openai.types.completion_usage import CompletionUsage
+
+from swarm import Agent, Swarm
+from swarm.context_window import ContextWindow
+
+from .fake_client import FakeOpenAI
+
+BLOCK = 128 * 4
+MINIMUM = 1024 * 4
+
+POLICY = [f"{i}. Answer questions about topic {i} carefully, citing the relevant source." for i in range(150)]
+
+
+def instructions(context_variables) -> str:
+    lines = [f"You are helping {context_variables['user_name']} ({context_variables['locale']})."]
+    lines += sorted(POLICY, key=lambda line: (len(line), line))
+    return "\n".join(lines)
+
+
+def search_web(query: str) -> str:
+    """Search the web for `query`."""
+    return query
+
+
+def run_command(command: str, working_directory: str = "~") -> str:
+    """Run a shell command."""
+    return command
+
+
+def send_email(to: str, subject: str, body: str) -> str:
+    """Send an email."""
+    return to
+
+
+def create_reminder(text: str, when: str) -> str:
+    """Create a reminder."""
+    return text
+
+
+AGENT = Agent(name="Assistant", instructions=instructions,
+              functions=[search_web, run_command, send_email, create_reminder])
+
+
+class PrefixCachingOpenAI(FakeOpenAI):
+    """Reports the prompt tokens an exact-prefix cache of earlier prompts would have served."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen = set()
+
+    def usage(self, params) -> CompletionUsage:
+        prompt = json.dumps(params.get("tools")) + "".join(json.dumps(m) for m in params["messages"])
+        prompt = prompt.encode()
+        digest, matched = hashlib.sha1(), 0
+        for end in range(BLOCK, len(prompt) + 1, BLOCK):
+            digest.update(prompt[end - BLOCK:end])
+            key = digest.digest()
+            if key in self.seen and matched == end - BLOCK:
+                matched = end
+            self.seen.add(key)
+        cached = matched if matched >= MINIMUM else 0
+        return CompletionUsage.model_validate({
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": 0,
+            "total_tokens": len(prompt) // 4,
+            "prompt_tokens_details": {"cached_tokens": cached // 4},
+        })
+
+    def create(self, **params):
+        result = super().create(**params)
+        usage = self.usage(params)
+        if not params.get("stream"):
+            result.usage = usage
+            return result
+        if not (params.get("stream_options") or {}).get("include_usage"):
+            return result
+        final = ChatCompletionChunk.model_validate({
+            "id": "chatcmpl-usage", "object": "chat.completion.chunk", "created": 0,
+            "model": params["model"], "choices": [], "usage": usage.model_dump(),
+        })
+        return itertools.chain(result, [final])
+
+
+def reply(request: dict) -> dict:
+    turn = sum(1 for m in request["messages"] if m["role"] == "user")
+    return {"content": f"Here is what I found for request {turn}. " + "Some details. " * 40}
+
+
+def run(swarm: Swarm, window: ContextWindow, turns: int):
+    context = {"user_name": "Sam", "locale": "en-GB"}
+    history, build, prefixes = [], [], set()
+    evaluations = 0
+
+    def counted(context_variables):
+        nonlocal evaluations
+        evaluations += 1
+        return instructions(context_variables)
+
+    build_completion_params = swarm.build_completion_params
+
+    def timed(*args):
+        start = time.perf_counter()
+        params = build_completion_params(*args)
+        build.append(time.perf_counter() - start)
+        prefixes.add(json.dumps([params["messages"][0], params["tools"]]))
+        return params
+
+    swarm.build_completion_params = timed
+    agent = AGENT.model_copy(update={"instructions": counted})
+    for turn in range(turns):
+        history.append({"role": "user", "content": f"Question {turn}: " + "tell me more " * 20})
+        for chunk in swarm.run(agent, window.select(history), context, stream=True):
+            if "response" in chunk:
+                history.extend(chunk["response"].messages)
+    return evaluations, build, len(prefixes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, default=6000)
+    args = parser.parse_args()
+
+    configs = {
+        "called, sliding": ({}, 1.0),
+        "memoized, trimmed": (dict(memoize_instructions=True), ContextWindow().trim_to),
+    }
+    for name, (options, trim_to) in configs.items():
+        swarm = Swarm(client=PrefixCachingOpenAI(reply), stream_usage=True, **options)
+        window = ContextWindow(max_tokens=args.max_tokens, reserve_tokens=1000, trim_to=trim_to)
+        evaluations, build, prefixes = run(swarm, window, args.turns)
+        usage = swarm.usage.stats()
+        print(f"{name:>18}: {evaluations:4d} instruction calls, "
+              f"build params {sum(build) / len(build) * 1e6:6.1f} us/turn, "
+              f"{prefixes} distinct static prefixes, "
+              f"{usage['cached_tokens']}/{usage['prompt_tokens']} prompt tokens cached "
+              f"({usage['cache_hit_rate']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Failed requests and tail latency with retries, a first-token deadline and hedging.
+
+Streams completions through the real `OpenAI` client (its own retries off)
+from `FakeCompletionServer`, which fails `--error-rate` of the requests with
+a 503 and delays `--slow-rate` of them by `--slow-latency` seconds. Each
+configuration of `ResilientClient` gets a fresh server with the same seed,
+so they see the same faults.
+
+    python -m benchmarks.bench_resilience --requests 400 --concurrency 8
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import AsyncOpenAI, OpenAI
+
+from swarm.resilience import AsyncResilientClient, ResilientClient
+
+from .fake_server import FakeCompletionServer
+
+PARAMS = {
+    "model": "fake",
+    "messages": [{"role": "user", "content": "Say something reasonably long, please."}],
+    "stream": True,
+}
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_sync(client, requests: int, concurrency: int):
+    def one(_):
+        start = time.perf_counter()
+        try:
+            text = "".join(
+                chunk.choices[0].delta.content or "" for chunk in client.chat.completions.create(**PARAMS))
+        except Exception:
+            return None
+        assert text.startswith("echo:"), text
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+def run_async(client, requests: int, concurrency: int):
+    async def one(semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                text = "".join([
+                    chunk.choices[0].delta.content or ""
+                    async for chunk in await client.chat.completions.create(**PARAMS)
+                ])
+            except Exception:
+                return None
+            assert text.startswith("echo:"), text
+            return time.perf_counter() - start
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(one(semaphore) for _ in range(requests)))
+
+    return asyncio.run(main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    retry = dict(max_retries=3, backoff_base=0.02)
+    configurations = [
+        ("plain client", False, None),
+        ("retries", False, retry),
+        ("retries + 0.2s first-token deadline", False, {**retry, "first_token_timeout": 0.2}),
+        ("retries + hedge at p90", False, {**retry, "hedge_percentile": 0.9}),
+        ("async: retries + hedge at p90", True, {**retry, "hedge_percentile": 0.9}),
+    ]
+    for name, use_async, options in configurations:
+        with FakeCompletionServer(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            slow_rate=args.slow_rate,
+            slow_latency=args.slow_latency,
+            seed=args.seed,
+        ) as server:
+            client_class = AsyncOpenAI if use_async else OpenAI
+            client = client_class(base_url=server.base_url, api_key="fake", max_retries=0)
+            if options is not None:
+                client = (AsyncResilientClient if use_async else ResilientClient)(client, **options)
+            start = time.perf_counter()
+            run = run_async if use_async else run_sync
+            latencies = run(client, args.requests, args.concurrency)
+            elapsed = time.perf_counter() - start
+            ok = [latency for latency in latencies if latency is not None]
+            print(
+                f"{name:>36}: {len(latencies) - len(ok):3d} failed, p50 {percentile(ok, 0.5) * 1e3:6.1f} ms, "
+                f"p95 {percentile(ok, 0.95) * 1e3:7.1f} ms, p99 {percentile(ok, 0.99) * 1e3:7.1f} ms, "
+                f"{server.requests} upstream requests in {elapsed:.1f}s"
+            )
+            if options is not None:
+                stats = client.stats()
+                print(f"{'':>36}  retries {stats['retries']}, hedges {stats['hedges']} "
+                      f"(won {stats['hedge_wins']}), first-token timeouts {stats['first_token_timeouts']}")
+
+
+if __name__ == "__main__":
+    main()
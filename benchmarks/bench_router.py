@@ -0,0 +1,89 @@
+"""
+Offline evaluation of the local pre-router.
+
+Classifies the labeled messages in `data/routing.jsonl` and reports the hit
+rate (messages routed locally), the accuracy of routed messages and the
+classification cost. It then replays the dataset through `AgentController`
+with a fake model that takes `--model-latency` seconds per completion, with
+and without the router, to measure completions and wall time saved.
+
+    python -m benchmarks.bench_router --model-latency 0.05
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+from swarm import Swarm
+from swarm.controller import AgentController
+from swarm.routing import KeywordRouter
+
+from .fake_client import FakeOpenAI
+from .scenarios import AgentResponder
+
+DATASET = os.path.join(os.path.dirname(__file__), "data", "routing.jsonl")
+
+
+def load_dataset(path: str = DATASET):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(router, dataset):
+    routed, correct, confusion = 0, 0, Counter()
+    for example in dataset:
+        decision = router.route(example["text"])
+        if decision is None:
+            confusion[(example["route"], "fallback")] += 1
+            continue
+        routed += 1
+        correct += decision.route == example["route"]
+        confusion[(example["route"], decision.route)] += 1
+    return routed, correct, confusion
+
+
+def replay(dataset, router, latency: float):
+    responder = AgentResponder()
+
+    def slow_responder(request):
+        time.sleep(latency)
+        return responder(request)
+
+    client = FakeOpenAI(slow_responder)
+    controller = AgentController(swarm=Swarm(client=client), router=router)
+    start = time.perf_counter()
+    for example in dataset:
+        controller.handle_message(example["text"])
+    return client.requests, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--model-latency", type=float, default=0.05)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+    router = KeywordRouter(threshold=args.threshold)
+    routed, correct, confusion = evaluate(router, dataset)
+    stats = router.stats
+    print(f"examples        : {len(dataset)}")
+    print(f"hit rate        : {stats.hit_rate:.1%} ({routed} routed locally, {stats.fallbacks} to orchestrator)")
+    print(f"routed accuracy : {correct / routed if routed else 0:.1%}")
+    print(f"classify cost   : {stats.route_seconds / stats.requests * 1e6:.1f} us/message")
+    for (label, predicted), count in sorted(confusion.items()):
+        if predicted not in (label, "fallback"):
+            print(f"  misrouted {label} -> {predicted}: {count}")
+
+    baseline_completions, baseline_seconds = replay(dataset, None, args.model_latency)
+    routed_completions, routed_seconds = replay(dataset, KeywordRouter(threshold=args.threshold), args.model_latency)
+    print(f"orchestrator only: {baseline_completions} completions, {baseline_seconds:.2f}s")
+    print(f"with pre-router  : {routed_completions} completions, {routed_seconds:.2f}s "
+          f"(saved {baseline_seconds - routed_seconds:.2f}s, "
+          f"estimate {stats.saved_seconds(args.model_latency):.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Rate-limit errors, interactive latency and fairness with a shared `Scheduler`.
+
+A fake provider allows `--rate` requests a second (a token bucket holding
+one second of requests) and rejects the rest with a 429; accepted requests
+take `--latency` seconds. For `--seconds`, `--bulk` threads send batch
+requests back to back, one "heavy" session sends default-priority requests
+from `--heavy` threads, a "light" session sends them from one thread, and
+`--users` interactive users each send a streamed request every
+`--think` seconds. Runs without a scheduler, then with one set just under
+the provider's limit.
+
+    python -m benchmarks.bench_scheduler --seconds 5 --rate 40 --bulk 16
+"""
+import argparse
+import threading
+import time
+from collections import defaultdict
+
+from swarm.scheduler import BATCH, DEFAULT, INTERACTIVE, RateLimitedClient, Scheduler, scheduling
+
+from .bench_loop import percentile
+from .fake_client import FakeOpenAI
+
+PARAMS = {"model": "fake", "messages": [{"role": "user", "content": "Summarise this ticket, please."}]}
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class LimitedProvider(FakeOpenAI):
+    def __init__(self, rate: float, latency: float):
+        super().__init__()
+        self.rate = rate
+        self.latency = latency
+        self.level = rate
+        self.updated = time.monotonic()
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def create(self, **params):
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.rate, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.level < 1:
+                self.rejected += 1
+                raise RateLimited("rate limit reached")
+            self.level -= 1
+        time.sleep(self.latency)
+        return super().create(**params)
+
+
+def run(client, args):
+    stop = time.monotonic() + args.seconds
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def worker(name, priority, session, think, stream):
+        with scheduling(priority=priority, session=session):
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                try:
+                    result = client.chat.completions.create(**PARAMS, stream=stream)
+                    if stream:
+                        for _ in result:
+                            pass
+                    with lock:
+                        latencies[name].append(time.perf_counter() - start)
+                except RateLimited:
+                    with lock:
+                        errors[name] += 1
+                    time.sleep(0.01)
+                if think:
+                    time.sleep(think)
+
+    threads = [threading.Thread(target=worker, args=("bulk", BATCH, "bulk", 0, False))
+               for _ in range(args.bulk)]
+    threads += [threading.Thread(target=worker, args=("heavy", DEFAULT, "heavy", 0, False))
+                for _ in range(args.heavy)]
+    threads.append(threading.Thread(target=worker, args=("light", DEFAULT, "light", 0, False)))
+    threads += [threading.Thread(target=worker, args=("interactive", INTERACTIVE, f"user{i}", args.think, True))
+                for i in range(args.users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=40.0, help="provider limit, requests a second")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--bulk", type=int, default=16)
+    parser.add_argument("--heavy", type=int, default=6)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--think", type=float, default=0.3)
+    args = parser.parse_args()
+
+    for name in ("no scheduler", "scheduler"):
+        provider = LimitedProvider(args.rate, args.latency)
+        client = provider
+        if name == "scheduler":
+            client = RateLimitedClient(provider, Scheduler(requests_per_minute=args.rate * 60 * 0.95))
+        latencies, errors = run(client, args)
+        print(f"{name}: {provider.requests} requests served, {provider.rejected} rejected with 429")
+        for kind in ("interactive", "light", "heavy", "bulk"):
+            values = latencies[kind]
+            if values:
+                print(f"  {kind:>11}: {len(values):5d} ok, {errors[kind]:5d} 429s, "
+                      f"p50 {percentile(values, 0.5) * 1e3:7.1f} ms, p99 {percentile(values, 0.99) * 1e3:7.1f} ms")
+            else:
+                print(f"  {kind:>11}:     0 ok, {errors[kind]:5d} 429s")
+        if name == "scheduler":
+            stats = client.stats()["scheduler"]
+            print("  queued at the end:", {p: stats[p]["queued"] for p in (INTERACTIVE, DEFAULT, BATCH)})
+
+
+if __name__ == "__main__":
+    main()
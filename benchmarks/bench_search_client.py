@@ -0,0 +1,60 @@
+"""
+Latency of `BraveSearchClient` against a local Brave stand-in.
+
+Compares a fresh `requests.get` per query (the previous behaviour) with the
+pooled client on cold queries, repeated and near-identical queries, and a
+burst of concurrent identical queries.
+
+    python -m benchmarks.bench_search_client --latency 0.02
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from swarm.agents.brave_client import BraveSearchClient
+
+from .fake_brave import FakeBraveServer
+
+
+def params(query: str) -> dict:
+    return {"q": query, "count": 10, "country": "US", "search_lang": "en",
+            "safesearch": "moderate", "text_decorations": 1, "spellcheck": 1}
+
+
+def timed(fn, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    with FakeBraveServer(latency=args.latency) as server:
+        n = args.queries
+        fresh = timed(lambda i: requests.get(server.base_url, params=params(f"fresh {i}"), timeout=10).json(), n)
+        client = BraveSearchClient(base_url=server.base_url)
+        cold = timed(lambda i: client.search(params(f"cold {i}")), n)
+        repeated = timed(lambda i: client.search(params(f"  COLD {i % n}  ")), n)
+
+        before = server.requests
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            start = time.perf_counter()
+            list(pool.map(lambda _: client.search(params("weather in tampa")), range(32)))
+            burst = (time.perf_counter() - start) * 1e3
+        collapsed = server.requests - before
+
+    print(f"requests.get per query: {fresh:7.2f} ms/query")
+    print(f"pooled client, cold   : {cold:7.2f} ms/query")
+    print(f"near-identical repeat : {repeated:7.3f} ms/query")
+    print(f"32 concurrent same    : {burst:7.2f} ms total, {collapsed} upstream request(s)")
+
+
+if __name__ == "__main__":
+    main()
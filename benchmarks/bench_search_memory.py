@@ -0,0 +1,77 @@
+"""
+Memory held per session by search results over a 100-search session.
+
+Runs `perform_web_search` against a local Brave stand-in and merges each
+result into the session context the way `AgentController` does. Compares the
+previous layout (the full `raw_response` payload in context, copied again
+into `search_results` by `handle_task_completion`) with the compact
+`SearchResultStore` referenced by `search_id`.
+
+    python -m benchmarks.bench_search_memory --searches 100
+"""
+import argparse
+import importlib
+import sys
+
+from swarm.agents.brave_client import BraveSearchClient, SearchCache
+from swarm.agents.search_store import SearchResultStore
+
+from .fake_brave import FakeBraveServer, search_payload
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+# the package re-exports the agent under the module's name, so fetch the module itself
+brave_search_agent = importlib.import_module("swarm.agents.brave_search_agent")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=100)
+    args = parser.parse_args()
+
+    session_id = "bench-session"
+    with FakeBraveServer() as server:
+        # no response cache, so only the session's own references keep payloads alive
+        brave_search_agent.search_client = BraveSearchClient(
+            base_url=server.base_url, cache=SearchCache(maxsize=0))
+        brave_search_agent.search_store = store = SearchResultStore()
+        context = {"session_id": session_id}
+        for i in range(args.searches):
+            result = brave_search_agent.perform_web_search(
+                f"query number {i}", context_variables=context)
+            context.update(result.context_variables)
+
+    raw = search_payload("query number 0")
+    raw_bytes = deep_sizeof(raw)
+    hits = store.get(session_id, context["search_id"])
+    compact_bytes = deep_sizeof(hits)
+
+    # previous layout: latest raw payload in context (and shared into search_results),
+    # deep-copied on every run; sessions that kept search_results per turn held all of them
+    previous_context = deep_sizeof({"raw_response": raw, "search_results": raw})
+    current_context = deep_sizeof(context)
+
+    print(f"raw Brave payload per search   : {raw_bytes / 1024:8.1f} KiB")
+    print(f"compact results per search     : {compact_bytes / 1024:8.1f} KiB")
+    print(f"context, previous layout       : {previous_context / 1024:8.1f} KiB copied every turn")
+    print(f"context, search_id reference   : {current_context / 1024:8.1f} KiB")
+    print(f"{f'store for {args.searches} searches':<31}: {store.session_bytes(session_id) / 1024:8.1f} KiB "
+          f"(budget {store.max_bytes_per_session // 1024} KiB, "
+          f"{len(store.sessions[session_id])} searches kept)")
+    print(f"{f'all {args.searches} raw payloads':<31}: {args.searches * raw_bytes / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
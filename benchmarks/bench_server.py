@@ -0,0 +1,140 @@
+"""
+Load test of the session server against a fake model backend.
+
+Starts `FakeCompletionServer` (playing the built-in agents with
+`AgentResponder`) and `python -m swarm.server` in a child process pointed at
+it, then drives `--users` simulated users, each creating a session and
+sending `--messages` streamed messages with `--think` seconds between them.
+Reports p50/p99 time to first chunk and full reply latency, and how many
+concurrent sessions one core of the server process sustains
+(users / (server CPU seconds / wall seconds)).
+
+    python -m benchmarks.bench_server --users 50 --messages 5 --latency 0.05
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from .bench_loop import percentile
+from .fake_server import FakeCompletionServer
+from .scenarios import USER_MESSAGES, AgentResponder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(backend_url: str, max_sessions: int, max_streams: int):
+    env = dict(os.environ, OPENAI_BASE_URL=backend_url, OPENAI_API_KEY="fake")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "swarm.server", "--port", "0",
+            "--max-sessions", str(max_sessions), "--max-streams", str(max_streams),
+        ],
+        env=env,
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = process.stdout.readline()
+    if not line.startswith("Serving on "):
+        process.kill()
+        raise RuntimeError(f"server failed to start: {line!r}")
+    return process, line.split()[-1]
+
+
+def read_reply(response) -> tuple:
+    """Consumes an SSE reply; returns (seconds to first chunk, text)."""
+    start = time.perf_counter()
+    first, text, event = None, [], None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: ") and event is None:
+            if first is None:
+                first = time.perf_counter() - start
+            text.append(json.loads(line[len("data: "):])["content"])
+    return first, "".join(text)
+
+
+def simulate_user(url: str, user: int, messages: int, think: float, results: dict) -> None:
+    http = requests.Session()
+    session_id = http.post(f"{url}/sessions").json()["session_id"]
+    for turn in range(messages):
+        message = USER_MESSAGES[(user + turn) % len(USER_MESSAGES)]
+        start = time.perf_counter()
+        with http.post(
+            f"{url}/sessions/{session_id}/messages",
+            json={"message": message},
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                results["errors"].append(response.status_code)
+                continue
+            first, reply = read_reply(response)
+        results["latencies"].append(time.perf_counter() - start)
+        results["first_chunk"].append(first if first is not None else 0.0)
+        if reply.startswith("I encountered"):
+            results["errors"].append(reply)
+        if think:
+            time.sleep(think)
+    http.delete(f"{url}/sessions/{session_id}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=5)
+    parser.add_argument("--think", type=float, default=0.0, help="seconds between a user's messages")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency per request")
+    parser.add_argument("--max-streams", type=int, default=256)
+    args = parser.parse_args()
+
+    with FakeCompletionServer(AgentResponder(), latency=args.latency) as backend:
+        process, url = start_server(
+            backend.base_url, max_sessions=args.users * 2, max_streams=args.max_streams)
+        try:
+            results = {"latencies": [], "first_chunk": [], "errors": []}
+            before = requests.get(f"{url}/stats").json()
+            start = time.perf_counter()
+            users = [
+                threading.Thread(
+                    target=simulate_user, args=(url, user, args.messages, args.think, results))
+                for user in range(args.users)
+            ]
+            for thread in users:
+                thread.start()
+            for thread in users:
+                thread.join()
+            wall = time.perf_counter() - start
+            after = requests.get(f"{url}/stats").json()
+        finally:
+            process.terminate()
+            process.wait()
+
+    latencies, first_chunk = results["latencies"], results["first_chunk"]
+    cpu = after["cpu_seconds"] - before["cpu_seconds"]
+    cores = cpu / wall
+    print(
+        f"{args.users} users x {args.messages} messages in {wall:.2f} s, "
+        f"{len(latencies) / wall:.1f} replies/s, {len(results['errors'])} errors, "
+        f"{backend.requests} model requests"
+    )
+    print(
+        f"reply latency p50 {percentile(latencies, 0.50) * 1e3:.1f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1e3:.1f} ms; first chunk "
+        f"p50 {percentile(first_chunk, 0.50) * 1e3:.1f} ms, "
+        f"p99 {percentile(first_chunk, 0.99) * 1e3:.1f} ms"
+    )
+    print(
+        f"server CPU {cpu:.2f} s ({cores:.2f} cores busy), "
+        f"{args.users / cores if cores else float('inf'):.0f} concurrent sessions per core"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Write amplification and resume latency of `SessionStore`.
+
+Write amplification is bytes written to disk per byte of message payload
+over a whole conversation, compared with rewriting the full history as one
+JSON file after every turn. Resume latency is the time to load the last
+`--window` messages of sessions of growing length, compared with parsing
+the whole log.
+
+    python -m benchmarks.bench_session_store --turns 500 --window 256
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from swarm.session_store import SessionStore
+
+from .scenarios import INSTRUCTOR_ANSWER, SEARCH_ANSWER
+
+
+def turn_messages(turn: int) -> list:
+    """One orchestrated turn: routing tool call, its result and the answer."""
+    return [
+        {
+            "role": "assistant", "content": None, "sender": "Orchestrator",
+            "tool_calls": [{
+                "id": f"call_{turn}", "type": "function",
+                "function": {"name": "delegate_to_search", "arguments": json.dumps({"request": "weather"})},
+            }],
+        },
+        {"role": "tool", "tool_call_id": f"call_{turn}", "tool_name": "delegate_to_search", "content": "ok"},
+        {"role": "assistant", "content": SEARCH_ANSWER if turn % 2 else INSTRUCTOR_ANSWER, "sender": "Instructor"},
+    ]
+
+
+def write_amplification(root: str, turns: int) -> None:
+    store = SessionStore(os.path.join(root, "amplification"))
+    history, payload, rewrite_bytes = [], 0, 0
+    for turn in range(turns):
+        messages = turn_messages(turn)
+        history.extend(messages)
+        payload += sum(len(json.dumps(m, separators=(",", ":"))) for m in messages)
+        count = store.append("session", messages)
+        if store.snapshot_due("session", count):
+            store.save_snapshot("session", count, {"last_agent": "Instructor", "active_tasks": {}})
+        # the naive alternative: dump the whole history every turn
+        rewrite_bytes += len(json.dumps(history, separators=(",", ":")))
+    print(
+        f"write amplification over {turns} turns: append log {store.bytes_written / payload:.2f}x, "
+        f"rewrite history {rewrite_bytes / payload:.1f}x"
+    )
+
+
+def resume_latency(root: str, sizes, window: int, repeat: int = 5) -> None:
+    store = SessionStore(os.path.join(root, "resume"))
+    for size in sizes:
+        session_id = f"session-{size}"
+        turns = [turn_messages(turn) for turn in range(size // 3)]
+        store.append(session_id, [message for turn in turns for message in turn])
+        log_path = os.path.join(store.root, session_id + ".jsonl")
+
+        def tail():
+            return store.tail(session_id, window)
+
+        def full():
+            with open(log_path, "rb") as f:
+                return [json.loads(line) for line in f][-window:]
+
+        timings = {}
+        for name, load in (("tail", tail), ("full parse", full)):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                loaded = load()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = (best, loaded)
+        assert timings["tail"][1] == timings["full parse"][1]
+        print(
+            f"resume last {window} of {store.count(session_id):>6} messages: "
+            f"tail {timings['tail'][0] * 1e3:7.2f} ms, full parse {timings['full parse'][0] * 1e3:8.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--window", type=int, default=256)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        write_amplification(root, args.turns)
+        resume_latency(root, args.sizes, args.window)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Per-command latency of a persistent `ShellWorker` against spawning a shell per command.
+
+The spawning side starts a fresh `ShellWorker` for every command and closes it after.
+
+    python -m benchmarks.bench_shell_worker --commands 200
+"""
+import argparse
+import tempfile
+import time
+
+from swarm.agents.shell_worker import ShellWorker
+
+COMMANDS = ["true", "echo hello", "ls", "pwd"]
+
+
+def run_in_new_shell(command: str, cwd: str):
+    worker = ShellWorker(cwd=cwd)
+    try:
+        return worker.run(command)
+    finally:
+        worker.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=200)
+    args = parser.parse_args()
+
+    cwd = tempfile.gettempdir()
+    worker = ShellWorker(cwd=cwd)
+    worker.run("true")  # start the shell outside the timing
+
+    for name, run in (
+        ("spawn per call", lambda command: run_in_new_shell(command, cwd)),
+        ("shell worker", worker.run),
+    ):
+        start = time.perf_counter()
+        for i in range(args.commands):
+            result = run(COMMANDS[i % len(COMMANDS)])
+            assert result.exit_code == 0, result
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14}: {elapsed / args.commands * 1e3:6.2f} ms/command")
+
+    # state carries over between commands only in the worker
+    worker.run("cd / && export SWARM_BENCH=1")
+    print(f"worker cwd after cd: {worker.cwd}, env kept: {worker.run('echo $SWARM_BENCH').stdout.strip() == '1'}")
+    worker.close()
+
+
+if __name__ == "__main__":
+    main()
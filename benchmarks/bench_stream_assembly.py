@@ -0,0 +1,115 @@
+"""
+Replays a recorded ~10k-chunk completion stream through message assembly.
+
+Compares the previous path (`delta.json()` -> `json.loads` -> `merge_chunk`
+with `+=` on strings) against `StreamAccumulator` plus `delta_to_dict`.
+Pass `--recording` to replay a captured stream instead: a JSONL file with one
+`chat.completion.chunk` payload per line.
+
+    python -m benchmarks.bench_stream_assembly
+"""
+import argparse
+import json
+import time
+import warnings
+from collections import defaultdict
+
+from openai.types.chat import ChatCompletionChunk
+
+from swarm.util import StreamAccumulator, delta_to_dict
+
+from .fake_server import stream_chunks, tool_call
+
+
+def synthetic_recording(chunks: int = 10000):
+    # half the chunks stream content, the other half one large tool argument
+    half = chunks // 2
+    message = {
+        "content": "word " * (half * 4 // 5),
+        "tool_calls": [tool_call("write_file", {"body": "x" * (half * 4 - 12)}, "call_0")],
+    }
+    return list(stream_chunks(message, chunk_size=4))
+
+
+def load_recording(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# the merge helpers the previous path used, as they were in swarm.util
+def merge_fields(target, source):
+    for key, value in source.items():
+        if isinstance(value, str):
+            target[key] += value
+        elif value is not None and isinstance(value, dict):
+            merge_fields(target[key], value)
+
+
+def merge_chunk(final_response: dict, delta: dict) -> None:
+    delta.pop("role", None)
+    merge_fields(final_response, delta)
+
+    tool_calls = delta.get("tool_calls")
+    if tool_calls and len(tool_calls) > 0:
+        index = tool_calls[0].pop("index")
+        merge_fields(final_response["tool_calls"][index], tool_calls[0])
+
+
+def previous_assembly(chunks, sender="Agent"):
+    # pydantic warns that `.json()` is deprecated; it is what the old path called
+    warnings.simplefilter("ignore", DeprecationWarning)
+    message = {
+        "content": "",
+        "sender": sender,
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": defaultdict(
+            lambda: {"function": {"arguments": "", "name": ""}, "id": "", "type": ""}
+        ),
+    }
+    for chunk in chunks:
+        delta = json.loads(chunk.choices[0].delta.json())
+        if delta["role"] == "assistant":
+            delta["sender"] = sender
+        delta.pop("role", None)
+        delta.pop("sender", None)
+        merge_chunk(message, delta)
+    message["tool_calls"] = list(message["tool_calls"].values()) or None
+    return message
+
+
+def accumulated_assembly(chunks, sender="Agent"):
+    accumulator = StreamAccumulator(sender)
+    for chunk in chunks:
+        delta = chunk.choices[0].delta
+        accumulator.add(delta)
+        delta = delta_to_dict(delta)
+        if delta["role"] == "assistant":
+            delta["sender"] = sender
+    return accumulator.message()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recording")
+    parser.add_argument("--chunks", type=int, default=10000)
+    args = parser.parse_args()
+
+    payloads = load_recording(args.recording) if args.recording else synthetic_recording(args.chunks)
+    chunks = [ChatCompletionChunk.model_validate(p) for p in payloads]
+
+    results = {}
+    for label, assemble in (("previous", previous_assembly), ("accumulator", accumulated_assembly)):
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            results[label] = assemble(chunks)
+            best = min(best, time.perf_counter() - start)
+        print(f"{label:>11}: {best * 1000:8.1f} ms for {len(chunks)} chunks ({best / len(chunks) * 1e6:.2f} us/chunk)")
+    # the accumulator's `Message` leaves out the always-None legacy function_call
+    results["previous"].pop("function_call")
+    assert results["previous"] == results["accumulator"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Microbenchmark for per-turn tool schema construction.
+
+Compares rebuilding the tool list with `function_to_json` on every turn (the
+previous behaviour of `Swarm.get_chat_completion`) against `compile_tools`.
+
+    python -m benchmarks.bench_tool_schemas
+"""
+import timeit
+
+from swarm.util import __CTX_VARS_NAME__, compile_tools, function_to_json
+
+
+# Stand-ins with the same signatures as the orchestrator's five tools
+def handle_task_completion(request: str, context_variables: dict = {}):
+    """Handles task completion from specialized agents and decides next steps."""
+
+
+def delegate_to_applescript(request: str, context_variables: dict = {}):
+    """Delegates a task to the AppleScript agent when appropriate."""
+
+
+def delegate_to_terminal(request: str, context_variables: dict = {}):
+    """Delegates a task to the Terminal agent when appropriate."""
+
+
+def delegate_to_search(request: str, context_variables: dict = {}):
+    """Delegates a task to the Brave Search agent when appropriate."""
+
+
+def continue_with_instructor(request: str, context_variables: dict = {}):
+    """Continues the conversation with the main instructor agent."""
+
+
+FUNCTIONS = [
+    handle_task_completion,
+    delegate_to_applescript,
+    delegate_to_terminal,
+    delegate_to_search,
+    continue_with_instructor,
+]
+
+
+def uncached_turn(functions):
+    tools = [function_to_json(f) for f in functions]
+    for tool in tools:
+        params = tool["function"]["parameters"]
+        params["properties"].pop(__CTX_VARS_NAME__, None)
+        if __CTX_VARS_NAME__ in params["required"]:
+            params["required"].remove(__CTX_VARS_NAME__)
+    function_map = {f.__name__: f for f in functions}
+    return tools, function_map
+
+
+def cached_turn(functions):
+    compiled = compile_tools(functions)
+    return compiled.tools, compiled.function_map
+
+
+def main(turns: int = 20000) -> None:
+    # compile_tools also sorts the tools by name
+    by_name = sorted(uncached_turn(FUNCTIONS)[0], key=lambda tool: tool["function"]["name"])
+    assert by_name == cached_turn(FUNCTIONS)[0]
+
+    for label, fn in (("uncached", uncached_turn), ("cached", cached_turn)):
+        seconds = min(timeit.repeat(lambda: fn(FUNCTIONS), number=turns, repeat=5))
+        print(f"{label:>9}: {seconds / turns * 1e6:8.2f} us/turn ({len(FUNCTIONS)} tools)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Local stand-in for the Brave web search endpoint.
+
+    with FakeBraveServer(latency=0.05) as server:
+        client = BraveSearchClient(base_url=server.base_url)
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def search_payload(query: str, count: int = 10) -> dict:
+    return {
+        "type": "search",
+        "query": {"original": query},
+        "web": {
+            "type": "search",
+            "results": [
+                {
+                    "title": f"{query} - result {i}",
+                    "url": f"https://example.com/{i}?q={query.replace(' ', '+')}",
+                    "description": f"Description of result {i} for {query}. " * 4,
+                    "meta_url": {"hostname": "example.com", "path": f"/{i}"},
+                    "extra_snippets": [f"Snippet {j} for {query}." for j in range(3)],
+                    "profile": {"name": "Example", "url": "https://example.com"},
+                }
+                for i in range(count)
+            ],
+        },
+    }
+
+
+class FakeBraveServer:
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._httpd.request_queue_size = 1024
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/res/v1/web/search"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                params = parse_qs(urlparse(self.path).query)
+                body = json.dumps(search_payload(
+                    params.get("q", [""])[0], int(params.get("count", ["10"])[0])
+                )).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
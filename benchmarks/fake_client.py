@@ -0,0 +1,77 @@
+"""
+In-process, deterministic stand-ins for `OpenAI` and `AsyncOpenAI`.
+
+They implement `client.chat.completions.create(**params)` and return real
+`ChatCompletion` objects, or an iterator of `ChatCompletionChunk` objects when
+`stream=True`, so they can be passed straight to `Swarm(client=...)` and
+`AsyncSwarm(client=...)`. Replies come from the same `responder(request)`
+callables used by `FakeCompletionServer`.
+"""
+import itertools
+from types import SimpleNamespace
+from typing import Callable, List
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from .fake_server import completion_payload, echo_responder, stream_chunks
+
+
+class ScriptedResponder:
+    """Replays a fixed list of assistant messages in order, wrapping around at the end."""
+
+    def __init__(self, script: List[dict]):
+        self.script = script
+        self.position = 0
+
+    def reset(self) -> None:
+        self.position = 0
+
+    def __call__(self, request: dict) -> dict:
+        message = self.script[self.position % len(self.script)]
+        self.position += 1
+        return message
+
+
+class FakeOpenAI:
+    def __init__(self, responder: Callable[[dict], dict] = echo_responder, chunk_size: int = 4):
+        self.responder = responder
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.last_request = None
+        self._ids = itertools.count()
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **params):
+        self.requests += 1
+        self.last_request = params
+        message = self.responder(params)
+        completion_id = f"chatcmpl-{next(self._ids)}"
+        model = params.get("model", "fake")
+        if params.get("stream"):
+            return (
+                ChatCompletionChunk.model_validate(payload)
+                for payload in stream_chunks(
+                    message, model, self.chunk_size, completion_id, created=0)
+            )
+        return ChatCompletion.model_validate(
+            completion_payload(message, model, completion_id, created=0))
+
+
+class _AsyncChunks:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncFakeOpenAI(FakeOpenAI):
+    async def create(self, **params):
+        result = super().create(**params)
+        return _AsyncChunks(result) if params.get("stream") else result
@@ -0,0 +1,238 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Serves `POST /v1/chat/completions` in both the plain JSON and the SSE
+streaming format, so `OpenAI(base_url=...)` and `AsyncOpenAI(base_url=...)`
+can be pointed at it without network access:
+
+    with FakeCompletionServer(latency=0.05) as server:
+        client = AsyncOpenAI(base_url=server.base_url, api_key="fake")
+
+Latency and failures can be injected with `latency`, `slow_rate`/`slow_latency`
+and `error_rate`/`error_status`.
+
+Replies are produced by a `responder(request_body) -> message` callable. The
+returned message is a dict with optional `content` and `tool_calls` keys in
+the wire format; `tool_call()` builds the latter.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+
+def tool_call(name: str, arguments: dict, call_id: Optional[str] = None) -> dict:
+    return {
+        "id": call_id or f"call_{uuid.uuid4().hex[:24]}",
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+def echo_responder(request: dict) -> dict:
+    """Replies with the content of the last user message."""
+    for message in reversed(request.get("messages", [])):
+        if message.get("role") == "user":
+            return {"content": f"echo: {message.get('content', '')}"}
+    return {"content": "echo"}
+
+
+def split_text(text: str, size: int = 4):
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def completion_payload(
+    message: dict,
+    model: str = "fake",
+    completion_id: str = "chatcmpl-0",
+    created: Optional[int] = None,
+) -> dict:
+    """Returns the `chat.completion` payload for a non-streaming reply of `message`."""
+    message = {"role": "assistant", "content": None, **message}
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()) if created is None else created,
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def stream_chunks(
+    message: dict,
+    model: str = "fake",
+    chunk_size: int = 4,
+    completion_id: str = "chatcmpl-0",
+    created: Optional[int] = None,
+):
+    """Yields `chat.completion.chunk` payloads that stream `message` the way the API does."""
+    created = int(time.time()) if created is None else created
+
+    def chunk(delta, finish_reason=None):
+        return {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    yield chunk({"role": "assistant", "content": ""})
+    if message.get("content"):
+        for piece in split_text(message["content"], chunk_size):
+            yield chunk({"content": piece})
+    for index, call in enumerate(message.get("tool_calls") or []):
+        yield chunk({"tool_calls": [{
+            "index": index,
+            "id": call["id"],
+            "type": "function",
+            "function": {"name": call["function"]["name"], "arguments": ""},
+        }]})
+        for piece in split_text(call["function"]["arguments"], chunk_size):
+            yield chunk({"tool_calls": [{"index": index, "function": {"arguments": piece}}]})
+    yield chunk({}, "tool_calls" if message.get("tool_calls") else "stop")
+
+
+class FakeCompletionServer:
+    def __init__(
+        self,
+        responder: Callable[[dict], dict] = echo_responder,
+        latency: float = 0.0,
+        chunk_size: int = 4,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.responder = responder
+        self.latency = latency
+        self.chunk_size = chunk_size
+        # fault injection: a share of requests fail with `error_status`, and
+        # a share of the others take `slow_latency` extra seconds
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.slow = 0
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._httpd.request_queue_size = 1024
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeCompletionServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def completion(self, request: dict) -> dict:
+        return completion_payload(
+            self.responder(request),
+            model=request.get("model", "fake"),
+            completion_id=f"chatcmpl-{next(self._ids)}",
+        )
+
+    def chunks(self, request: dict):
+        """Yields the streaming chunk payloads for one completion."""
+        return stream_chunks(
+            self.responder(request),
+            model=request.get("model", "fake"),
+            chunk_size=self.chunk_size,
+            completion_id=f"chatcmpl-{next(self._ids)}",
+        )
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    # the client went away mid-stream, e.g. a cancelled hedge
+                    pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    fail = server._random.random() < server.error_rate
+                    slow = not fail and server._random.random() < server.slow_rate
+                    server.errors += fail
+                    server.slow += slow
+                if server.latency or slow:
+                    time.sleep(server.latency + (server.slow_latency if slow else 0.0))
+                if fail:
+                    body = json.dumps({"error": {
+                        "message": "injected failure", "type": "server_error", "code": None,
+                    }}).encode()
+                    self.send_response(server.error_status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                if not request.get("stream"):
+                    body = json.dumps(server.completion(request)).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for payload in server.chunks(request):
+                    self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
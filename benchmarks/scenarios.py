@@ -0,0 +1,82 @@
+"""
+Scripted model behaviour for the built-in agents.
+
+`AgentResponder` plays the model for `orchestrator_agent` and the agents it
+hands off to. It picks a reply from the tools in the request and the last
+message, so a whole `AgentController` session replays deterministically:
+
+- search requests: orchestrator -> delegate_to_search -> BraveSearchAgent answers
+- terminal requests: orchestrator -> delegate_to_terminal -> TerminalAgent calls
+  run_terminal_command without confirmation (nothing is executed) -> asks [Y/N]
+- everything else: orchestrator -> continue_with_instructor -> Instructor answers
+
+No reply triggers a real web search or shell command.
+"""
+import json
+
+USER_MESSAGES = [
+    "Search the weather in Tampa",
+    "Explain how Python decorators work",
+    "List the files in my home directory",
+    "Search for the latest Python release notes",
+    "How should I structure a multi-agent project?",
+]
+
+SEARCH_ANSWER = (
+    "Here is what I found: Tampa is expected to be sunny with a high of 31C "
+    "and a light breeze from the west. Showers are possible in the late afternoon. "
+) * 3
+
+INSTRUCTOR_ANSWER = (
+    "Decorators are callables that take a function and return a replacement. "
+    "They are applied with the @ syntax at definition time, and are commonly "
+    "used for caching, logging, access control and registration. "
+) * 8
+
+
+def called_tool(messages: list, message: dict):
+    """Name of the function a tool result answers, from the assistant message that called it."""
+    if message.get("role") != "tool":
+        return None
+    for previous in reversed(messages):
+        for tool_call in previous.get("tool_calls") or ():
+            if tool_call["id"] == message["tool_call_id"]:
+                return tool_call["function"]["name"]
+    return None
+
+
+class AgentResponder:
+    def __init__(self):
+        self.calls = 0
+
+    def tool_call(self, name: str, arguments: dict) -> dict:
+        self.calls += 1
+        return {
+            "id": f"call_{self.calls:06d}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)},
+        }
+
+    def __call__(self, request: dict) -> dict:
+        tools = {tool["function"]["name"] for tool in request.get("tools") or ()}
+        last = request["messages"][-1]
+
+        if "delegate_to_search" in tools:
+            text = last.get("content") or ""
+            if text.lower().startswith("search"):
+                name = "delegate_to_search"
+            elif text.lower().startswith("list"):
+                name = "delegate_to_terminal"
+            else:
+                name = "continue_with_instructor"
+            return {"tool_calls": [self.tool_call(name, {"request": text})]}
+
+        if "run_terminal_command" in tools:
+            if called_tool(request["messages"], last) == "run_terminal_command":
+                return {"content": "Command: ls -la\n[Y/N]:"}
+            return {"tool_calls": [self.tool_call("run_terminal_command", {"command": "ls -la"})]}
+
+        if "perform_web_search" in tools:
+            return {"content": SEARCH_ANSWER}
+
+        return {"content": INSTRUCTOR_ANSWER}
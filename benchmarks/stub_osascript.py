@@ -0,0 +1,83 @@
+"""
+Stand-in for `osascript` where there is none (Linux, CI).
+
+With `-e SCRIPT` it runs one script and exits, as `osascript -e` does: the
+result on stdout, or "execution error: <message> (<number>)" on stderr and
+exit status 1. Without arguments it speaks the `ScriptWorker` protocol on
+stdin and stdout until stdin closes.
+
+Scripts are lines of a tiny subset of AppleScript:
+
+    return "text"               the result (quotes optional)
+    delay 0.5                   sleeps
+    error "message" number -1   fails with that message and number
+    crash                       exits the process without answering
+
+`--load-time SECONDS` sleeps once at startup, standing in for loading the
+AppleScript component.
+
+    python -m benchmarks.stub_osascript -e 'return "hello"'
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ERROR = re.compile(r'error\s+"(.*)"(?:\s+number\s+(-?\d+))?\s*$')
+
+
+class ScriptError(Exception):
+    def __init__(self, message: str, number: int = -2700):
+        super().__init__(message)
+        self.number = number
+
+
+def run(script: str) -> str:
+    for line in script.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line == "crash":
+            os._exit(70)
+        if line.startswith("delay "):
+            time.sleep(float(line[len("delay "):]))
+            continue
+        match = ERROR.match(line)
+        if match:
+            raise ScriptError(match.group(1), int(match.group(2) or -2700))
+        if line.startswith("return "):
+            return line[len("return "):].strip().strip('"')
+        raise ScriptError(f"Expected end of line but found “{line.split()[0]}”.", -2741)
+    return ""
+
+
+def serve() -> None:
+    for line in sys.stdin.buffer:
+        request = json.loads(line)
+        try:
+            response = {"id": request["id"], "ok": True, "output": run(request["script"])}
+        except ScriptError as error:
+            response = {"id": request["id"], "ok": False, "error": str(error), "number": error.number}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-e", dest="script")
+    parser.add_argument("--load-time", type=float, default=0.0)
+    args = parser.parse_args()
+    time.sleep(args.load_time)
+    if args.script is None:
+        return serve()
+    try:
+        print(run(args.script))
+    except ScriptError as error:
+        print(f"0:0: execution error: {error} ({error.number})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
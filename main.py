@@ -1,9 +1,12 @@
+import argparse
+
 from swarm import Swarm
 from swarm.controller import AgentController
+from swarm.routing import KeywordRouter
 
-def run_interactive_loop():
+def run_interactive_loop(pre_router: bool = False):
     """Run the interactive loop with the controller."""
-    controller = AgentController()
+    controller = AgentController(router=KeywordRouter() if pre_router else None)
     print("Starting Swarm Agent System 🐝")
     print("\nAvailable Capabilities:")
     print("- 🔍 Web Search")
@@ -34,4 +37,8 @@ def run_interactive_loop():
             print(f"\033[91mError:\033[0m {str(e)}")
 
 if __name__ == "__main__":
-    run_interactive_loop() 
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--pre-router", action="store_true",
+        help="send messages that clearly match one agent straight to it, skipping the orchestrator")
+    run_interactive_loop(parser.parse_args().pre_router) 
\ No newline at end of file
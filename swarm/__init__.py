@@ -1,4 +1,32 @@
-from .core import Swarm
-from .swarm_types import Agent, Response, Result
+from typing import TYPE_CHECKING
 
-__all__ = ['Swarm', 'Agent', 'Response', 'Result']
+if TYPE_CHECKING:
+    from .core import Swarm
+    from .async_core import AsyncSwarm
+    from .swarm_types import Agent, Response, Result
+
+__all__ = ['Swarm', 'AsyncSwarm', 'Agent', 'Response', 'Result']
+
+# Exports are imported on first access, so `import swarm` (and the agents'
+# `from ..swarm_types import Agent`) doesn't pay for modules it doesn't use.
+_EXPORTS = {
+    'Swarm': '.core',
+    'AsyncSwarm': '.async_core',
+    'Agent': '.swarm_types',
+    'Response': '.swarm_types',
+    'Result': '.swarm_types',
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
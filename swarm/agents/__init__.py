@@ -1,11 +1,66 @@
-from .applescript_agent import applescript_agent
-from .orchestrator_agent import orchestrator_agent
-from .terminal_agent import terminal_agent
-from .brave_search_agent import brave_search_agent
+"""
+Registry of the built-in agents.
+
+Agents are looked up by name and their module is imported on first use, so
+importing the package (or the orchestrator) doesn't import every agent and
+its dependencies up front: the search agent pulls in `requests`, the
+terminal agent starts a shell pool. The agents are still available as
+attributes under their usual names, e.g. `swarm.agents.terminal_agent`.
+"""
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING, Dict, Tuple
+
+if TYPE_CHECKING:
+    from ..swarm_types import Agent
+
+# agent name -> (module, attribute)
+AGENTS: Dict[str, Tuple[str, str]] = {
+    "OrchestratorAgent": ("orchestrator_agent", "orchestrator_agent"),
+    "Instructor": ("orchestrator_agent", "instructor_agent"),
+    "TerminalAgent": ("terminal_agent", "terminal_agent"),
+    "BraveSearchAgent": ("brave_search_agent", "brave_search_agent"),
+    "AppleScriptAgent": ("applescript_agent", "applescript_agent"),
+}
+
+_ATTRIBUTES = {attribute: name for name, (_, attribute) in AGENTS.items()}
 
 __all__ = [
     'applescript_agent',
     'orchestrator_agent',
     'terminal_agent',
-    'brave_search_agent'
-] 
\ No newline at end of file
+    'brave_search_agent',
+    'get_agent',
+]
+
+
+def get_agent(name: str) -> "Agent":
+    """The agent called `name`, importing its module the first time."""
+    try:
+        module, attribute = AGENTS[name]
+    except KeyError:
+        raise KeyError(f"unknown agent {name!r}; known agents: {', '.join(AGENTS)}") from None
+    return getattr(importlib.import_module(f"{__name__}.{module}"), attribute)
+
+
+class _AgentsModule(types.ModuleType):
+    # Most agent modules are named like the agent they define. Importing a
+    # submodule binds it on the package, which would replace the agent
+    # attribute with the module; keep the agents instead, as the eager
+    # `from .x import x` this package used to do.
+
+    def __getattr__(self, name):
+        if name in _ATTRIBUTES:
+            agent = get_agent(_ATTRIBUTES[name])
+            self.__dict__[name] = agent
+            return agent
+        raise AttributeError(f"module {self.__name__!r} has no attribute {name!r}")
+
+    def __setattr__(self, name, value):
+        if name in _ATTRIBUTES and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _AgentsModule
@@ -1,6 +1,19 @@
-import subprocess
+import os
 from typing import Optional
 from ..swarm_types import Agent, Result
+from .osascript_worker import SpawnBackend, WorkerPool
+
+# A hung script is stopped after SCRIPT_TIMEOUT seconds
+SCRIPT_TIMEOUT = float(os.environ.get("APPLESCRIPT_TIMEOUT", 60))
+
+# Scripts run on long-lived interpreters (up to APPLESCRIPT_WORKERS at a
+# time) rather than one osascript process each; 0 spawns one per script, as
+# does an interpreter that fails to start. Anything with
+# `run(script, timeout)` and `close()` can stand in.
+_WORKERS = int(os.environ.get("APPLESCRIPT_WORKERS", 2))
+script_backend = (
+    WorkerPool(size=_WORKERS, fallback=SpawnBackend()) if _WORKERS > 0 else SpawnBackend()
+)
 
 def run_applescript(script: str, context_variables: dict = {}) -> Result:
     """
@@ -14,24 +27,18 @@ def run_applescript(script: str, context_variables: dict = {}) -> Result:
         Result object containing the script output or error message
     """
     try:
-        # Execute the AppleScript using osascript
-        process = subprocess.Popen(
-            ['osascript', '-e', script],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        output, error = process.communicate()
+        # Execute the AppleScript on a warm interpreter
+        result = script_backend.run(script, timeout=SCRIPT_TIMEOUT)
         
-        if process.returncode != 0:
+        if not result.ok:
             return Result(
-                value=f"AppleScript Error: {error}",
-                context_variables={"last_error": error}
+                value=f"AppleScript Error: {result.error}",
+                context_variables={"last_error": result.error}
             )
         
         return Result(
-            value=output.strip(),
-            context_variables={"last_output": output.strip()}
+            value=result.output,
+            context_variables={"last_output": result.output}
         )
     except Exception as e:
         return Result(
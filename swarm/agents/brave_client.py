@@ -0,0 +1,161 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://api.search.brave.com/res/v1/web/search"
+
+
+def normalize_params(params: Dict) -> Tuple:
+    """Cache key for a search: case and whitespace in the query are ignored."""
+    normalized = dict(params)
+    normalized["q"] = " ".join(str(params.get("q", "")).lower().split())
+    return tuple(sorted((k, str(v)) for k, v in normalized.items()))
+
+
+class SearchCache:
+    """
+    TTL + LRU cache of search responses, optionally persisted to SQLite.
+
+    Entries older than `ttl` seconds are treated as missing. The in-memory
+    layer holds at most `maxsize` entries; when `path` is set, entries are also
+    written to and read back from a SQLite file so they survive restarts and
+    can be shared between processes.
+    """
+
+    def __init__(self, ttl: float = 600.0, maxsize: int = 1024, path: Optional[str] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Tuple, Tuple[float, dict]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache "
+                "(key TEXT PRIMARY KEY, expires REAL, body TEXT)"
+            )
+            self.db.commit()
+
+    def get(self, key: Tuple) -> Optional[dict]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(key)
+                    return entry[1]
+                del self.entries[key]
+            if self.db is None:
+                return None
+            row = self.db.execute(
+                "SELECT expires, body FROM search_cache WHERE key = ?",
+                (json.dumps(key),),
+            ).fetchone()
+            if row is None or row[0] <= now:
+                return None
+            value = json.loads(row[1])
+            self._remember(key, row[0], value)
+            return value
+
+    def put(self, key: Tuple, value: dict) -> None:
+        expires = time.time() + self.ttl
+        with self.lock:
+            self._remember(key, expires, value)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?)",
+                    (json.dumps(key), expires, json.dumps(value)),
+                )
+                self.db.commit()
+
+    def _remember(self, key: Tuple, expires: float, value: dict) -> None:
+        self.entries[key] = (expires, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+class BraveSearchClient:
+    """
+    Brave Search client shared by every conversation in the process.
+
+    Requests go through one pooled `requests.Session`, so connections are kept
+    alive between searches, and every request has a timeout. Responses are
+    cached by normalized query parameters, and concurrent identical searches
+    wait for the one already in flight instead of issuing their own.
+    Cached responses are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = BASE_URL,
+        timeout: float = 10.0,
+        pool_size: int = 16,
+        cache: Optional[SearchCache] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache = cache if cache is not None else SearchCache()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.requests = 0
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def search(self, params: Dict) -> dict:
+        key = normalize_params(params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                # a leader that finished since the check above has cached its
+                # response (it caches before leaving _in_flight): check again
+                # under the lock, so a search is only registered on a miss
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+                future = self._in_flight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            data = self._fetch(params)
+            self.cache.put(key, data)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _fetch(self, params: Dict) -> dict:
+        self.requests += 1
+        response = self.session.get(
+            self.base_url,
+            headers={
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip",
+                "X-Subscription-Token": self.api_key or "",
+            },
+            params=params,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
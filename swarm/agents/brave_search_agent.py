@@ -1,10 +1,15 @@
+import os
 import requests
 import json
 from typing import Optional, Dict
 from ..swarm_types import Agent, Result
+from .brave_client import BASE_URL, BraveSearchClient
+from .search_store import search_store
 
-API_KEY = "BSAB4YwWaXxHmxvN7tCcJ4pH1jEIuIn"
-BASE_URL = "https://api.search.brave.com/res/v1/web/search"
+API_KEY = os.environ.get("BRAVE_API_KEY", "BSAB4YwWaXxHmxvN7tCcJ4pH1jEIuIn")
+
+# Shared by every conversation: pooled connections and a TTL/LRU result cache
+search_client = BraveSearchClient(api_key=API_KEY, base_url=BASE_URL)
 
 def perform_web_search(
     query: str,
@@ -29,13 +34,6 @@ def perform_web_search(
         Result object containing search results or error message
     """
     try:
-        # Prepare headers
-        headers = {
-            "Accept": "application/json",
-            "Accept-Encoding": "gzip",
-            "X-Subscription-Token": API_KEY
-        }
-
         # Prepare parameters
         params = {
             "q": query,
@@ -47,18 +45,8 @@ def perform_web_search(
             "spellcheck": 1
         }
 
-        # Make the request
-        response = requests.get(
-            BASE_URL,
-            headers=headers,
-            params=params
-        )
-        
-        # Check if request was successful
-        response.raise_for_status()
-        
-        # Parse response
-        data = response.json()
+        # Make the request (served from cache for repeated queries)
+        data = search_client.search(params)
         
         # Format results nicely
         if "web" in data and "results" in data["web"]:
@@ -70,13 +58,17 @@ def perform_web_search(
                 for result in results
             ])
             
+            search_id = search_store.put(
+                context_variables.get("session_id"), query, results
+            )
+
             # Return results and signal completion
             return Result(
-                value=formatted_results + "\n\nSearch completed. Returning to orchestrator for next steps.",
+                value=formatted_results + f"\n\nSearch completed (search id: {search_id}). Returning to orchestrator for next steps.",
                 context_variables={
                     "last_query": query,
                     "result_count": len(results),
-                    "raw_response": data,
+                    "search_id": search_id,
                     "task_completed": True,
                     "task_type": "web_search",
                     "return_to": "orchestrator"
@@ -89,7 +81,7 @@ def perform_web_search(
                 context_variables={
                     "last_query": query,
                     "result_count": 0,
-                    "raw_response": data,
+                    "search_id": None,
                     "task_completed": True,
                     "task_type": "web_search",
                     "return_to": "orchestrator"
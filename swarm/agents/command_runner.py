@@ -0,0 +1,72 @@
+import os
+import signal
+import subprocess
+from typing import NamedTuple, Optional
+
+READ_SIZE = 64 * 1024
+
+
+class OutputBuffer:
+    """Keeps the first `head_bytes` and the last `tail_bytes` of a stream."""
+
+    def __init__(self, head_bytes: int = 4096, tail_bytes: int = 4096):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[: len(self.tail) - self.tail_bytes]
+
+    @property
+    def omitted(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+
+    def text(self) -> str:
+        if not self.omitted:
+            return (self.head + self.tail).decode(errors="replace")
+        return (
+            f"{self.head.decode(errors='replace')}\n"
+            f"... [{self.omitted} bytes omitted] ...\n"
+            f"{self.tail.decode(errors='replace')}"
+        )
+
+
+class CommandResult(NamedTuple):
+    exit_code: Optional[int]
+    stdout: str
+    stderr: str
+    stdout_bytes: int
+    stderr_bytes: int
+    timed_out: bool
+    output_limited: bool
+    # stdout or stderr is missing part of what the command wrote
+    truncated: bool
+    duration: float
+
+
+def kill_process_group(process: subprocess.Popen, grace: float = 2.0) -> None:
+    """SIGTERM the process group of `process`, then SIGKILL it after `grace` seconds."""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        process.wait(grace)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        # also reaches children that outlived the shell
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
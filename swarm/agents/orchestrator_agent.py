@@ -1,9 +1,24 @@
 import json
 from typing import Optional
 from ..swarm_types import Agent, Result
-from .applescript_agent import applescript_agent
-from .terminal_agent import terminal_agent
-from .brave_search_agent import brave_search_agent
+from . import get_agent
+from .search_store import search_store
+
+def get_search_results(search_id: str = "", context_variables: dict = {}) -> str:
+    """
+    Returns the results of an earlier web search.
+
+    Args:
+        search_id: The search to read back; defaults to the latest search
+        context_variables: Context variables passed from the agent system
+    """
+    search_id = search_id or context_variables.get("search_id") or ""
+    hits = search_store.get(context_variables.get("session_id"), search_id)
+    if not hits:
+        return f"No stored results for search {search_id!r}."
+    return "\n\n".join(
+        f"🔍 {hit.title}\n🌐 {hit.url}\n📝 {hit.description}" for hit in hits
+    )
 
 # Create our instructor agent
 instructor_agent = Agent(
@@ -23,8 +38,11 @@ When receiving search results:
 - Extract key points
 - Provide additional context if needed
 - Answer follow-up questions
+- Use get_search_results to read the results again (latest search by default,
+  or an earlier one by its search id)
 
-You work alongside specialized agents and help interpret their results."""
+You work alongside specialized agents and help interpret their results.""",
+    functions=[get_search_results]
 )
 
 def process_agent_return(context_variables: dict) -> Optional[Agent]:
@@ -68,7 +86,7 @@ def handle_task_completion(request: str, context_variables: dict = {}) -> Result
                 context_variables={
                     "original_request": request,
                     "needs_interpretation": True,
-                    "search_results": context_variables.get("raw_response", {})
+                    "search_id": context_variables.get("search_id")
                 }
             )
         
@@ -86,8 +104,9 @@ def delegate_to_applescript(request: str, context_variables: dict = {}) -> Resul
     """
     return Result(
         value="I'll have the AppleScript agent handle this automation task.",
-        agent=applescript_agent,
-        context_variables={"original_request": request}
+        agent=get_agent("AppleScriptAgent"),
+        context_variables={"original_request": request},
+        transfer=True
     )
 
 def delegate_to_terminal(request: str, context_variables: dict = {}) -> Result:
@@ -96,8 +115,9 @@ def delegate_to_terminal(request: str, context_variables: dict = {}) -> Result:
     """
     return Result(
         value="I'll have the Terminal agent handle this command-line task.",
-        agent=terminal_agent,
-        context_variables={"original_request": request}
+        agent=get_agent("TerminalAgent"),
+        context_variables={"original_request": request},
+        transfer=True
     )
 
 def delegate_to_search(request: str, context_variables: dict = {}) -> Result:
@@ -106,8 +126,9 @@ def delegate_to_search(request: str, context_variables: dict = {}) -> Result:
     """
     return Result(
         value="I'll have the Brave Search agent look that up for you.",
-        agent=brave_search_agent,
-        context_variables={"original_request": request}
+        agent=get_agent("BraveSearchAgent"),
+        context_variables={"original_request": request},
+        transfer=True
     )
 
 def continue_with_instructor(request: str, context_variables: dict = {}) -> Result:
@@ -117,7 +138,8 @@ def continue_with_instructor(request: str, context_variables: dict = {}) -> Resu
     return Result(
         value="This is a general question. I'll have the instructor help you with this.",
         agent=instructor_agent,
-        context_variables={"original_request": request}
+        context_variables={"original_request": request},
+        transfer=True
     )
 
 # Create the Orchestrator Agent
@@ -183,4 +205,11 @@ Always explain your routing decisions briefly.""",
         continue_with_instructor
     ],
     parallel_tool_calls=False
-) 
\ No newline at end of file
+) 
+# Delegation functions by route name, for pre-routers that skip the orchestrator
+ROUTES = {
+    "search": delegate_to_search,
+    "terminal": delegate_to_terminal,
+    "applescript": delegate_to_applescript,
+    "instructor": continue_with_instructor,
+}
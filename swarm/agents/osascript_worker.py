@@ -0,0 +1,349 @@
+import json
+import os
+import queue
+import re
+import selectors
+import subprocess
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from .command_runner import READ_SIZE, OutputBuffer, kill_process_group
+
+# A JavaScript for Automation program that runs AppleScripts for as long as
+# its stdin is open: one JSON request per line in, one JSON response per
+# line out. Scripts are compiled and run with NSAppleScript in this one
+# process, so the AppleScript component is loaded once, not once per script.
+# Requests are ASCII (JSON-escaped), so stdin can be split at any byte.
+WORKER_SOURCE = r"""
+ObjC.import('Foundation');
+const input = $.NSFileHandle.fileHandleWithStandardInput;
+const output = $.NSFileHandle.fileHandleWithStandardOutput;
+
+function send(response) {
+    output.writeData($(JSON.stringify(response) + '\n').dataUsingEncoding($.NSUTF8StringEncoding));
+}
+
+function describe(descriptor) {
+    // lists read as osascript prints them: "a, b, c"
+    if (descriptor.descriptorType === 0x6C697374) {
+        const items = [];
+        for (let i = 1; i <= descriptor.numberOfItems; i++) {
+            items.push(describe(descriptor.descriptorAtIndex(i)));
+        }
+        return items.join(', ');
+    }
+    const text = descriptor.stringValue;
+    return text.isNil() ? '' : text.js;
+}
+
+let buffer = '';
+while (true) {
+    const data = input.availableData;
+    if (data.length === 0) break;
+    buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSASCIIStringEncoding).js;
+    let newline;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+        const request = JSON.parse(buffer.slice(0, newline));
+        buffer = buffer.slice(newline + 1);
+        const error = Ref();
+        const script = $.NSAppleScript.alloc.initWithSource($(request.script));
+        const result = script.executeAndReturnError(error);
+        if (!result || result.isNil()) {
+            const info = ObjC.deepUnwrap(error[0]) || {};
+            send({
+                id: request.id,
+                ok: false,
+                error: info.NSAppleScriptErrorMessage || 'AppleScript error',
+                number: info.NSAppleScriptErrorNumber === undefined ? null : info.NSAppleScriptErrorNumber,
+            });
+        } else {
+            send({id: request.id, ok: true, output: describe(result)});
+        }
+    }
+}
+"""
+
+WORKER_COMMAND = ["osascript", "-l", "JavaScript", "-e", WORKER_SOURCE]
+
+# Run by every new interpreter before any real script, to check it speaks the protocol
+HANDSHAKE_SCRIPT = 'return "ready"'
+
+_ERROR_NUMBER = re.compile(r"\((-?\d+)\)\s*$")
+
+
+class ScriptResult(NamedTuple):
+    ok: bool
+    output: str
+    error: Optional[str]
+    # AppleScript error number, e.g. -1728 for "can't get"; None if not known
+    error_number: Optional[int]
+    timed_out: bool
+    duration: float
+
+
+class WorkerUnavailable(Exception):
+    """The interpreter couldn't be started or didn't answer the handshake."""
+
+
+class SpawnBackend:
+    """Runs every script in a new `osascript -e` process."""
+
+    def __init__(self, command: Optional[List[str]] = None):
+        self.command = command or ["osascript"]
+
+    def run(self, script: str, timeout: float = 60.0) -> ScriptResult:
+        start = time.monotonic()
+        process = subprocess.Popen(
+            self.command + ["-e", script],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            start_new_session=True,
+        )
+        try:
+            output, error = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_group(process, grace=0.5)
+            process.communicate()
+            return ScriptResult(False, "", f"Script timed out after {timeout:g} seconds", None, True,
+                                time.monotonic() - start)
+        duration = time.monotonic() - start
+        if process.returncode != 0:
+            # osascript reports "<where>: execution error: <message> (<number>)"
+            match = _ERROR_NUMBER.search(error)
+            number = int(match.group(1)) if match else None
+            return ScriptResult(False, "", error.strip(), number, False, duration)
+        return ScriptResult(True, output.strip(), None, None, False, duration)
+
+    def close(self) -> None:
+        pass
+
+
+class ScriptWorker:
+    """
+    A long-lived script interpreter speaking the worker protocol: one JSON
+    request `{"id": n, "script": "..."}` per line on stdin, one response
+    `{"id": n, "ok": true, "output": "..."}` or `{"id": n, "ok": false,
+    "error": "...", "number": n}` per line on stdout.
+
+    A script that runs past its timeout takes the interpreter down with it
+    (its process group is killed), as does a response over
+    `max_response_bytes`. A dead interpreter is replaced before the next
+    script, so a crash costs the script that was running, not the worker.
+
+    Each new interpreter must first answer `HANDSHAKE_SCRIPT` within
+    `start_timeout` seconds; if it can't be started or doesn't, `run` raises
+    `WorkerUnavailable` without having sent the script.
+    """
+
+    def __init__(
+        self,
+        command: Optional[List[str]] = None,
+        max_response_bytes: int = 8 * 1024 * 1024,
+        start_timeout: float = 10.0,
+    ):
+        self.command = command or WORKER_COMMAND
+        self.max_response_bytes = max_response_bytes
+        self.start_timeout = start_timeout
+        self.process: Optional[subprocess.Popen] = None
+        self.lock = threading.Lock()
+        self.scripts = 0
+        self.restarts = 0
+        self._ids = 0
+        self._stdout = bytearray()
+        # the interpreter's last words, for the error when it dies
+        self._stderr = OutputBuffer(0, 4096)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self) -> None:
+        if self.scripts:
+            self.restarts += 1
+        self._stdout.clear()
+        self._stderr = OutputBuffer(0, 4096)
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,
+            )
+        except OSError as e:
+            raise WorkerUnavailable(f"Script interpreter could not be started: {e}") from e
+        self._handshake()
+
+    def _handshake(self) -> None:
+        request = json.dumps({"id": 0, "script": HANDSHAKE_SCRIPT}).encode() + b"\n"
+        try:
+            self.process.stdin.write(request)
+            self.process.stdin.flush()
+            response, failure = self._read_response(time.monotonic() + self.start_timeout)
+        except OSError:
+            response, failure = None, "exited"
+        if response == {"id": 0, "ok": True, "output": "ready"}:
+            return
+        process = self.process
+        self.close()
+        if response is not None:
+            reason = f"unexpected handshake response {response!r}"
+        elif failure == "timeout":
+            reason = f"no handshake within {self.start_timeout:g} seconds"
+        else:
+            reason = self._stderr.text().strip() or f"exit status {process.poll()}"
+        raise WorkerUnavailable(f"Script interpreter failed to start: {reason}")
+
+    def close(self) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        if process.poll() is None:
+            kill_process_group(process, grace=0.5)
+        for pipe in (process.stdin, process.stdout, process.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def run(self, script: str, timeout: float = 60.0) -> ScriptResult:
+        with self.lock:
+            start = time.monotonic()
+            if not self.alive:
+                self.close()
+                self.start()
+            self.scripts += 1
+            self._ids += 1
+            request = json.dumps({"id": self._ids, "script": script}).encode() + b"\n"
+            try:
+                self.process.stdin.write(request)
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                # died since the check above; the script never reached it
+                self.close()
+                self.start()
+                self.process.stdin.write(request)
+                self.process.stdin.flush()
+
+            response, failure = self._read_response(start + timeout)
+            duration = time.monotonic() - start
+            if response is None or response.get("id") != self._ids:
+                # start over with a fresh interpreter on the next script
+                process = self.process
+                self.close()
+                if failure == "timeout":
+                    return ScriptResult(False, "", f"Script timed out after {timeout:g} seconds", None,
+                                        True, duration)
+                if failure == "too large":
+                    error = f"Script result exceeded {self.max_response_bytes} bytes"
+                else:
+                    reason = self._stderr.text().strip() or f"exit status {process.poll()}"
+                    error = f"Script interpreter failed: {reason}"
+                return ScriptResult(False, "", error, None, False, duration)
+            if response.get("ok"):
+                return ScriptResult(True, response.get("output") or "", None, None, False, duration)
+            return ScriptResult(False, "", response.get("error") or "", response.get("number"), False, duration)
+
+    def _read_response(self, deadline: float):
+        """
+        (the next response, None), or (None, why there is none): "timeout",
+        "too large", or "exited" when the interpreter died or wrote garbage.
+        """
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.process.stdout, selectors.EVENT_READ, "stdout")
+            selector.register(self.process.stderr, selectors.EVENT_READ, "stderr")
+            while True:
+                end = self._stdout.find(b"\n")
+                if end >= 0:
+                    line = bytes(self._stdout[:end])
+                    del self._stdout[: end + 1]
+                    try:
+                        return json.loads(line), None
+                    except ValueError:
+                        return None, "exited"
+                if len(self._stdout) > self.max_response_bytes:
+                    return None, "too large"
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None, "timeout"
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, READ_SIZE)
+                    if not data:
+                        if key.data == "stdout":
+                            return None, "exited"
+                        selector.unregister(key.fileobj)
+                    elif key.data == "stdout":
+                        self._stdout += data
+                    else:
+                        self._stderr.write(data)
+
+
+class WorkerPool:
+    """
+    Up to `size` `ScriptWorker`s, started on first use and kept running.
+
+    A script runs on an idle worker, waiting for one if all are busy, so
+    scripts run at most `size` at a time. The most recently used worker is
+    reused first, which keeps the others idle rather than all lukewarm.
+
+    If a worker can't be started (see `WorkerUnavailable`), scripts run on
+    `fallback`, e.g. a `SpawnBackend`, from then on; without one the error
+    is raised.
+    """
+
+    def __init__(self, size: int = 2, command: Optional[List[str]] = None, fallback=None, **options):
+        self.size = size
+        self.command = command
+        self.fallback = fallback
+        self.options = options
+        # why the workers were given up for the fallback, once they are
+        self.unavailable: Optional[str] = None
+        self.workers: List[ScriptWorker] = []
+        self._idle: "queue.LifoQueue[ScriptWorker]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> ScriptWorker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self.workers) < self.size:
+                worker = ScriptWorker(self.command, **self.options)
+                self.workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def run(self, script: str, timeout: float = 60.0) -> ScriptResult:
+        if self.unavailable is not None:
+            return self.fallback.run(script, timeout)
+        worker = self._acquire()
+        try:
+            return worker.run(script, timeout)
+        except WorkerUnavailable as e:
+            if self.fallback is None:
+                raise
+            self.unavailable = str(e)
+            return self.fallback.run(script, timeout)
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        with self._lock:
+            workers = list(self.workers)
+        for worker in workers:
+            with worker.lock:
+                worker.close()
+        if self.fallback is not None:
+            self.fallback.close()
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self.workers),
+            "scripts": sum(worker.scripts for worker in self.workers),
+            "restarts": sum(worker.restarts for worker in self.workers),
+            "fallback": self.unavailable,
+        }
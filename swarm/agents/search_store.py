@@ -0,0 +1,90 @@
+import itertools
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+
+class SearchHit(NamedTuple):
+    title: str
+    url: str
+    description: str
+
+
+def hit_size(hit: SearchHit) -> int:
+    return sys.getsizeof(hit) + sum(sys.getsizeof(field) for field in hit)
+
+
+class SearchResultStore:
+    """
+    Bounded, per-session store of compact search results.
+
+    Only the fields the agents use (title, url, description) are kept, and
+    context_variables carries the returned search id instead of the raw Brave
+    payload. Each session holds at most `max_searches_per_session` searches and
+    roughly `max_bytes_per_session` bytes of results; the oldest searches are
+    evicted first. At most `max_sessions` sessions are tracked, least recently
+    used first out.
+    """
+
+    def __init__(
+        self,
+        max_bytes_per_session: int = 256 * 1024,
+        max_searches_per_session: int = 50,
+        max_sessions: int = 1024,
+    ):
+        self.max_bytes_per_session = max_bytes_per_session
+        self.max_searches_per_session = max_searches_per_session
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[Optional[str], OrderedDict]" = OrderedDict()
+        self.session_sizes: Dict[Optional[str], int] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def put(self, session_id: Optional[str], query: str, results: List[dict]) -> str:
+        hits = [
+            SearchHit(r.get("title", ""), r.get("url", ""), r.get("description", ""))
+            for r in results
+        ]
+        size = sum(hit_size(hit) for hit in hits)
+        search_id = f"search-{next(self._ids)}"
+
+        with self._lock:
+            searches = self.sessions.get(session_id)
+            if searches is None:
+                searches = self.sessions[session_id] = OrderedDict()
+                self.session_sizes[session_id] = 0
+            self.sessions.move_to_end(session_id)
+
+            searches[search_id] = (query, hits, size)
+            self.session_sizes[session_id] += size
+            while len(searches) > 1 and (
+                len(searches) > self.max_searches_per_session
+                or self.session_sizes[session_id] > self.max_bytes_per_session
+            ):
+                _, (_, _, evicted) = searches.popitem(last=False)
+                self.session_sizes[session_id] -= evicted
+
+            while len(self.sessions) > self.max_sessions:
+                evicted_session, _ = self.sessions.popitem(last=False)
+                self.session_sizes.pop(evicted_session, None)
+
+        return search_id
+
+    def get(self, session_id: Optional[str], search_id: str) -> Optional[List[SearchHit]]:
+        with self._lock:
+            entry = self.sessions.get(session_id, {}).get(search_id)
+        return entry[1] if entry else None
+
+    def session_bytes(self, session_id: Optional[str]) -> int:
+        return self.session_sizes.get(session_id, 0)
+
+    def drop_session(self, session_id: Optional[str]) -> None:
+        with self._lock:
+            self.sessions.pop(session_id, None)
+            self.session_sizes.pop(session_id, None)
+
+
+# Shared by the search agent, which stores results, and whatever reads them
+# back by search_id; sessions are dropped by the server when they end
+search_store = SearchResultStore()
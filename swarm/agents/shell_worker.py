@@ -0,0 +1,355 @@
+import codecs
+import contextlib
+import os
+import selectors
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional
+
+from .command_runner import READ_SIZE, CommandResult, OutputBuffer, kill_process_group
+
+
+class _FramedStream:
+    """
+    Output of one command on a worker pipe, up to the sentinel the worker
+    prints after it. Bytes that could be the start of the sentinel are held
+    back until the next read shows they aren't.
+    """
+
+    def __init__(self, name: str, token: bytes, buffer: OutputBuffer, on_output):
+        self.name = name
+        self.token = token
+        self.buffer = buffer
+        self.on_output = on_output
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.pending = bytearray()
+        self.trailer: Optional[bytes] = None
+
+    @property
+    def done(self) -> bool:
+        return self.trailer is not None
+
+    def feed(self, data: bytes) -> None:
+        self.pending += data
+        index = self.pending.find(self.token)
+        if index < 0:
+            release = len(self.pending) - self._partial_token()
+            if release > 0:
+                self._release(self.pending[:release])
+                del self.pending[:release]
+            return
+        self._release(self.pending[:index])
+        del self.pending[:index]
+        end = self.pending.find(b"\n")
+        if end >= 0:
+            self.trailer = bytes(self.pending[len(self.token):end]).strip()
+            # anything after the sentinel comes from background jobs; dropped
+            self.pending.clear()
+
+    def _partial_token(self) -> int:
+        """Length of the longest suffix of `pending` that starts the token."""
+        for size in range(min(len(self.token) - 1, len(self.pending)), 0, -1):
+            if self.pending.endswith(self.token[:size]):
+                return size
+        return 0
+
+    def flush(self) -> None:
+        if self.on_output:
+            text = self.decoder.decode(b"", final=True)
+            if text:
+                self.on_output(text, self.name)
+
+    def _release(self, data: bytes) -> None:
+        if not data:
+            return
+        data = bytes(data)
+        self.buffer.write(data)
+        if self.on_output:
+            text = self.decoder.decode(data)
+            if text:
+                self.on_output(text, self.name)
+
+
+class ShellWorker:
+    """
+    A long-lived shell that runs commands one after another.
+
+    Each command is `eval`ed in the shell itself, so `cd`, exported
+    variables and functions carry over to the next command, and a command
+    that doesn't parse fails with status 2 like any other. After the command the shell
+    prints a random sentinel with the exit status and working directory on
+    stdout, and the sentinel alone on stderr; the output in between is the
+    command's. Commands read stdin from /dev/null so they can't consume the
+    framing.
+
+    A command that times out, writes more than `max_output_bytes` or exits
+    the shell takes the shell down with it (its whole process group is
+    killed). The next command starts a fresh shell in the last known working
+    directory; shell state other than the directory is lost then.
+    """
+
+    def __init__(
+        self,
+        cwd: Optional[str] = None,
+        shell: str = "/bin/sh",
+        env: Optional[Dict[str, str]] = None,
+    ):
+        self.cwd = cwd or os.getcwd()
+        self.shell = shell
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+        self.token = uuid.uuid4().hex.encode()
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.commands = 0
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self) -> None:
+        if self.commands:
+            self.restarts += 1
+        self.process = subprocess.Popen(
+            [self.shell],
+            cwd=self.cwd if os.path.isdir(self.cwd) else None,
+            env=self.env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+
+    def close(self) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        if process.poll() is None:
+            kill_process_group(process, grace=0.5)
+        for pipe in (process.stdin, process.stdout, process.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def _script(self, command: str) -> bytes:
+        token = self.token.decode()
+        # quoted as one word, so the shell can't read past the command while
+        # parsing it; `command` keeps a syntax error from exiting the shell
+        quoted = "'" + command.replace("'", "'\\''") + "'"
+        return (
+            f"command eval {quoted} < /dev/null\n"
+            f"__swarm_status=$?\n"
+            f"printf '%s %s %s\\n' '{token}' \"$__swarm_status\" \"$PWD\"\n"
+            f"printf '%s\\n' '{token}' >&2\n"
+        ).encode()
+
+    def run(
+        self,
+        command: str,
+        timeout: float = 120.0,
+        max_output_bytes: int = 8 * 1024 * 1024,
+        head_bytes: int = 4096,
+        tail_bytes: int = 4096,
+        on_output: Optional[Callable[[str, str], None]] = None,
+    ) -> CommandResult:
+        """
+        Runs `command` in the shell with a wall-clock and an output-size limit.
+
+        When the command runs longer than `timeout` seconds or writes more
+        than `max_output_bytes` to stdout and stderr together, the shell's
+        process group is killed. Output is read as it is produced and passed
+        to `on_output(text, stream)` ("stdout" or "stderr"), and only the
+        first `head_bytes` and last `tail_bytes` of each stream are kept.
+        POSIX only.
+        """
+        with self.lock:
+            try:
+                return self._run(
+                    command, timeout, max_output_bytes, head_bytes, tail_bytes, on_output)
+            finally:
+                self.last_used = time.monotonic()
+
+    def _run(self, command, timeout, max_output_bytes, head_bytes, tail_bytes, on_output):
+        start = time.monotonic()
+        deadline = start + timeout
+        if not self.alive:
+            self.close()
+            self.start()
+        self.commands += 1
+
+        buffers = {
+            "stdout": OutputBuffer(head_bytes, tail_bytes),
+            "stderr": OutputBuffer(head_bytes, tail_bytes),
+        }
+        streams = {
+            name: _FramedStream(name, self.token, buffer, on_output)
+            for name, buffer in buffers.items()
+        }
+        timed_out = output_limited = exited = False
+        try:
+            self.process.stdin.write(self._script(command))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            exited = True
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.process.stdout, selectors.EVENT_READ, streams["stdout"])
+            selector.register(self.process.stderr, selectors.EVENT_READ, streams["stderr"])
+            while not exited and not all(stream.done for stream in streams.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, READ_SIZE)
+                    if not data:
+                        # the command exited the shell
+                        exited = True
+                        break
+                    key.data.feed(data)
+                if buffers["stdout"].total + buffers["stderr"].total > max_output_bytes:
+                    output_limited = True
+                    break
+
+        for stream in streams.values():
+            stream.flush()
+
+        exit_code = None
+        trailer = streams["stdout"].trailer
+        if trailer is not None:
+            status, _, cwd = trailer.decode(errors="replace").partition(" ")
+            exit_code = int(status)
+            self.cwd = cwd or self.cwd
+        else:
+            # timed out, over the output limit or the shell exited: start over
+            # on the next command
+            process = self.process
+            self.close()
+            exit_code = process.poll()
+
+        return CommandResult(
+            exit_code=exit_code,
+            stdout=buffers["stdout"].text(),
+            stderr=buffers["stderr"].text(),
+            stdout_bytes=buffers["stdout"].total,
+            stderr_bytes=buffers["stderr"].total,
+            timed_out=timed_out,
+            output_limited=output_limited,
+            truncated=output_limited or any(buffer.omitted for buffer in buffers.values()),
+            duration=time.monotonic() - start,
+        )
+
+
+class ShellPool:
+    """
+    One `ShellWorker` per conversation, created on first use.
+
+    At most `max_workers` shells are kept, least recently used first out,
+    and shells idle for longer than `idle_timeout` seconds are closed by a
+    background reaper. A shell running a command is never closed. Runs
+    that aren't part of a conversation get a shell of their own (`session(None)`)
+    rather than sharing one.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 64,
+        idle_timeout: float = 600.0,
+        cwd: Optional[str] = None,
+        shell: str = "/bin/sh",
+    ):
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self.cwd = cwd
+        self.shell = shell
+        self.workers: "OrderedDict[str, ShellWorker]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self.workers)
+
+    def worker(self, key: str) -> ShellWorker:
+        if key is None:
+            raise ValueError("a shell is kept per conversation; use session(None) without one")
+        with self._lock:
+            worker = self.workers.get(key)
+            if worker is None:
+                worker = self.workers[key] = ShellWorker(cwd=self.cwd, shell=self.shell)
+                evicted = self._evict_overflow()
+            else:
+                evicted = []
+            self.workers.move_to_end(key)
+            worker.last_used = time.monotonic()
+            if self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._reap, name="swarm-shell-reaper", daemon=True)
+                self._reaper.start()
+        for old in evicted:
+            old.close()
+        return worker
+
+    @contextlib.contextmanager
+    def session(self, key: Optional[str]) -> Iterator[ShellWorker]:
+        """The shell of conversation `key`, or without a key a new one, closed afterwards."""
+        if key is not None:
+            yield self.worker(key)
+            return
+        worker = ShellWorker(cwd=self.cwd, shell=self.shell)
+        try:
+            yield worker
+        finally:
+            worker.close()
+
+    def run(self, key: Optional[str], command: str, **options) -> CommandResult:
+        """Runs `command` in the shell of conversation `key`; options as for `ShellWorker.run`."""
+        with self.session(key) as worker:
+            return worker.run(command, **options)
+
+    def close(self, key: str) -> None:
+        with self._lock:
+            worker = self.workers.pop(key, None)
+        if worker is not None:
+            worker.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+        for worker in workers:
+            worker.close()
+
+    def reap_idle(self, now: Optional[float] = None) -> int:
+        """Closes shells idle for longer than `idle_timeout`; returns how many."""
+        deadline = (now if now is not None else time.monotonic()) - self.idle_timeout
+        with self._lock:
+            idle = [
+                (key, worker) for key, worker in self.workers.items()
+                if worker.last_used < deadline and not worker.lock.locked()
+            ]
+            for key, _ in idle:
+                del self.workers[key]
+        for _, worker in idle:
+            worker.close()
+        return len(idle)
+
+    def _evict_overflow(self):
+        evicted = []
+        # never the worker just added, which is the most recently used
+        for key, worker in list(self.workers.items())[:-1]:
+            if len(self.workers) <= self.max_workers:
+                break
+            if not worker.lock.locked():
+                del self.workers[key]
+                evicted.append(worker)
+        return evicted
+
+    def _reap(self) -> None:
+        while True:
+            time.sleep(min(60.0, self.idle_timeout / 2))
+            self.reap_idle()
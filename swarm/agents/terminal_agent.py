@@ -1,11 +1,24 @@
-import subprocess
 import os
 import json
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List
 from ..swarm_types import Agent, Result
+from .shell_worker import ShellPool
 
-# Set the initial working directory
-os.chdir('/Users/tan')
+# Directory each conversation's shell starts in; the working directory of
+# the process importing the agent is left alone
+WORKING_DIRECTORY = os.environ.get("TERMINAL_WORKING_DIRECTORY", os.path.expanduser("~"))
+
+# Limits for confirmed commands: a hung command is killed after
+# COMMAND_TIMEOUT seconds, and one writing more than MAX_OUTPUT_BYTES is
+# stopped. Only the first and last OUTPUT_CONTEXT_BYTES of each stream are
+# kept for the model.
+COMMAND_TIMEOUT = float(os.environ.get("TERMINAL_COMMAND_TIMEOUT", 120))
+MAX_OUTPUT_BYTES = 8 * 1024 * 1024
+OUTPUT_CONTEXT_BYTES = 4 * 1024
+
+# One long-lived shell per conversation (keyed by session_id), so `cd` and
+# exported variables carry over between commands; idle shells are closed
+shell_pool = ShellPool(max_workers=64, idle_timeout=600, cwd=WORKING_DIRECTORY)
 
 # Common command alternatives/suggestions
 COMMAND_SUGGESTIONS = {
@@ -33,7 +46,12 @@ def return_to_instructor(context_variables: dict = {}) -> Result:
         context_variables=context_variables
     )
 
-def run_terminal_command(command: str, confirmation: str = "", context_variables: dict = {}) -> Result:
+def run_terminal_command(
+    command: str,
+    confirmation: str = "",
+    context_variables: dict = {},
+    stream_output: Optional[Callable[..., None]] = None,
+) -> Result:
     """
     Executes a terminal command and returns the result.
     
@@ -41,6 +59,7 @@ def run_terminal_command(command: str, confirmation: str = "", context_variables
         command: The terminal command to execute
         confirmation: User's confirmation response (Y/N)
         context_variables: Context variables passed from the agent system
+        stream_output: Receives output as the command runs (streaming runs only)
     
     Returns:
         Result object containing the command output or error message
@@ -75,34 +94,56 @@ def run_terminal_command(command: str, confirmation: str = "", context_variables
             )
     
     try:
-        # Execute the command
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd='/Users/tan'  # Set working directory
-        )
-        output, error = process.communicate()
+        # Execute the command in the conversation's shell (a one-off shell
+        # outside a conversation), streaming its output and bounding time
+        # and size
+        with shell_pool.session(context_variables.get("session_id")) as worker:
+            result = worker.run(
+                command,
+                timeout=COMMAND_TIMEOUT,
+                max_output_bytes=MAX_OUTPUT_BYTES,
+                head_bytes=OUTPUT_CONTEXT_BYTES,
+                tail_bytes=OUTPUT_CONTEXT_BYTES,
+                on_output=stream_output,
+            )
+        
+            if result.timed_out or result.output_limited:
+                reason = (
+                    f"Command timed out after {COMMAND_TIMEOUT:g} seconds and was stopped"
+                    if result.timed_out
+                    else f"Command output exceeded {MAX_OUTPUT_BYTES} bytes and was stopped"
+                )
+                return return_to_instructor({
+                    "last_error": f"{reason}.\n{result.stderr}".strip(),
+                    "last_output": result.stdout.strip(),
+                    "exit_code": result.exit_code,
+                    "timed_out": result.timed_out,
+                    "output_truncated": True,
+                    "cwd": worker.cwd,
+                    "command_failed": True,
+                    "command": command
+                })
         
-        if process.returncode != 0:
-            # Return to instructor with error info
+            if result.exit_code != 0:
+                # Return to instructor with error info
+                return return_to_instructor({
+                    "last_error": result.stderr,
+                    "exit_code": result.exit_code,
+                    "output_truncated": result.truncated,
+                    "cwd": worker.cwd,
+                    "command_failed": True,
+                    "command": command
+                })
+        
+            # Return to instructor with success info
             return return_to_instructor({
-                "last_error": error,
-                "exit_code": process.returncode,
-                "command_failed": True,
+                "last_output": result.stdout.strip(),
+                "exit_code": result.exit_code,
+                "output_truncated": result.truncated,
+                "cwd": worker.cwd,
+                "command_succeeded": True,
                 "command": command
             })
-        
-        # Return to instructor with success info
-        return return_to_instructor({
-            "last_output": output.strip(),
-            "exit_code": process.returncode,
-            "cwd": os.getcwd(),
-            "command_succeeded": True,
-            "command": command
-        })
 
     except Exception as e:
         # Return to instructor with exception info
@@ -116,7 +157,7 @@ def run_terminal_command(command: str, confirmation: str = "", context_variables
 terminal_agent = Agent(
     name="TerminalAgent",
     model="gpt-4o",
-    instructions="""You are a specialized agent for executing terminal commands on macOS.
+    instructions=f"""You are a specialized agent for executing terminal commands on macOS.
 Your primary function is to:
 1. Execute terminal commands safely and efficiently
 2. Handle command output and errors appropriately
@@ -143,7 +184,7 @@ Safety Guidelines:
 - Avoid commands that could expose sensitive information
 
 Working Directory:
-- Starting directory: /Users/tan
+- Starting directory: {WORKING_DIRECTORY}
 - Track current directory changes
 - Use absolute paths when necessary
 - Handle directory navigation safely
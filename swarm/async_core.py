@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+# Standard library imports
+import asyncio
+import functools
+import inspect
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, List, Optional
+
+# Package/library imports
+# openai is imported when a client is first needed; see `swarm_types`
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessage
+    from openai.types.chat.chat_completion_message_tool_call import (
+        ChatCompletionMessageToolCall,
+    )
+
+# Local imports
+from .core import Swarm, tool_calls_from_dicts
+from .util import compile_tools, debug_print
+from .completion_cache import CompletionCache
+from .tracing import NOOP_SPAN, Span, Tracer, UsageStats
+from .swarm_types import (
+    Agent,
+    AgentFunction,
+    Response,
+)
+
+
+async def acounted_stream(stream, usage: UsageStats):
+    """Yields the chunks of async `stream`, adding the usage it reports to `usage`."""
+    async for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            usage.add(chunk.usage)
+        yield chunk
+
+
+class AsyncSwarm(Swarm):
+    """
+    asyncio counterpart of `Swarm` built on `AsyncOpenAI`.
+
+    The run loop has the same semantics as `Swarm.run` (handoffs through
+    `Result.agent`, `context_variables` merging and `max_turns`): it shares
+    everything but the awaits with `Swarm`, through `Swarm`'s run helpers. Agent
+    functions may be coroutine functions; plain functions are run in
+    `executor` (the event loop's default thread pool when None) so a slow
+    tool doesn't stall other conversations on the same loop.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        executor: Optional[Executor] = None,
+        max_tool_workers: int = 8,
+        tracer: Optional[Tracer] = None,
+        direct_transfers: bool = True,
+        early_tool_dispatch: bool = True,
+        completion_cache: Optional[CompletionCache] = None,
+        memoize_instructions: bool = False,
+        stream_usage: bool = False,
+    ):
+        if not client:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI()
+        super().__init__(
+            client=client,
+            max_tool_workers=max_tool_workers,
+            tracer=tracer,
+            direct_transfers=direct_transfers,
+            early_tool_dispatch=early_tool_dispatch,
+            completion_cache=completion_cache,
+            memoize_instructions=memoize_instructions,
+            stream_usage=stream_usage,
+        )
+        # runs plain (non-coroutine) agent functions; None is the loop's default
+        self.executor = executor
+
+    def count_stream(self, stream):
+        return acounted_stream(stream, self.usage)
+
+    async def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+        span: Span = NOOP_SPAN,
+    ) -> ChatCompletionMessage:
+        create_params = self.traced_completion_params(
+            agent, history, context_variables, model_override, stream, debug, span)
+        with self.tracer.start_span(
+            "swarm.request", span, model=create_params["model"], stream=stream
+        ) as request_span:
+            cached = False
+            if self.completion_cache is not None:
+                completion, cached = await self.completion_cache.aget_or_create(
+                    self.client, create_params)
+                request_span.set(cached=cached)
+            else:
+                completion = await self.client.chat.completions.create(**create_params)
+            return self.track_completion(completion, cached, stream, request_span)
+
+    async def execute_tool(
+        self,
+        func: AgentFunction,
+        args: dict,
+        tool_call: ChatCompletionMessageToolCall,
+        span: Span = NOOP_SPAN,
+    ):
+        with self.tracer.start_span(
+            "swarm.tool", span, tool=tool_call.function.name, tool_call_id=tool_call.id
+        ):
+            if inspect.iscoroutinefunction(func):
+                return await func(**args)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.executor, functools.partial(func, **args)
+            )
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+    async def _run_after(self, previous: Optional[asyncio.Task], func, args, tool_call, span):
+        if previous is not None:
+            await previous
+        return await self.execute_tool(func, args, tool_call, span)
+
+    def dispatch_tool_call(
+        self,
+        tool_call: dict,
+        agent: Agent,
+        context_variables: dict,
+        pending: Dict[str, asyncio.Task],
+        debug: bool,
+        span: Span = NOOP_SPAN,
+        output: Optional[Callable[[dict], None]] = None,
+    ) -> bool:
+        """Starts a tool call the stream has finished emitting as a task stored in `pending`."""
+        resolved = self.resolve_streamed_tool_call(
+            tool_call, agent, context_variables, debug, output)
+        if resolved is None:
+            return False
+        tool_call, func, args = resolved
+        previous = None
+        if not agent.parallel_tool_calls and pending:
+            previous = next(reversed(pending.values()))
+        debug_print(debug, f"Dispatching tool call {tool_call.function.name} during the stream.")
+        pending[tool_call.id] = asyncio.ensure_future(
+            self._run_after(previous, func, args, tool_call, span))
+        return True
+
+    async def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: List[AgentFunction],
+        context_variables: dict,
+        debug: bool,
+        parallel: bool = False,
+        span: Span = NOOP_SPAN,
+        pending: Optional[Dict[str, asyncio.Task]] = None,
+        output: Optional[Callable[[dict], None]] = None,
+    ) -> Response:
+        pending = pending or {}
+        calls = self.resolve_tool_calls(tool_calls, functions, context_variables, debug, output)
+
+        # run independent calls concurrently, but merge results in the order the
+        # model issued them so context_variables and handoffs stay deterministic
+        if parallel and self.max_tool_workers > 1 and len(calls) > 1:
+            debug_print(debug, f"Executing {len(calls)} tool calls concurrently.")
+            semaphore = asyncio.Semaphore(self.max_tool_workers)
+
+            async def bounded(func, args, tool_call):
+                async with semaphore:
+                    return await self.execute_tool(func, args, tool_call, span)
+
+            results = await asyncio.gather(*(
+                pending.get(tool_call.id) or bounded(func, args, tool_call)
+                if func else asyncio.sleep(0)
+                for tool_call, func, args in calls
+            ))
+        else:
+            results = []
+            for tool_call, func, args in calls:
+                if func is None:
+                    results.append(None)
+                elif tool_call.id in pending:
+                    results.append(await pending[tool_call.id])
+                else:
+                    results.append(await self.execute_tool(func, args, tool_call, span))
+
+        return self.merge_tool_results(calls, results, debug)
+
+    async def stream_tool_output(self, events: asyncio.Queue, task: asyncio.Task) -> AsyncIterator[dict]:
+        """Yields the tool output events put on `events` until `task` is done."""
+        while not task.done():
+            getter = asyncio.ensure_future(events.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        while not events.empty():
+            yield events.get_nowait()
+
+    async def run_and_stream(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ) -> AsyncIterator[dict]:
+        run = self.start_run(agent, messages, context_variables, max_turns, stream=True)
+
+        while run.more_turns():
+            # tool output events from tools taking stream_output; sync tools
+            # write from executor threads
+            events = output = None
+            if execute_tools and compile_tools(run.agent.functions).streaming:
+                events = asyncio.Queue()
+                output = functools.partial(
+                    asyncio.get_running_loop().call_soon_threadsafe, events.put_nowait)
+            turn = self.start_stream_turn(run, execute_tools, output)
+
+            # get completion with current history, agent
+            completion = await self.get_chat_completion(
+                agent=run.agent,
+                history=run.history,
+                context_variables=run.context_variables,
+                model_override=model_override,
+                stream=True,
+                debug=debug,
+                span=turn.span,
+            )
+
+            self.open_stream(turn)
+            yield {"delim": "start"}
+            async for chunk in completion:
+                delta = self.stream_chunk(run, turn, chunk, debug)
+                if delta is None:
+                    continue
+                yield delta
+                # output of tools dispatched early
+                while turn.pending and events is not None and not events.empty():
+                    yield events.get_nowait()
+            yield {"delim": "end"}
+            message = self.close_stream(run, turn, debug)
+
+            if self.is_last_turn(message["tool_calls"], execute_tools, turn.span, debug):
+                break
+
+            # convert tool_calls to objects
+            tool_calls = tool_calls_from_dicts(message["tool_calls"])
+
+            # handle function calls, updating context_variables, and switching agents
+            run_tools = self.handle_tool_calls(
+                tool_calls,
+                run.agent.functions,
+                run.context_variables,
+                debug,
+                parallel=run.agent.parallel_tool_calls,
+                span=turn.span,
+                pending=turn.pending,
+                output=turn.output,
+            )
+            if events is not None:
+                task = asyncio.ensure_future(run_tools)
+                async for event in self.stream_tool_output(events, task):
+                    yield event
+                partial_response = task.result()
+            else:
+                partial_response = await run_tools
+            self.apply_tool_results(run, partial_response, tool_calls, turn.span)
+
+        yield {"response": self.finish_run(run)}
+
+    async def run(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        stream: bool = False,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ) -> Response:
+        """`Swarm.run`, awaited; with `stream`, returns an async generator."""
+        if stream:
+            return self.run_and_stream(
+                agent=agent,
+                messages=messages,
+                context_variables=context_variables,
+                model_override=model_override,
+                debug=debug,
+                max_turns=max_turns,
+                execute_tools=execute_tools,
+            )
+        run = self.start_run(agent, messages, context_variables, max_turns, stream=False)
+
+        while run.more_turns():
+            turn_span = self.start_turn(run)
+
+            # get completion with current history, agent
+            completion = await self.get_chat_completion(
+                agent=run.agent,
+                history=run.history,
+                context_variables=run.context_variables,
+                model_override=model_override,
+                stream=False,
+                debug=debug,
+                span=turn_span,
+            )
+            message = self.add_completion(run, completion, debug)
+
+            if self.is_last_turn(message.tool_calls, execute_tools, turn_span, debug):
+                break
+
+            # handle function calls, updating context_variables, and switching agents
+            partial_response = await self.handle_tool_calls(
+                message.tool_calls,
+                run.agent.functions,
+                run.context_variables,
+                debug,
+                parallel=run.agent.parallel_tool_calls,
+                span=turn_span,
+            )
+            self.apply_tool_results(run, partial_response, message.tool_calls, turn_span)
+
+        return self.finish_run(run)
@@ -0,0 +1,648 @@
+"""
+Runs many independent conversations through the Swarm loop.
+
+Input is JSONL, one conversation per line:
+
+    {"id": "q1", "messages": [{"role": "user", "content": "..."}],
+     "context_variables": {...}, "agent": "OrchestratorAgent"}
+
+Only `messages` is required; `id` defaults to the line number and `agent` to
+the runner's agent. Each finished conversation is appended to the output
+JSONL as soon as it is done, in completion order:
+
+    {"line": 0, "id": "q1", "agent": "Instructor", "messages": [...],
+     "context_variables": {...}}
+
+or, if the conversation failed, `{"line": 0, "id": "q1", "error": "..."}`.
+
+    python -m swarm.batch conversations.jsonl results.jsonl --mode asyncio --concurrency 32
+"""
+# Standard library imports
+import argparse
+import asyncio
+import functools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Local imports
+from .scheduler import BATCH, AsyncRateLimitedClient, RateLimitedClient, Scheduler, scheduling
+from .session_store import _default
+from .swarm_types import Agent
+
+THREADS = "threads"
+ASYNCIO = "asyncio"
+PROCESSES = "processes"
+BATCH_API = "batch-api"
+MODES = (THREADS, ASYNCIO, PROCESSES, BATCH_API)
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+
+def _encode(record: dict) -> bytes:
+    return json.dumps(record, separators=(",", ":"), default=_default).encode() + b"\n"
+
+
+def _error(error: BaseException) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+def resolve_agent(agent: Union[str, Agent]) -> Agent:
+    if isinstance(agent, str):
+        from .agents import get_agent
+
+        return get_agent(agent)
+    return agent
+
+
+class ResultLog:
+    """
+    The output JSONL, which is also the checkpoint of a batch run.
+
+    Results are appended as conversations finish, in any order. Every
+    `checkpoint_every` results, `<output>.checkpoint` is replaced atomically
+    with the first input line not yet written (and its byte offset), the
+    finished lines after it and the output size at that point. A resumed run
+    seeks the input to that offset, reads the few results written after the
+    checkpoint from the end of the output, drops a torn last line, and skips
+    every line already written, so neither file is read from the start again.
+    """
+
+    def __init__(self, path: str, checkpoint_every: int = 100):
+        self.path = path
+        self.checkpoint_path = path + ".checkpoint"
+        self.checkpoint_every = checkpoint_every
+        self.written = 0
+        state = {"line": 0, "offset": 0, "output_size": 0, "done": []}
+        # a checkpoint without its output is stale: start over
+        if os.path.exists(path) and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "rb") as f:
+                state = json.loads(f.read())
+        # every input line before `line` (which starts at byte `offset`) is
+        # in the output; `done` has the finished lines after it
+        self.line = state["line"]
+        self.offset = state["offset"]
+        self.done = set(state["done"])
+        # input offset just past each line, for lines that are done or
+        # running but not yet behind the checkpoint line
+        self._ends: Dict[int, int] = {}
+        self.resumed = self._recover(state["output_size"])
+        self._output = open(path, "ab")
+
+    def _recover(self, size: int) -> int:
+        """Adds the results written after the last checkpoint; returns how many there were."""
+        if not os.path.exists(self.path):
+            return 0
+        count = 0
+        with open(self.path, "r+b") as output:
+            output.seek(min(size, output.seek(0, os.SEEK_END)))
+            position = output.tell()
+            for line in iter(output.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                self.done.add(json.loads(line)["line"])
+                position += len(line)
+                count += 1
+            output.truncate(position)
+        return count
+
+    def is_done(self, line: int) -> bool:
+        return line < self.line or line in self.done
+
+    def finish(self, line: int, end: int, record: Optional[dict] = None) -> None:
+        """Marks input `line`, which ends at byte `end`, done; writes its `record`, if any."""
+        if record is not None:
+            self._output.write(_encode(record))
+            self.written += 1
+        self.done.add(line)
+        self._ends[line] = end
+        # lines done in an earlier run are passed once the input is read past them
+        while self.line in self.done and self.line in self._ends:
+            self.done.remove(self.line)
+            self.offset = self._ends.pop(self.line)
+            self.line += 1
+        if record is not None and self.written % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        self._output.flush()
+        body = json.dumps({
+            "line": self.line,
+            "offset": self.offset,
+            "output_size": self._output.tell(),
+            "done": sorted(self.done),
+        }).encode()
+        tmp = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, self.checkpoint_path)
+
+    def close(self) -> None:
+        self.checkpoint()
+        self._output.close()
+
+
+def read_conversations(path: str, offset: int = 0, line: int = 0) -> Iterator[Tuple[int, int, Any]]:
+    """
+    Streams (line number, offset past the line, conversation) from a JSONL
+    file, starting at byte `offset`, which is the start of line `line`.
+    Blank lines are None; lines that aren't valid JSON are the exception.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            if raw.strip():
+                try:
+                    item = json.loads(raw)
+                except ValueError as error:
+                    item = error
+            else:
+                item = None
+            yield line, offset, item
+            line += 1
+
+
+class BatchRunner:
+    """
+    Runs the conversations of a JSONL file with at most `concurrency` at a time.
+
+    The input is read as it is consumed, so memory depends on `concurrency`
+    and not on the file size. Results are written as they finish, and a run
+    resumes where an earlier one over the same output stopped (see
+    `ResultLog`). Failed conversations are written with an `error` and
+    counted as done; the model client's own retries cover transient errors.
+
+    `mode` is how conversations run concurrently:
+
+    - "threads": `swarm.run` on a thread pool; `swarm` is a `Swarm`.
+    - "asyncio": `await swarm.run` on one event loop; `swarm` is an `AsyncSwarm`.
+    - "processes": a process pool, each process with its own `swarm_factory()`,
+      for tool-heavy batches that the GIL would otherwise serialize.
+    - "batch-api": an `AsyncSwarm` whose client is a `BatchingClient`; every
+      round of model requests goes through the provider's offline batch API.
+    """
+
+    def __init__(
+        self,
+        swarm=None,
+        agent: Union[str, Agent] = "OrchestratorAgent",
+        mode: str = THREADS,
+        concurrency: int = 16,
+        swarm_factory: Optional[Callable[[], Any]] = None,
+        model_override: Optional[str] = None,
+        max_turns: int = float("inf"),
+        checkpoint_every: int = 100,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}, not {mode!r}")
+        if mode == PROCESSES and swarm_factory is None:
+            raise ValueError("the processes mode needs a picklable swarm_factory")
+        if mode != PROCESSES and swarm is None:
+            raise ValueError(f"the {mode} mode needs a swarm")
+        self.swarm = swarm
+        self.agent = agent
+        self.mode = mode
+        self.concurrency = concurrency
+        self.swarm_factory = swarm_factory
+        self.model_override = model_override
+        self.max_turns = max_turns
+        self.checkpoint_every = checkpoint_every
+
+    def run(self, input_path: str, output_path: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Runs every conversation of `input_path` not yet in `output_path`, or
+        the next `limit` of them. Returns counts and the elapsed time.
+        """
+        log = ResultLog(output_path, self.checkpoint_every)
+        stats = {"ran": 0, "failed": 0, "skipped": 0, "resumed_from_line": log.line}
+        started = time.perf_counter()
+
+        def pending():
+            for line, end, item in read_conversations(input_path, log.offset, log.line):
+                if limit is not None and stats["ran"] >= limit:
+                    return
+                if log.is_done(line):
+                    stats["skipped"] += 1
+                    log.finish(line, end)
+                elif item is None:
+                    log.finish(line, end)
+                else:
+                    stats["ran"] += 1
+                    yield line, end, item
+
+        def finish(line, end, record):
+            if "error" in record:
+                stats["failed"] += 1
+            log.finish(line, end, record)
+
+        try:
+            if self.mode == THREADS:
+                with ThreadPoolExecutor(self.concurrency, thread_name_prefix="swarm-batch") as pool:
+                    self._run_futures(pool, self._call, pending(), finish)
+            elif self.mode == PROCESSES:
+                with ProcessPoolExecutor(
+                    self.concurrency, initializer=_init_worker, initargs=(self.swarm_factory,)
+                ) as pool:
+                    self._run_futures(pool, _worker_call, pending(), finish)
+            else:
+                asyncio.run(self._run_async(pending(), finish))
+        finally:
+            log.close()
+        stats["elapsed"] = time.perf_counter() - started
+        return stats
+
+    def _options(self, line: int, item) -> dict:
+        """`run_conversation` arguments for one input line."""
+        return {
+            "line": line,
+            "item": item,
+            "agent": self.agent,
+            "model_override": self.model_override,
+            "max_turns": self.max_turns,
+        }
+
+    def _call(self, options: dict) -> dict:
+        return run_conversation(self.swarm, **options)
+
+    def _run_futures(self, pool: Executor, call: Callable, pending, finish) -> None:
+        running = {}
+        for line, end, item in pending:
+            if len(running) >= self.concurrency:
+                self._drain(running, finish, FIRST_COMPLETED)
+            running[pool.submit(call, self._options(line, item))] = (line, end)
+        self._drain(running, finish)
+
+    @staticmethod
+    def _drain(running: dict, finish, return_when=ALL_COMPLETED) -> None:
+        done, _ = wait(running, return_when=return_when)
+        for future in done:
+            line, end = running.pop(future)
+            try:
+                record = future.result()
+            except Exception as error:
+                # only the process pool fails here, e.g. a worker that died
+                record = {"line": line, "error": _error(error)}
+            finish(line, end, record)
+
+    async def _run_async(self, pending, finish) -> None:
+        client = self.swarm.client if isinstance(self.swarm.client, BatchingClient) else None
+        running = {}
+
+        async def run(options):
+            try:
+                return await arun_conversation(self.swarm, **options)
+            finally:
+                if client is not None:
+                    client.leave()
+
+        async def drain(return_when):
+            done, _ = await asyncio.wait(running, return_when=return_when)
+            for task in done:
+                line, end = running.pop(task)
+                finish(line, end, task.result())
+
+        for line, end, item in pending:
+            if len(running) >= self.concurrency:
+                await drain(asyncio.FIRST_COMPLETED)
+            # counted as running from submission, so the first requests
+            # don't go out in a batch of their own
+            if client is not None:
+                client.enter()
+            task = asyncio.ensure_future(run(self._options(line, item)))
+            running[task] = (line, end)
+        if running:
+            await drain(asyncio.ALL_COMPLETED)
+
+
+def _prepare(line: int, item, agent) -> Tuple[dict, Agent]:
+    if isinstance(item, Exception):
+        raise ValueError(f"invalid JSON on line {line}: {item}")
+    if not isinstance(item, dict) or not isinstance(item.get("messages"), list):
+        raise ValueError(f"line {line} has no messages list")
+    return (
+        {"line": line, "id": item.get("id", line)},
+        resolve_agent(item.get("agent") or agent),
+    )
+
+
+def _record(record: dict, response) -> dict:
+    record["agent"] = response.agent.name if response.agent else None
+    record["messages"] = response.messages
+    record["context_variables"] = response.context_variables
+    return record
+
+
+def run_conversation(swarm, line: int, item, agent, model_override=None, max_turns=float("inf")) -> dict:
+    """The output record of one input line; failures are recorded, not raised."""
+    record = {"line": line, "id": item.get("id", line) if isinstance(item, dict) else line}
+    try:
+        record, agent = _prepare(line, item, agent)
+        # behind interactive sessions sharing a rate-limited client
+        with scheduling(priority=BATCH):
+            response = swarm.run(
+                agent=agent,
+                messages=item["messages"],
+                context_variables=item.get("context_variables") or {},
+                model_override=model_override,
+                max_turns=max_turns,
+            )
+        return _record(record, response)
+    except Exception as error:
+        record["error"] = _error(error)
+        return record
+
+
+async def arun_conversation(swarm, line: int, item, agent, model_override=None, max_turns=float("inf")) -> dict:
+    """`run_conversation` for an `AsyncSwarm`."""
+    record = {"line": line, "id": item.get("id", line) if isinstance(item, dict) else line}
+    try:
+        record, agent = _prepare(line, item, agent)
+        with scheduling(priority=BATCH):
+            response = await swarm.run(
+                agent=agent,
+                messages=item["messages"],
+                context_variables=item.get("context_variables") or {},
+                model_override=model_override,
+                max_turns=max_turns,
+            )
+        return _record(record, response)
+    except Exception as error:
+        record["error"] = _error(error)
+        return record
+
+
+# the process pool's per-process swarm, built once by `_init_worker`
+_worker_swarm = None
+
+
+def _init_worker(swarm_factory: Callable[[], Any]) -> None:
+    global _worker_swarm
+    _worker_swarm = swarm_factory()
+
+
+def _worker_call(options: dict) -> dict:
+    # Message objects and SDK types become plain JSON values before pickling
+    return json.loads(_encode(run_conversation(_worker_swarm, **options)))
+
+
+class BatchRequestError(RuntimeError):
+    """A request of a batch file came back with an error or not at all."""
+
+
+def write_batch_file(requests: List[Tuple[str, dict]], path: str) -> None:
+    """
+    Writes (custom_id, chat completion params) pairs in the provider's batch
+    input format: one POST to /v1/chat/completions per line.
+    """
+    with open(path, "wb") as f:
+        for custom_id, params in requests:
+            body = {key: value for key, value in params.items() if value is not None and key != "stream"}
+            f.write(_encode({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": CHAT_COMPLETIONS_URL,
+                "body": body,
+            }))
+
+
+def read_batch_results(path: str) -> Dict[str, dict]:
+    """custom_id -> result line of a batch output (or error) file."""
+    results = {}
+    with open(path, "rb") as f:
+        for raw in f:
+            if raw.strip():
+                result = json.loads(raw)
+                results[result["custom_id"]] = result
+    return results
+
+
+class LocalBatchBackend:
+    """
+    Processes batch files in-process through a chat client, as the provider
+    would, for tests and benchmarks. `turnaround` seconds are added per batch.
+    """
+
+    def __init__(self, client, turnaround: float = 0.0):
+        self.client = client
+        self.turnaround = turnaround
+        self.batches = 0
+
+    def run(self, requests_path: str, results_path: str) -> None:
+        self.batches += 1
+        time.sleep(self.turnaround)
+        with open(requests_path, "rb") as requests, open(results_path, "wb") as results:
+            for index, raw in enumerate(requests):
+                request = json.loads(raw)
+                result = {"id": f"batch_req_{index}", "custom_id": request["custom_id"],
+                          "response": None, "error": None}
+                try:
+                    completion = self.client.chat.completions.create(**request["body"])
+                    result["response"] = {"status_code": 200, "body": completion.model_dump(mode="json")}
+                except Exception as error:
+                    result["error"] = {"code": type(error).__name__, "message": str(error)}
+                results.write(_encode(result))
+
+
+class OpenAIBatchBackend:
+    """Submits batch files to the OpenAI Batch API and waits for their results."""
+
+    def __init__(self, client=None, completion_window: str = "24h", poll_interval: float = 30.0):
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI()
+        self.client = client
+        self.completion_window = completion_window
+        self.poll_interval = poll_interval
+        self.batches = 0
+
+    def run(self, requests_path: str, results_path: str) -> None:
+        with open(requests_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window=self.completion_window,
+        )
+        self.batches += 1
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        if batch.status == "failed":
+            raise BatchRequestError(f"batch {batch.id} failed: {batch.errors}")
+        # an expired batch still has results for the requests it finished
+        with open(results_path, "wb") as results:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    results.write(self.client.files.content(file_id).read())
+
+
+class BatchingClient:
+    """
+    An async chat client that sends requests through a batch backend.
+
+    It has `chat.completions.create(**params)`, so it can be passed as
+    `AsyncSwarm(client=...)`. Requests wait until every running conversation
+    (see `enter`/`leave`) is waiting on the model, or `max_requests` are
+    queued; then they are written to one batch file in `directory` (a
+    temporary one by default) and run by `backend` off the event loop.
+    Conversations advance one model turn per batch, with tool calls and
+    handoffs run locally in between. Streaming isn't supported.
+    """
+
+    def __init__(
+        self,
+        backend,
+        directory: Optional[str] = None,
+        max_requests: int = 50000,
+        linger: float = 0.05,
+    ):
+        self.backend = backend
+        self.directory = directory or tempfile.mkdtemp(prefix="swarm-batch-")
+        self.max_requests = max_requests
+        # how long a full batch waits for conversations that are starting in
+        # place of finished ones to join it
+        self.linger = linger
+        self.chat = SimpleNamespace(completions=self)
+        self.active = 0
+        self.rounds = 0
+        self.requests = 0
+        self._queue: List[Tuple[dict, asyncio.Future]] = []
+        self._flushing = False
+        os.makedirs(self.directory, exist_ok=True)
+
+    def enter(self) -> None:
+        self.active += 1
+
+    def leave(self) -> None:
+        self.active -= 1
+        self._maybe_flush()
+
+    async def create(self, **params):
+        if params.get("stream"):
+            raise ValueError("batch requests can't be streamed")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((params, future))
+        self._maybe_flush()
+        return await future
+
+    def _ready(self) -> bool:
+        queued = len(self._queue)
+        return queued > 0 and (queued >= self.active or queued >= self.max_requests)
+
+    def _maybe_flush(self) -> None:
+        if not self._flushing and self._ready():
+            self._flushing = True
+            asyncio.ensure_future(self._flush())
+
+    async def _flush(self) -> None:
+        from openai.types.chat import ChatCompletion
+
+        await asyncio.sleep(self.linger)
+        if not self._ready():
+            # a conversation joined; the batch goes when it is waiting too
+            self._flushing = False
+            return
+        batch, self._queue = self._queue[: self.max_requests], self._queue[self.max_requests:]
+        self.rounds += 1
+        self.requests += len(batch)
+        prefix = os.path.join(self.directory, f"round-{self.rounds:05d}")
+        requests = [(f"{self.rounds}-{index}", params) for index, (params, _) in enumerate(batch)]
+        try:
+            write_batch_file(requests, prefix + ".requests.jsonl")
+            await asyncio.to_thread(self.backend.run, prefix + ".requests.jsonl", prefix + ".results.jsonl")
+            results = read_batch_results(prefix + ".results.jsonl")
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+        else:
+            for (custom_id, _), (_, future) in zip(requests, batch):
+                result = results.get(custom_id)
+                response = (result or {}).get("response") or {}
+                if response.get("status_code") == 200:
+                    future.set_result(ChatCompletion.model_validate(response["body"]))
+                else:
+                    error = (result or {}).get("error") or response.get("body") or "no result"
+                    future.set_exception(BatchRequestError(f"request {custom_id}: {error}"))
+        finally:
+            self._flushing = False
+        # let the conversations resume before deciding on the next batch
+        await asyncio.sleep(0)
+        self._maybe_flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rounds": self.rounds, "requests": self.requests}
+
+
+def default_swarm(requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+    """A `Swarm` on the default OpenAI client; the processes mode's factory."""
+    from openai import OpenAI
+
+    from .core import Swarm
+    from .resilience import ResilientClient
+
+    client = ResilientClient(OpenAI(max_retries=0))
+    if requests_per_minute or tokens_per_minute:
+        client = RateLimitedClient(client, Scheduler(requests_per_minute, tokens_per_minute))
+    return Swarm(client=client)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a JSONL file of conversations through Swarm.")
+    parser.add_argument("input")
+    parser.add_argument("output", help="results JSONL; an interrupted run resumes from it")
+    parser.add_argument("--mode", choices=MODES, default=THREADS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--agent", default="OrchestratorAgent")
+    parser.add_argument("--model", help="use this model for every agent")
+    parser.add_argument("--max-turns", type=int)
+    parser.add_argument("--limit", type=int, help="run at most this many conversations")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument("--batch-dir", help="where the batch-api mode keeps its batch files")
+    parser.add_argument(
+        "--requests-per-minute", type=float,
+        help="client-side limit on model requests (per process in the processes mode)")
+    parser.add_argument("--tokens-per-minute", type=float, help="client-side limit on estimated tokens")
+    args = parser.parse_args()
+
+    limits = (args.requests_per_minute, args.tokens_per_minute)
+    swarm = swarm_factory = None
+    if args.mode == THREADS:
+        swarm = default_swarm(*limits)
+    elif args.mode == PROCESSES:
+        swarm_factory = functools.partial(default_swarm, *limits)
+    else:
+        from openai import AsyncOpenAI
+
+        from .async_core import AsyncSwarm
+        from .resilience import AsyncResilientClient
+
+        if args.mode == ASYNCIO:
+            client = AsyncResilientClient(AsyncOpenAI(max_retries=0))
+            if any(limits):
+                client = AsyncRateLimitedClient(client, Scheduler(*limits))
+        else:
+            client = BatchingClient(OpenAIBatchBackend(), directory=args.batch_dir)
+        swarm = AsyncSwarm(client=client)
+
+    runner = BatchRunner(
+        swarm,
+        agent=args.agent,
+        mode=args.mode,
+        concurrency=args.concurrency,
+        swarm_factory=swarm_factory,
+        model_override=args.model,
+        max_turns=args.max_turns if args.max_turns is not None else float("inf"),
+        checkpoint_every=args.checkpoint_every,
+    )
+    stats = runner.run(args.input, args.output, limit=args.limit)
+    print(json.dumps(stats), flush=True)
+
+
+if __name__ == "__main__":
+    main()
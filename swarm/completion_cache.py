@@ -0,0 +1,208 @@
+# Standard library imports
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+# request fields that decide the reply; the rest (timeouts, headers, ...) is
+# left out of the key
+KEY_FIELDS = ("model", "messages", "tools", "tool_choice", "parallel_tool_calls", "stream")
+
+READ_WRITE, RECORD, REPLAY = "read_write", "record", "replay"
+
+
+class CacheMissError(LookupError):
+    """A request with no recording was made in replay mode."""
+
+    def __init__(self, key: str, model: Optional[str]):
+        super().__init__(f"No recorded completion for {model or 'request'} (key {key})")
+        self.key = key
+        self.model = model
+
+
+def completion_key(params: dict) -> str:
+    """
+    Canonical hash of a chat completion request.
+
+    Keys of the messages and tools are sorted and unset fields are dropped,
+    so equal requests hash equally however they were built.
+    """
+    request = {field: params[field] for field in KEY_FIELDS if params.get(field) is not None}
+    body = json.dumps(
+        request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class MemoryBackend:
+    """At most `maxsize` recordings in memory, least recently used first out."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+class DiskBackend:
+    """
+    One JSON file per recording in `root`, named by its key.
+
+    Files are replaced atomically, so several processes can share a
+    directory, and a directory of recordings can be checked in as the
+    fixture for offline runs.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.root) if name.endswith(".json"))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + ".json")
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, entry: dict) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+class CompletionCache:
+    """
+    Serves repeated chat completion requests from recordings.
+
+    Requests are keyed by `completion_key`. Plain completions are recorded as
+    the completion, streams as their chunks, and a stream is only recorded
+    once it was read to the end. A recorded stream is replayed chunk by
+    chunk, as new `ChatCompletionChunk` objects, so callers see the same
+    sequence a live stream gave.
+
+    `mode` is one of:
+
+        read_write  serve recordings, record what is missing (default)
+        record      always call the model and overwrite the recording
+        replay      serve recordings only; a missing one raises
+                    `CacheMissError` instead of calling the model
+    """
+
+    def __init__(self, backend=None, mode: str = READ_WRITE):
+        if mode not in (READ_WRITE, RECORD, REPLAY):
+            raise ValueError(f"Unknown cache mode: {mode!r}")
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def _lookup(self, params: dict) -> Tuple[str, Optional[dict]]:
+        key = completion_key(params)
+        entry = self.backend.get(key) if self.mode != RECORD else None
+        if entry is not None:
+            self.hits += 1
+            return key, entry
+        self.misses += 1
+        if self.mode == REPLAY:
+            raise CacheMissError(key, params.get("model"))
+        return key, None
+
+    def _store(self, key: str, params: dict, **entry) -> None:
+        self.backend.put(key, {"model": params.get("model"), **entry})
+        self.stores += 1
+
+    def get_or_create(self, client, params: dict) -> Tuple[Any, bool]:
+        """`client.chat.completions.create(**params)`, or its recording; and whether it was recorded."""
+        key, entry = self._lookup(params)
+        if entry is not None:
+            return _replay(entry), True
+        completion = client.chat.completions.create(**params)
+        if params.get("stream"):
+            return self._record_stream(key, params, completion), False
+        self._store(key, params, stream=False, completion=_dump(completion))
+        return completion, False
+
+    async def aget_or_create(self, client, params: dict) -> Tuple[Any, bool]:
+        """`get_or_create` for an async client."""
+        key, entry = self._lookup(params)
+        if entry is not None:
+            replayed = _replay(entry)
+            return (_async_iter(replayed) if entry["stream"] else replayed), True
+        completion = await client.chat.completions.create(**params)
+        if params.get("stream"):
+            return self._arecord_stream(key, params, completion), False
+        self._store(key, params, stream=False, completion=_dump(completion))
+        return completion, False
+
+    def _record_stream(self, key: str, params: dict, stream) -> Iterator:
+        chunks: List[dict] = []
+        for chunk in stream:
+            chunks.append(_dump(chunk))
+            yield chunk
+        self._store(key, params, stream=True, chunks=chunks)
+
+    async def _arecord_stream(self, key: str, params: dict, stream) -> AsyncIterator:
+        chunks: List[dict] = []
+        async for chunk in stream:
+            chunks.append(_dump(chunk))
+            yield chunk
+        self._store(key, params, stream=True, chunks=chunks)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hit_rate,
+        }
+
+
+def _dump(obj) -> dict:
+    return obj.model_dump(mode="json", exclude_unset=True)
+
+
+def _replay(entry: dict):
+    # openai is imported on first use, see swarm_types
+    from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+    if entry["stream"]:
+        return (ChatCompletionChunk.model_validate(chunk) for chunk in entry["chunks"])
+    return ChatCompletion.model_validate(entry["completion"])
+
+
+async def _async_iter(chunks: Iterator) -> AsyncIterator:
+    for chunk in chunks:
+        yield chunk
@@ -0,0 +1,141 @@
+# Standard library imports
+from typing import Callable, List, Optional
+
+# tiktoken is optional; without it tokens are estimated from text length
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# per-message overhead the chat format adds around role and content
+MESSAGE_OVERHEAD = 4
+
+
+class TokenCounter:
+    def __init__(self, encoding: str = "o200k_base"):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.get_encoding(encoding)
+            except Exception:
+                # encodings are downloaded on first use; fall back when offline
+                self.encoding = None
+
+    def count_text(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(text) // 4 + 1
+
+    def count_message(self, message: dict) -> int:
+        tokens = MESSAGE_OVERHEAD + self.count_text(message.get("content") or "")
+        for tool_call in message.get("tool_calls") or ():
+            function = tool_call.get("function") or {}
+            tokens += self.count_text(function.get("name") or "")
+            tokens += self.count_text(function.get("arguments") or "")
+        return tokens
+
+
+class ContextWindow:
+    """
+    Selects the most recent slice of a conversation that fits a token budget.
+
+    Token counts are cached per message and only messages appended since the
+    previous call are counted, so a turn costs O(new messages + window) rather
+    than re-tokenizing the whole history. The window never starts on a tool
+    result whose assistant tool call was dropped.
+
+    The window start only moves when the conversation outgrows the budget, and
+    then far enough that the window is down to `trim_to` of the budget. In
+    between, requests grow by appending only, so they share their prefix with
+    the previous request and the provider's prompt cache keeps hitting.
+
+    Dropped messages are discarded unless a `summarizer` is given. It is called
+    as `summarizer(previous_summary, newly_dropped_messages)` only when the
+    window start moves, and its result is sent as a system message ahead of
+    the window.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 96_000,
+        reserve_tokens: int = 8_000,
+        counter: Optional[TokenCounter] = None,
+        summarizer: Optional[Callable[[Optional[str], List[dict]], str]] = None,
+        trim_to: float = 0.75,
+    ):
+        # reserve_tokens leaves room for the system prompt, tools, the new user
+        # message and the reply
+        self.max_tokens = max_tokens
+        self.reserve_tokens = reserve_tokens
+        self.counter = counter or TokenCounter()
+        self.summarizer = summarizer
+        self.trim_to = trim_to
+        self.summary: Optional[str] = None
+        self._counts: List[int] = []
+        self._last_counted = None
+        self._summarized_until = 0
+        self._start = 0
+
+    @property
+    def budget(self) -> int:
+        return self.max_tokens - self.reserve_tokens
+
+    def token_counts(self, history: List[dict]) -> List[int]:
+        counted = len(self._counts)
+        # history was replaced or truncated: start over
+        if counted > len(history) or (counted and history[counted - 1] is not self._last_counted):
+            self._counts = []
+            self._summarized_until = 0
+            self._start = 0
+            self.summary = None
+            counted = 0
+        for message in history[counted:]:
+            self._counts.append(self.counter.count_message(message))
+        if history:
+            self._last_counted = history[-1]
+        return self._counts
+
+    def _fit(self, history: List[dict], budget: float) -> int:
+        counts = self._counts
+        start, used = len(history), 0
+        while start > 0 and used + counts[start - 1] <= budget:
+            start -= 1
+            used += counts[start]
+        # keep tool results together with the assistant message that called them
+        while start < len(history) and history[start].get("role") == "tool":
+            start += 1
+        return start
+
+    def window_start(self, history: List[dict]) -> int:
+        self.token_counts(history)
+        budget = self.budget
+        if self.summary:
+            budget -= self.counter.count_text(self.summary) + MESSAGE_OVERHEAD
+        if self._fit(history, budget) <= self._start:
+            # the previous window plus what was appended still fits
+            return self._start
+        self._start = self._fit(history, budget * self.trim_to)
+        return self._start
+
+    def select(self, history: List[dict]) -> List[dict]:
+        start = self.window_start(history)
+        if start == 0:
+            return list(history)
+        if self.summarizer is None:
+            return history[start:]
+
+        if start > self._summarized_until:
+            self.summary = self.summarizer(
+                self.summary, history[self._summarized_until:start])
+            self._summarized_until = start
+        summary = {
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{self.summary}",
+        }
+        return [summary] + history[start:]
+
+    def tokens(self, history: List[dict]) -> int:
+        return sum(self.token_counts(history))
+
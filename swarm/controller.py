@@ -1,8 +1,14 @@
-from typing import Optional, Dict, Any, List, Generator
+from typing import Optional, Dict, Any, List, Generator, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
+from uuid import uuid4
 from .core import Swarm
-from .agents.orchestrator_agent import orchestrator_agent
+from .message import Message
+from .context_window import ContextWindow
+from .routing import Router
+from .session_store import SessionStore
+from .swarm_types import Agent
+from .agents.orchestrator_agent import ROUTES, orchestrator_agent
 
 @dataclass
 class ConversationState:
@@ -11,13 +17,16 @@ class ConversationState:
     context: Dict[str, Any] = field(default_factory=dict)
     last_agent: Optional[str] = None
     last_update: datetime = field(default_factory=datetime.now)
+    session_id: str = field(default_factory=lambda: uuid4().hex)
+    # earlier messages left in the session store when resuming a recent window
+    resumed_from: int = 0
 
     def update(self, response):
-        # Update history with the new message
+        # Update history with the new message, kept as compact `Message`s
         if isinstance(response, dict):
             self.history.append(response)
         elif hasattr(response, 'messages'):
-            self.history.extend(response.messages)
+            self.history.extend(Message.from_dict(message) for message in response.messages)
         
         self.last_update = datetime.now()
         
@@ -30,15 +39,103 @@ class ConversationState:
             self.last_agent = response["agent"]
 
 class AgentController:
-    def __init__(self):
+    def __init__(
+        self,
+        swarm: Optional[Swarm] = None,
+        context_window: Optional[ContextWindow] = None,
+        router: Optional[Router] = None,
+        store: Optional[SessionStore] = None,
+        session_id: Optional[str] = None,
+        resume_window: int = 256,
+    ):
         self.state = ConversationState()
-        self.current_context = {}
-        self.swarm = Swarm()
+        if session_id:
+            self.state.session_id = session_id
+        # bounds the history sent to the model; state.history keeps everything
+        self.context_window = context_window or ContextWindow()
+        # session_id scopes per-session stores such as search results
+        self.current_context = {"session_id": self.state.session_id}
+        self.swarm = swarm or Swarm()
+        # optional local pre-router that can skip the orchestrator hop
+        self.router = router
+        # optional durable log of the conversation; an existing session resumes
+        # from its last `resume_window` messages and latest snapshot
+        self.store = store
+        if store is not None and store.exists(self.state.session_id):
+            self.resume(resume_window)
+
+    def resume(self, window: int) -> None:
+        """Load the recent history and the latest snapshot of this session from the store."""
+        session_id = self.state.session_id
+        count = self.store.count(session_id)
+        self.state.history = [
+            Message.from_dict(message) for message in self.store.tail(session_id, window)
+        ]
+        self.state.resumed_from = count - len(self.state.history)
+        snapshot = self.store.load_snapshot(session_id)
+        if snapshot:
+            state = snapshot["state"]
+            self.state.active_tasks = state.get("active_tasks", {})
+            self.state.last_agent = state.get("last_agent")
+            self.state.context = state.get("context", {})
+            self.current_context.update(state.get("current_context", {}))
+        self.current_context["session_id"] = session_id
+        self.update_context()
+
+    def persist(self, messages: List[Dict[str, Any]]) -> None:
+        """Append a turn's new messages to the store, snapshotting the rest of the state when due."""
+        if self.store is None:
+            return
+        session_id = self.state.session_id
+        count = self.store.append(session_id, messages)
+        if self.store.snapshot_due(session_id, count):
+            self.store.save_snapshot(session_id, count, {
+                "active_tasks": self.state.active_tasks,
+                "last_agent": self.state.last_agent,
+                "context": self.state.context,
+                # the history and the fields above are rebuilt by update_context
+                "current_context": {
+                    k: v for k, v in self.current_context.items()
+                    if k not in ("conversation_history", "last_agent", "active_tasks")
+                },
+            })
     
+    def resolve_route(self, message: str) -> Tuple[Agent, Dict[str, Any]]:
+        """
+        Pick the starting agent and context for a message.
+
+        When the pre-router is confident, the matching delegate function is
+        called directly and its target agent starts the run; otherwise the
+        message goes to the orchestrator.
+        """
+        decision = self.router.route(message) if self.router else None
+        if decision is None or decision.route not in ROUTES:
+            return orchestrator_agent, self.current_context
+        result = ROUTES[decision.route](message, self.current_context)
+        return result.agent, {**self.current_context, **result.context_variables}
+
+    def update_context(self):
+        """
+        Refresh the context passed to the next run.
+
+        The history is shared by reference, not copied: Swarm only takes shallow
+        copies of messages and context, so this costs the same at any session length.
+        It also means tools get the controller's own history and active_tasks, and
+        must not change them in place (see `Swarm.run`).
+        """
+        self.current_context.update({
+            "conversation_history": self.state.history,
+            "last_agent": self.state.last_agent,
+            "active_tasks": self.state.active_tasks
+        })
+
     def format_chunk(self, chunk: Dict[str, Any]) -> Optional[str]:
         """Format a streaming chunk for display."""
         if "content" in chunk and chunk["content"]:
             return chunk["content"]
+        # output of a running terminal command
+        if chunk.get("tool_output"):
+            return chunk["tool_output"]
         if "value" in chunk and chunk["value"]:
             return chunk["value"]
         return None
@@ -72,14 +169,15 @@ class AgentController:
             # Create message format
             user_message = {"role": "user", "content": message}
             
-            # Get conversation history
-            messages = self.state.history + [user_message]
+            # Get the recent conversation history that fits the token budget
+            messages = self.context_window.select(self.state.history) + [user_message]
             
-            # Process through orchestrator using Swarm with streaming
+            # Process through orchestrator (or the pre-routed agent) using Swarm with streaming
+            agent, context_variables = self.resolve_route(message)
             response_stream = self.swarm.run(
-                agent=orchestrator_agent,
+                agent=agent,
                 messages=messages,
-                context_variables=self.current_context,
+                context_variables=context_variables,
                 stream=True
             )
             
@@ -96,14 +194,12 @@ class AgentController:
             
             # Update state with final response
             if last_response:
+                before = len(self.state.history)
                 self.state.update(last_response)
                 
                 # Update context for next interaction
-                self.current_context.update({
-                    "conversation_history": self.state.history,
-                    "last_agent": self.state.last_agent,
-                    "active_tasks": self.state.active_tasks
-                })
+                self.update_context()
+                self.persist(self.state.history[before:])
             
         except Exception as e:
             import traceback
@@ -124,26 +220,25 @@ class AgentController:
             # Create message format
             user_message = {"role": "user", "content": message}
             
-            # Get conversation history
-            messages = self.state.history + [user_message]
+            # Get the recent conversation history that fits the token budget
+            messages = self.context_window.select(self.state.history) + [user_message]
             
-            # Process through orchestrator using Swarm
+            # Process through orchestrator (or the pre-routed agent) using Swarm
+            agent, context_variables = self.resolve_route(message)
             response = self.swarm.run(
-                agent=orchestrator_agent,
+                agent=agent,
                 messages=messages,
-                context_variables=self.current_context,
+                context_variables=context_variables,
                 stream=False
             )
             
             # Update state
+            before = len(self.state.history)
             self.state.update(response)
             
             # Update context for next interaction
-            self.current_context.update({
-                "conversation_history": self.state.history,
-                "last_agent": self.state.last_agent,
-                "active_tasks": self.state.active_tasks
-            })
+            self.update_context()
+            self.persist(self.state.history[before:])
             
             # Return formatted response
             return self.format_response(response)
@@ -156,8 +251,9 @@ class AgentController:
     def get_state(self) -> Dict[str, Any]:
         """Get current conversation state."""
         return {
-            "history_length": len(self.state.history),
+            "history_length": self.state.resumed_from + len(self.state.history),
             "active_tasks": len(self.state.active_tasks),
             "last_update": self.state.last_update.isoformat(),
-            "last_agent": self.state.last_agent
+            "last_agent": self.state.last_agent,
+            "router_hit_rate": self.router.stats.hit_rate if self.router else None
         } 
\ No newline at end of file
@@ -1,35 +1,178 @@
+from __future__ import annotations
+
 # Standard library imports
-import copy
+import functools
 import json
+import queue
+import threading
+import time
 from collections import defaultdict
-from typing import List, Callable, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Callable, Optional, Union
 
 # Package/library imports
-from openai import OpenAI
-
+# openai is imported when a client is first needed; see `swarm_types`
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessage
+    from openai.types.chat.chat_completion_message_tool_call import (
+        ChatCompletionMessageToolCall,
+    )
 
 # Local imports
-from .util import function_to_json, debug_print, merge_chunk
+from .util import (
+    CompiledTools,
+    InstructionCache,
+    compile_tools,
+    debug_print,
+    delta_to_dict,
+    StreamAccumulator,
+    __CTX_VARS_NAME__,
+    __OUTPUT_NAME__,
+)
+from .completion_cache import CompletionCache
+from .message import Message, to_dict, to_wire
+from .tracing import NOOP_SPAN, Span, Tracer, UsageStats, usage_attributes
 from .swarm_types import (
     Agent,
     AgentFunction,
-    ChatCompletionMessage,
-    ChatCompletionMessageToolCall,
-    Function,
     Response,
     Result,
 )
 
-__CTX_VARS_NAME__ = "context_variables"
+
+def tool_calls_from_dicts(tool_calls: List[dict]) -> List[ChatCompletionMessageToolCall]:
+    """Converts merged streaming tool call dicts into OpenAI tool call objects."""
+    from .swarm_types import ChatCompletionMessageToolCall, Function
+
+    return [
+        ChatCompletionMessageToolCall(
+            id=tool_call["id"],
+            function=Function(
+                arguments=tool_call["function"]["arguments"],
+                name=tool_call["function"]["name"],
+            ),
+            type=tool_call["type"],
+        )
+        for tool_call in tool_calls
+    ]
+
+
+def tool_output_writer(
+    output: Callable[[dict], None], tool_call: ChatCompletionMessageToolCall
+) -> Callable[..., None]:
+    """The `stream_output(text, stream="stdout")` callable handed to a streaming tool."""
+    def write(text: str, stream: str = "stdout") -> None:
+        output({
+            "tool_output": text,
+            "stream": stream,
+            "tool_call_id": tool_call.id,
+            "tool_name": tool_call.function.name,
+        })
+    return write
+
+
+def counted_stream(stream, usage: UsageStats):
+    """Yields the chunks of `stream`, adding the usage it reports to `usage`."""
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            usage.add(chunk.usage)
+        yield chunk
+
+
+class _Run:
+    """The state of one run, shared by the sync and async run loops."""
+
+    def __init__(self, agent: Agent, messages: List, context_variables: dict, max_turns, span: Span):
+        self.agent = agent
+        # shallow copies: the loop only appends to history and updates top-level
+        # context keys, so messages and context values are shared, not cloned
+        self.context_variables = dict(context_variables)
+        self.history = list(messages)
+        self.init_len = len(messages)
+        self.max_turns = max_turns
+        self.span = span
+        self.turn = 0
+
+    def more_turns(self) -> bool:
+        # transfers may not grow history, so the turn count is bounded as well
+        return (
+            len(self.history) - self.init_len < self.max_turns
+            and self.turn < self.max_turns
+            and self.agent is not None
+        )
+
+
+class _StreamTurn:
+    """A streamed turn: the message being assembled and the tool calls started early."""
+
+    def __init__(self, agent: Agent, span: Span, early: bool, output: Optional[Callable[[dict], None]]):
+        self.agent = agent
+        self.span = span
+        self.early = early
+        # tool output events of tools taking stream_output go to `output`
+        self.output = output
+        # serial agents' calls are started in order, each after the one before
+        self.accumulator = StreamAccumulator(
+            agent.name, detect_tool_calls=early, in_order=not agent.parallel_tool_calls)
+        self.pending = {}
+        self.stream_span = NOOP_SPAN
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.chunks = 0
+        self.usage = None
 
 
 class Swarm:
-    def __init__(self, client=None):
+    def __init__(
+        self,
+        client=None,
+        max_tool_workers: int = 8,
+        tracer: Optional[Tracer] = None,
+        direct_transfers: bool = True,
+        early_tool_dispatch: bool = True,
+        completion_cache: Optional[CompletionCache] = None,
+        memoize_instructions: bool = False,
+        stream_usage: bool = False,
+    ):
         if not client:
+            from openai import OpenAI
+
             client = OpenAI()
         self.client = client
+        # honour Result.transfer; False keeps routing messages in history
+        self.direct_transfers = direct_transfers
+        # when streaming, start each tool call as soon as its arguments are
+        # complete instead of waiting for the end of the stream
+        self.early_tool_dispatch = early_tool_dispatch
+        # serves repeated requests from recorded completions; None always calls
+        # the model
+        self.completion_cache = completion_cache
+        # opt-in: reuses the text of callable instructions while the context
+        # keys they read are unchanged, so instructions must be pure functions
+        # of context_variables (no clock, no globals); None calls them every turn
+        self.instruction_cache = InstructionCache() if memoize_instructions else None
+        # ask for usage at the end of streams (stream_options.include_usage),
+        # so prompt cache hits are counted in `usage` for streamed requests
+        # too; off by default, as not every compatible backend accepts it
+        self.stream_usage = stream_usage
+        # token usage the API reported, including prompt cache hits
+        self.usage = UsageStats()
+        # records per-turn and per-tool spans; the default Tracer is a no-op
+        self.tracer = tracer or Tracer()
+        # upper bound on tool calls executed concurrently for agents that allow
+        # parallel tool calls; 1 keeps execution serial
+        self.max_tool_workers = max_tool_workers
+        self._tool_executor = None
+
+    @property
+    def tool_executor(self) -> ThreadPoolExecutor:
+        if self._tool_executor is None:
+            self._tool_executor = ThreadPoolExecutor(
+                max_workers=self.max_tool_workers, thread_name_prefix="swarm-tool"
+            )
+        return self._tool_executor
 
-    def get_chat_completion(
+    def build_completion_params(
         self,
         agent: Agent,
         history: List,
@@ -37,23 +180,20 @@ class Swarm:
         model_override: str,
         stream: bool,
         debug: bool,
-    ) -> ChatCompletionMessage:
-        context_variables = defaultdict(str, context_variables)
-        instructions = (
-            agent.instructions(context_variables)
-            if callable(agent.instructions)
-            else agent.instructions
-        )
-        messages = [{"role": "system", "content": instructions}] + history
+    ) -> dict:
+        # the static part first (system prompt, then tools), the history after
+        # it, so consecutive requests share a prefix the provider can cache
+        instructions = agent.instructions
+        if callable(instructions):
+            if self.instruction_cache is not None:
+                instructions = self.instruction_cache(instructions, context_variables)
+            else:
+                instructions = instructions(defaultdict(str, context_variables))
+        messages = [{"role": "system", "content": instructions}]
+        messages += map(to_wire, history)
         debug_print(debug, "Getting chat completion for...:", messages)
 
-        tools = [function_to_json(f) for f in agent.functions]
-        # hide context_variables from model
-        for tool in tools:
-            params = tool["function"]["parameters"]
-            params["properties"].pop(__CTX_VARS_NAME__, None)
-            if __CTX_VARS_NAME__ in params["required"]:
-                params["required"].remove(__CTX_VARS_NAME__)
+        tools = compile_tools(agent.functions).tools
 
         create_params = {
             "model": model_override or agent.model,
@@ -62,11 +202,71 @@ class Swarm:
             "tool_choice": agent.tool_choice,
             "stream": stream,
         }
+        if stream and self.stream_usage:
+            create_params["stream_options"] = {"include_usage": True}
 
         if tools:
             create_params["parallel_tool_calls"] = agent.parallel_tool_calls
 
-        return self.client.chat.completions.create(**create_params)
+        return create_params
+
+    def traced_completion_params(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+        span: Span = NOOP_SPAN,
+    ) -> dict:
+        with self.tracer.start_span("swarm.build_params", span, agent=agent.name) as build_span:
+            create_params = self.build_completion_params(
+                agent, history, context_variables, model_override, stream, debug
+            )
+            build_span.set(tools=len(create_params["tools"] or ()))
+        return create_params
+
+    def count_stream(self, stream):
+        return counted_stream(stream, self.usage)
+
+    def track_completion(self, completion, cached: bool, stream: bool, request_span: Span):
+        """Counts the usage of a completion the API served; replayed ones were counted when recorded."""
+        if stream:
+            if not cached:
+                completion = self.count_stream(completion)
+        else:
+            # fakes and some compatible clients don't report usage
+            usage = getattr(completion, "usage", None)
+            if not cached:
+                self.usage.add(usage)
+            if self.tracer.enabled:
+                request_span.set(**usage_attributes(usage))
+        return completion
+
+    def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+        span: Span = NOOP_SPAN,
+    ) -> ChatCompletionMessage:
+        create_params = self.traced_completion_params(
+            agent, history, context_variables, model_override, stream, debug, span)
+        with self.tracer.start_span(
+            "swarm.request", span, model=create_params["model"], stream=stream
+        ) as request_span:
+            cached = False
+            if self.completion_cache is not None:
+                completion, cached = self.completion_cache.get_or_create(
+                    self.client, create_params)
+                request_span.set(cached=cached)
+            else:
+                completion = self.client.chat.completions.create(**create_params)
+            return self.track_completion(completion, cached, stream, request_span)
 
     def handle_function_result(self, result, debug) -> Result:
         match result:
@@ -86,56 +286,351 @@ class Swarm:
                     debug_print(debug, error_message)
                     raise TypeError(error_message)
 
-    def handle_tool_calls(
+    def resolve_tool_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        compiled: CompiledTools,
+        context_variables: dict,
+        debug: bool,
+        output: Optional[Callable[[dict], None]] = None,
+    ):
+        """
+        Returns the function and keyword arguments for a tool call, or (None, None) if the tool is unknown.
+
+        Functions taking `stream_output` get a writer that sends tool output
+        events to `output`, when given.
+        """
+        name = tool_call.function.name
+        if name not in compiled.function_map:
+            debug_print(debug, f"Tool {name} not found in function map.")
+            return None, None
+        args = json.loads(tool_call.function.arguments)
+        debug_print(
+            debug, f"Processing tool call: {name} with arguments {args}")
+
+        # pass context_variables to agent functions
+        if name in compiled.context_aware:
+            args[__CTX_VARS_NAME__] = context_variables
+        if output is not None and name in compiled.streaming:
+            args[__OUTPUT_NAME__] = tool_output_writer(output, tool_call)
+        return compiled.function_map[name], args
+
+    def merge_tool_result(
+        self,
+        partial_response: Response,
+        tool_call: ChatCompletionMessageToolCall,
+        raw_result,
+        debug: bool,
+    ) -> None:
+        name = tool_call.function.name
+        result: Result = self.handle_function_result(raw_result, debug)
+        partial_response.messages.append(Message(
+            "tool",
+            result.value,
+            tool_call_id=tool_call.id,
+            tool_name=name,
+            transfer=bool(result.transfer and result.agent),
+        ))
+        partial_response.context_variables.update(result.context_variables)
+        if result.agent:
+            partial_response.agent = result.agent
+
+    def is_direct_transfer(self, partial_response: Response) -> bool:
+        """True when every tool call of the turn was a direct transfer to another agent."""
+        return (
+            self.direct_transfers
+            and partial_response.agent is not None
+            and bool(partial_response.messages)
+            and all(m.get("transfer") for m in partial_response.messages)
+        )
+
+    def merge_missing_tool(
+        self,
+        partial_response: Response,
+        tool_call: ChatCompletionMessageToolCall,
+    ) -> None:
+        name = tool_call.function.name
+        partial_response.messages.append(Message(
+            "tool",
+            f"Error: Tool {name} not found.",
+            tool_call_id=tool_call.id,
+            tool_name=name,
+        ))
+
+    def execute_tool(
+        self,
+        func: AgentFunction,
+        args: dict,
+        tool_call: ChatCompletionMessageToolCall,
+        span: Span = NOOP_SPAN,
+    ):
+        with self.tracer.start_span(
+            "swarm.tool", span, tool=tool_call.function.name, tool_call_id=tool_call.id
+        ):
+            return func(**args)
+
+    def resolve_streamed_tool_call(
+        self,
+        tool_call: dict,
+        agent: Agent,
+        context_variables: dict,
+        debug: bool,
+        output: Optional[Callable[[dict], None]] = None,
+    ):
+        """Returns (tool_call, func, args) for a tool call completed mid-stream, or None if it can't be started early."""
+        if not tool_call["id"]:
+            return None
+        tool_call = tool_calls_from_dicts([tool_call])[0]
+        try:
+            func, _ = resolved = self.resolve_tool_call(
+                tool_call, compile_tools(agent.functions), context_variables, debug, output)
+        except ValueError:
+            # malformed arguments raise again, in order, from handle_tool_calls
+            return None
+        if func is None:
+            return None
+        return (tool_call, *resolved)
+
+    def _run_after(self, previous: Optional[Future], func, args, tool_call, span):
+        if previous is not None:
+            previous.result()
+        return self.execute_tool(func, args, tool_call, span)
+
+    def dispatch_tool_call(
+        self,
+        tool_call: dict,
+        agent: Agent,
+        context_variables: dict,
+        pending: Dict[str, Future],
+        debug: bool,
+        span: Span = NOOP_SPAN,
+        output: Optional[Callable[[dict], None]] = None,
+    ) -> bool:
+        """
+        Starts a tool call the stream has finished emitting; False if it can't
+        be started early.
+
+        The future is stored in `pending` under the tool call id for
+        `handle_tool_calls` to collect. For agents without parallel tool calls,
+        calls must be dispatched in order, and each waits for the previous one.
+        """
+        resolved = self.resolve_streamed_tool_call(
+            tool_call, agent, context_variables, debug, output)
+        if resolved is None:
+            return False
+        tool_call, func, args = resolved
+        previous = None
+        if not agent.parallel_tool_calls and pending:
+            previous = next(reversed(pending.values()))
+        debug_print(debug, f"Dispatching tool call {tool_call.function.name} during the stream.")
+        pending[tool_call.id] = self.tool_executor.submit(
+            self._run_after, previous, func, args, tool_call, span)
+        return True
+
+    def resolve_tool_calls(
         self,
         tool_calls: List[ChatCompletionMessageToolCall],
         functions: List[AgentFunction],
         context_variables: dict,
         debug: bool,
-    ) -> Response:
-        function_map = {f.__name__: f for f in functions}
+        output: Optional[Callable[[dict], None]] = None,
+    ) -> List[tuple]:
+        """(tool_call, func, args) for each tool call; func is None for unknown tools."""
+        compiled = compile_tools(functions)
+        return [
+            (tool_call, *self.resolve_tool_call(
+                tool_call, compiled, context_variables, debug, output))
+            for tool_call in tool_calls
+        ]
+
+    def merge_tool_results(self, calls: List[tuple], results: List, debug: bool) -> Response:
+        """Merges the results of `calls` in the order the model issued them."""
         partial_response = Response(
             messages=[], agent=None, context_variables={})
-
-        for tool_call in tool_calls:
-            name = tool_call.function.name
+        for (tool_call, func, _), raw_result in zip(calls, results):
             # handle missing tool case, skip to next tool
-            if name not in function_map:
-                debug_print(debug, f"Tool {name} not found in function map.")
-                partial_response.messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "tool_name": name,
-                        "content": f"Error: Tool {name} not found.",
-                    }
-                )
+            if func is None:
+                self.merge_missing_tool(partial_response, tool_call)
                 continue
-            args = json.loads(tool_call.function.arguments)
-            debug_print(
-                debug, f"Processing tool call: {name} with arguments {args}")
-
-            func = function_map[name]
-            # pass context_variables to agent functions
-            if __CTX_VARS_NAME__ in func.__code__.co_varnames:
-                args[__CTX_VARS_NAME__] = context_variables
-            raw_result = function_map[name](**args)
-
-            result: Result = self.handle_function_result(raw_result, debug)
-            partial_response.messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "tool_name": name,
-                    "content": result.value,
-                }
-            )
-            partial_response.context_variables.update(result.context_variables)
-            if result.agent:
-                partial_response.agent = result.agent
-
+            self.merge_tool_result(
+                partial_response, tool_call, raw_result, debug)
         return partial_response
 
+    def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: List[AgentFunction],
+        context_variables: dict,
+        debug: bool,
+        parallel: bool = False,
+        span: Span = NOOP_SPAN,
+        pending: Optional[Dict[str, Future]] = None,
+        output: Optional[Callable[[dict], None]] = None,
+    ) -> Response:
+        """
+        Executes a turn's tool calls and merges their results.
+
+        `pending` maps tool call ids to calls already started by
+        `dispatch_tool_call`; their results are collected instead of running
+        them again. `output` receives the tool output events of streaming tools.
+        """
+        pending = pending or {}
+        calls = self.resolve_tool_calls(tool_calls, functions, context_variables, debug, output)
+
+        # run independent calls concurrently, but merge results in the order the
+        # model issued them so context_variables and handoffs stay deterministic
+        if parallel and self.max_tool_workers > 1 and len(calls) > 1:
+            debug_print(debug, f"Executing {len(calls)} tool calls concurrently.")
+            futures = [
+                pending.get(tool_call.id) or self.tool_executor.submit(
+                    self.execute_tool, func, args, tool_call, span)
+                if func else None
+                for tool_call, func, args in calls
+            ]
+            results = [future.result() if future else None for future in futures]
+        else:
+            results = []
+            for tool_call, func, args in calls:
+                if func is None:
+                    results.append(None)
+                elif tool_call.id in pending:
+                    results.append(pending[tool_call.id].result())
+                else:
+                    results.append(self.execute_tool(func, args, tool_call, span))
+
+        return self.merge_tool_results(calls, results, debug)
+
+    def stream_tool_output(self, events: queue.SimpleQueue, run: Callable[[], Response]):
+        """
+        Runs `run()` on a helper thread, yielding the tool output events put on
+        `events` until it returns. Returns its result (use with `yield from`).
+        """
+        outcome = {}
+        done = object()
+
+        def target():
+            try:
+                outcome["result"] = run()
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                events.put(done)
+
+        threading.Thread(target=target, name="swarm-tool-output", daemon=True).start()
+        while (event := events.get()) is not done:
+            yield event
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def start_run(self, agent: Agent, messages: List, context_variables: dict, max_turns, stream: bool) -> _Run:
+        span = self.tracer.start_span("swarm.run", agent=agent.name, stream=stream)
+        return _Run(agent, messages, context_variables, max_turns, span)
+
+    def start_turn(self, run: _Run) -> Span:
+        span = self.tracer.start_span(
+            "swarm.turn", run.span, agent=run.agent.name, turn=run.turn)
+        run.turn += 1
+        return span
+
+    def start_stream_turn(
+        self, run: _Run, execute_tools: bool, output: Optional[Callable[[dict], None]]
+    ) -> _StreamTurn:
+        span = self.start_turn(run)
+        return _StreamTurn(run.agent, span, self.early_tool_dispatch and execute_tools, output)
+
+    def open_stream(self, turn: _StreamTurn) -> None:
+        turn.stream_span = self.tracer.start_span(
+            "swarm.stream", turn.span, agent=turn.agent.name)
+
+    def stream_chunk(self, run: _Run, turn: _StreamTurn, chunk, debug: bool) -> Optional[dict]:
+        """
+        Adds a streamed chunk to the turn's message, starting tool calls whose
+        arguments are complete. Returns the delta to pass on, or None.
+        """
+        if not chunk.choices:
+            # the usage-only chunk that ends a stream with include_usage
+            turn.usage = getattr(chunk, "usage", None) or turn.usage
+            return None
+        delta = chunk.choices[0].delta
+        if self.tracer.enabled:
+            turn.chunks += 1
+            turn.usage = getattr(chunk, "usage", None) or turn.usage
+            if turn.first_token is None and (delta.content or delta.tool_calls):
+                turn.first_token = time.perf_counter() - turn.started
+        turn.accumulator.add(delta)
+        if turn.early:
+            for tool_call in turn.accumulator.pop_ready():
+                started = self.dispatch_tool_call(
+                    tool_call, turn.agent, run.context_variables, turn.pending, debug,
+                    turn.span, turn.output)
+                if not started and not turn.agent.parallel_tool_calls:
+                    # the calls after it must wait for it, and it runs after the stream
+                    turn.early = False
+                    break
+        delta = delta_to_dict(delta)
+        if delta["role"] == "assistant":
+            delta["sender"] = turn.agent.name
+        return delta
+
+    def close_stream(self, run: _Run, turn: _StreamTurn, debug: bool) -> Message:
+        """Appends the assembled message of a streamed turn to the history and returns it."""
+        if self.tracer.enabled:
+            turn.stream_span.end(
+                time_to_first_token=turn.first_token, chunks=turn.chunks,
+                **usage_attributes(turn.usage))
+        message = turn.accumulator.message()
+        debug_print(debug, "Received completion:", message)
+        run.history.append(message)
+        return message
+
+    def add_completion(self, run: _Run, completion, debug: bool):
+        """Appends the message of a completion to the history and returns it as the API gave it."""
+        message = completion.choices[0].message
+        debug_print(debug, "Received completion:", message)
+        run.history.append(Message.from_completion(message, run.agent.name))
+        return message
+
+    def is_last_turn(self, tool_calls, execute_tools: bool, turn_span: Span, debug: bool) -> bool:
+        if tool_calls and execute_tools:
+            return False
+        debug_print(debug, "Ending turn.")
+        turn_span.end(tool_calls=0)
+        return True
+
+    def apply_tool_results(
+        self, run: _Run, partial_response: Response, tool_calls: List, turn_span: Span
+    ) -> None:
+        """Adds a turn's tool results to the run and hands off to the next agent."""
+        transfer = self.is_direct_transfer(partial_response)
+        if transfer:
+            # drop the routing tool call and its filler result: the target
+            # agent starts from the conversation as it was before routing.
+            # Text said alongside the call was already shown to the user, so
+            # it stays
+            message = run.history.pop()
+            if message.get("content"):
+                run.history.append(Message("assistant", message["content"], message.get("sender")))
+        else:
+            run.history.extend(partial_response.messages)
+        run.context_variables.update(partial_response.context_variables)
+        if partial_response.agent:
+            self.tracer.event(
+                "swarm.handoff", run.span,
+                from_agent=run.agent.name, to_agent=partial_response.agent.name,
+                transfer=transfer)
+            run.agent = partial_response.agent
+        turn_span.end(tool_calls=len(tool_calls))
+
+    def finish_run(self, run: _Run) -> Response:
+        run.span.end(turns=run.turn, final_agent=run.agent.name if run.agent else None)
+        # callers get plain dicts, which they can serialize and change
+        return Response(
+            messages=[to_dict(message) for message in run.history[run.init_len:]],
+            agent=run.agent,
+            context_variables=run.context_variables,
+        )
+
     def run_and_stream(
         self,
         agent: Agent,
@@ -146,87 +641,65 @@ class Swarm:
         max_turns: int = float("inf"),
         execute_tools: bool = True,
     ):
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
-
-        while len(history) - init_len < max_turns:
-
-            message = {
-                "content": "",
-                "sender": agent.name,
-                "role": "assistant",
-                "function_call": None,
-                "tool_calls": defaultdict(
-                    lambda: {
-                        "function": {"arguments": "", "name": ""},
-                        "id": "",
-                        "type": "",
-                    }
-                ),
-            }
+        run = self.start_run(agent, messages, context_variables, max_turns, stream=True)
+
+        while run.more_turns():
+            # tool output events from tools taking stream_output
+            events = None
+            if execute_tools and compile_tools(run.agent.functions).streaming:
+                events = queue.SimpleQueue()
+            turn = self.start_stream_turn(
+                run, execute_tools, events.put if events is not None else None)
 
             # get completion with current history, agent
             completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
-                context_variables=context_variables,
+                agent=run.agent,
+                history=run.history,
+                context_variables=run.context_variables,
                 model_override=model_override,
                 stream=True,
                 debug=debug,
+                span=turn.span,
             )
 
+            self.open_stream(turn)
             yield {"delim": "start"}
             for chunk in completion:
-                delta = json.loads(chunk.choices[0].delta.json())
-                if delta["role"] == "assistant":
-                    delta["sender"] = active_agent.name
+                delta = self.stream_chunk(run, turn, chunk, debug)
+                if delta is None:
+                    continue
                 yield delta
-                delta.pop("role", None)
-                delta.pop("sender", None)
-                merge_chunk(message, delta)
+                # output of tools dispatched early
+                while turn.pending and events is not None and not events.empty():
+                    yield events.get()
             yield {"delim": "end"}
+            message = self.close_stream(run, turn, debug)
 
-            message["tool_calls"] = list(
-                message.get("tool_calls", {}).values())
-            if not message["tool_calls"]:
-                message["tool_calls"] = None
-            debug_print(debug, "Received completion:", message)
-            history.append(message)
-
-            if not message["tool_calls"] or not execute_tools:
-                debug_print(debug, "Ending turn.")
+            if self.is_last_turn(message["tool_calls"], execute_tools, turn.span, debug):
                 break
 
             # convert tool_calls to objects
-            tool_calls = []
-            for tool_call in message["tool_calls"]:
-                function = Function(
-                    arguments=tool_call["function"]["arguments"],
-                    name=tool_call["function"]["name"],
-                )
-                tool_call_object = ChatCompletionMessageToolCall(
-                    id=tool_call["id"], function=function, type=tool_call["type"]
-                )
-                tool_calls.append(tool_call_object)
+            tool_calls = tool_calls_from_dicts(message["tool_calls"])
 
             # handle function calls, updating context_variables, and switching agents
-            partial_response = self.handle_tool_calls(
-                tool_calls, active_agent.functions, context_variables, debug
+            run_tools = functools.partial(
+                self.handle_tool_calls,
+                tool_calls,
+                run.agent.functions,
+                run.context_variables,
+                debug,
+                parallel=run.agent.parallel_tool_calls,
+                span=turn.span,
+                pending=turn.pending,
+                output=turn.output,
             )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
-
-        yield {
-            "response": Response(
-                messages=history[init_len:],
-                agent=active_agent,
-                context_variables=context_variables,
-            )
-        }
+            if events is not None:
+                partial_response = yield from self.stream_tool_output(events, run_tools)
+            else:
+                partial_response = run_tools()
+            self.apply_tool_results(run, partial_response, tool_calls, turn.span)
+
+        yield {"response": self.finish_run(run)}
 
     def run(
         self,
@@ -239,6 +712,19 @@ class Swarm:
         max_turns: int = float("inf"),
         execute_tools: bool = True,
     ) -> Response:
+        """
+        Runs `agent` on `messages` until it replies without tool calls (or
+        `max_turns`), following handoffs. With `stream`, returns a generator
+        of deltas ending with `{"response": Response}`.
+
+        `messages` and `context_variables` are copied shallowly, not deeply:
+        the caller's list and dict are never changed, and updates from
+        `Result.context_variables` replace top-level keys of the copy. The
+        messages and the context values themselves are shared with the
+        caller, though, so a tool that mutates a nested value in place (e.g.
+        `context_variables["active_tasks"][id] = ...`) changes the caller's
+        object. Tools should return changes in `Result.context_variables`.
+        """
         if stream:
             return self.run_and_stream(
                 agent=agent,
@@ -249,44 +735,35 @@ class Swarm:
                 max_turns=max_turns,
                 execute_tools=execute_tools,
             )
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
+        run = self.start_run(agent, messages, context_variables, max_turns, stream=False)
 
-        while len(history) - init_len < max_turns and active_agent:
+        while run.more_turns():
+            turn_span = self.start_turn(run)
 
             # get completion with current history, agent
             completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
-                context_variables=context_variables,
+                agent=run.agent,
+                history=run.history,
+                context_variables=run.context_variables,
                 model_override=model_override,
-                stream=stream,
+                stream=False,
                 debug=debug,
+                span=turn_span,
             )
-            message = completion.choices[0].message
-            debug_print(debug, "Received completion:", message)
-            message.sender = active_agent.name
-            history.append(
-                json.loads(message.model_dump_json())
-            )  # to avoid OpenAI types (?)
-
-            if not message.tool_calls or not execute_tools:
-                debug_print(debug, "Ending turn.")
+            message = self.add_completion(run, completion, debug)
+
+            if self.is_last_turn(message.tool_calls, execute_tools, turn_span, debug):
                 break
 
             # handle function calls, updating context_variables, and switching agents
             partial_response = self.handle_tool_calls(
-                message.tool_calls, active_agent.functions, context_variables, debug
+                message.tool_calls,
+                run.agent.functions,
+                run.context_variables,
+                debug,
+                parallel=run.agent.parallel_tool_calls,
+                span=turn_span,
             )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
+            self.apply_tool_results(run, partial_response, message.tool_calls, turn_span)
 
-        return Response(
-            messages=history[init_len:],
-            agent=active_agent,
-            context_variables=context_variables,
-        )
+        return self.finish_run(run)
@@ -0,0 +1,128 @@
+# Standard library imports
+import sys
+from collections.abc import Mapping
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+def _tool_call_dict(tool_call) -> dict:
+    """An SDK `ChatCompletionMessageToolCall` as the dict the API takes."""
+    if isinstance(tool_call, dict):
+        return tool_call
+    return {
+        "id": tool_call.id,
+        "type": tool_call.type,
+        "function": {
+            "name": tool_call.function.name,
+            "arguments": tool_call.function.arguments,
+        },
+    }
+
+
+class Message(Mapping):
+    """
+    A chat message as kept in history.
+
+    Reads like a read-only dict of the message (`m["content"]`,
+    `m.get("tool_calls")`, `dict(m)`), so code written against the dict
+    messages keeps working, but the fields live in slots. Role and sender
+    are interned, so the copies of a role or agent name across a long
+    history are one string. Tool calls from a completion are kept as the SDK
+    objects and converted to dicts the first time they are read.
+
+    `wire()` is the message as sent to the API, without the internal
+    `sender`, `tool_name` and `transfer` fields; it is built once, when the
+    message is first sent.
+    """
+
+    __slots__ = (
+        "role", "content", "sender", "tool_call_id", "tool_name", "transfer",
+        "_tool_calls", "_wire",
+    )
+
+    def __init__(
+        self,
+        role: str,
+        content: Optional[str] = None,
+        sender: Optional[str] = None,
+        tool_calls: Optional[list] = None,
+        tool_call_id: Optional[str] = None,
+        tool_name: Optional[str] = None,
+        transfer: bool = False,
+    ):
+        self.role = sys.intern(role)
+        self.content = content
+        self.sender = sys.intern(sender) if sender is not None else None
+        self.tool_call_id = tool_call_id
+        self.tool_name = sys.intern(tool_name) if tool_name is not None else None
+        self.transfer = transfer
+        self._tool_calls = tool_calls or None
+        self._wire = None
+
+    @classmethod
+    def from_completion(cls, message, sender: str) -> "Message":
+        """From an SDK `ChatCompletionMessage`, without a JSON round trip."""
+        return cls("assistant", message.content, sender, message.tool_calls)
+
+    @classmethod
+    def from_dict(cls, message: dict) -> "Message":
+        return cls(
+            message["role"],
+            message.get("content"),
+            message.get("sender"),
+            message.get("tool_calls"),
+            message.get("tool_call_id"),
+            message.get("tool_name"),
+            bool(message.get("transfer")),
+        )
+
+    @property
+    def tool_calls(self) -> Optional[List[dict]]:
+        tool_calls = self._tool_calls
+        if tool_calls and not isinstance(tool_calls[0], dict):
+            tool_calls = self._tool_calls = [_tool_call_dict(t) for t in tool_calls]
+        return tool_calls
+
+    def _keys(self) -> Tuple[str, ...]:
+        if self.role == "assistant":
+            return ("role", "content", "sender", "tool_calls")
+        if self.role == "tool":
+            keys = ("role", "tool_call_id", "tool_name", "content")
+            return keys + ("transfer",) if self.transfer else keys
+        return ("role", "content", "sender") if self.sender is not None else ("role", "content")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._keys():
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return f"Message({dict(self)!r})"
+
+    def to_dict(self) -> dict:
+        return dict(self)
+
+    def wire(self) -> dict:
+        if self._wire is None:
+            wire = {"role": self.role, "content": self.content}
+            if self.tool_calls:
+                wire["tool_calls"] = self.tool_calls
+            if self.tool_call_id is not None:
+                wire["tool_call_id"] = self.tool_call_id
+            self._wire = wire
+        return self._wire
+
+
+def to_wire(message):
+    """`message` as sent to the API; plain dicts are sent as they are."""
+    return message.wire() if type(message) is Message else message
+
+
+def to_dict(message):
+    """`message` as a plain, JSON-safe dict; plain dicts are returned as they are."""
+    return message.to_dict() if type(message) is Message else message
@@ -26,6 +26,9 @@ def process_and_print_streaming_response(response):
                     continue
                 print(f"\033[94m{last_sender}: \033[95m{name}\033[0m()")
 
+        if chunk.get("tool_output"):
+            print(f"\033[90m{chunk['tool_output']}\033[0m", end="", flush=True)
+
         if "delim" in chunk and chunk["delim"] == "end" and content:
             print()  # End of response message
             content = ""
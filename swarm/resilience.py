@@ -0,0 +1,360 @@
+# Standard library imports
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+# 408 request timeout, 409 conflict, 429 rate limited and server errors
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+_NOTHING = object()
+
+
+class FirstTokenTimeout(TimeoutError):
+    """No chunk of a streamed completion arrived within the first-token deadline."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (FirstTokenTimeout, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # openai is imported on first use, see swarm_types
+    import openai
+
+    return isinstance(error, openai.APIConnectionError)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked to wait in a Retry-After header, if any."""
+    response = getattr(error, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _close(stream) -> None:
+    close = getattr(stream, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def _resume(first, stream):
+    """`stream` with its already-read first chunk put back in front."""
+    if first is not _NOTHING:
+        yield first
+    yield from stream
+
+
+async def _aresume(first, stream):
+    if first is not _NOTHING:
+        yield first
+    async for chunk in stream:
+        yield chunk
+
+
+class _Resilience:
+    """Policy and metrics shared by the sync and async clients."""
+
+    def __init__(
+        self,
+        client,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        first_token_timeout: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        window: int = 256,
+        retryable: Callable[[BaseException], bool] = is_retryable,
+    ):
+        self.client = client
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.first_token_timeout = first_token_timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.retryable = retryable
+        # time to first chunk (time to the reply when not streaming) of
+        # recent successful requests, for the hedging threshold
+        self.latencies: deque = deque(maxlen=window)
+        self.chat = SimpleNamespace(completions=self)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.first_token_timeouts = 0
+        self.failures = 0
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Full jitter: uniform up to base * 2**attempt, or the server's Retry-After."""
+        requested = retry_after(error)
+        if requested is not None:
+            return min(requested, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait for a request before sending a second one; None when not hedging."""
+        if self.hedge_percentile is None or len(self.latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(self.hedge_percentile * len(ordered)))]
+
+    def _should_retry(self, attempt: int, error: BaseException) -> bool:
+        if attempt < self.max_retries and self.retryable(error):
+            self._count("retries")
+            return True
+        self._count("failures")
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction):
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "first_token_timeouts": self.first_token_timeouts,
+            "failures": self.failures,
+            "latency_p50": percentile(0.5),
+            "latency_p99": percentile(0.99),
+            "hedge_delay": self.hedge_delay(),
+        }
+
+
+class _Attempt:
+    """One request, run on its own thread up to its first chunk."""
+
+    def __init__(self, create: Callable, params: dict):
+        self.future: Future = Future()
+        self.started = time.monotonic()
+        self.cancelled = False
+        self.stream = None
+        self._lock = threading.Lock()
+        threading.Thread(
+            target=self._run, args=(create, params), name="swarm-request", daemon=True
+        ).start()
+
+    def _run(self, create, params) -> None:
+        try:
+            result = create(**params)
+            if params.get("stream"):
+                with self._lock:
+                    self.stream = result
+                    if self.cancelled:
+                        _close(result)
+                        return
+                iterator = iter(result)
+                result = (next(iterator, _NOTHING), iterator)
+            self.future.set_result(result)
+        except BaseException as error:
+            if not self.cancelled:
+                self.future.set_exception(error)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            stream = self.stream
+        if stream is not None:
+            # stops the read on the loser's connection
+            _close(stream)
+
+
+class ResilientClient(_Resilience):
+    """
+    Wraps an OpenAI client with retries, a first-token deadline and hedging.
+
+    It has the client's `chat.completions.create(**params)`, so it can be
+    passed as `Swarm(client=...)`. Requests that fail with a retryable error
+    (connection errors, 408/409/429/5xx) are retried up to `max_retries`
+    times after a full-jitter exponential backoff, or after the server's
+    Retry-After. A stream whose first chunk hasn't arrived within
+    `first_token_timeout` seconds is abandoned and retried.
+
+    With `hedge_percentile` (e.g. 0.95), a request still waiting for its
+    first chunk after that percentile of recent first-chunk latencies gets a
+    second, identical request; whichever answers first is used and the other
+    is closed. Hedging starts once `hedge_min_samples` latencies are known.
+
+    Turn off the wrapped client's own retries (`OpenAI(max_retries=0)`) so
+    the two don't multiply.
+    """
+
+    def create(self, **params):
+        attempt = 0
+        while True:
+            try:
+                return self._hedged(params)
+            except Exception as error:
+                if not self._should_retry(attempt, error):
+                    raise
+                time.sleep(self.backoff(attempt, error))
+                attempt += 1
+
+    def _start(self, params: dict) -> _Attempt:
+        self._count("requests")
+        return _Attempt(self.client.chat.completions.create, params)
+
+    def _hedged(self, params: dict):
+        deadline = None
+        if params.get("stream") and self.first_token_timeout is not None:
+            deadline = time.monotonic() + self.first_token_timeout
+        attempts: List[_Attempt] = [self._start(params)]
+        hedge_at = self.hedge_delay()
+        if hedge_at is not None:
+            hedge_at += attempts[0].started
+        winner = None
+
+        try:
+            while True:
+                timeouts = [t - time.monotonic() for t in (deadline, hedge_at) if t is not None]
+                wait(
+                    [attempt.future for attempt in attempts if not attempt.future.done()],
+                    timeout=max(0.0, min(timeouts)) if timeouts else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                finished = [attempt for attempt in attempts if attempt.future.done()]
+                # the first success, or the last failure once nothing is left running
+                for attempt in finished:
+                    if attempt.future.exception() is None or len(finished) == len(attempts):
+                        winner = attempt
+                        return self._finish(attempt, attempts[0], params)
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._count("first_token_timeouts")
+                    raise FirstTokenTimeout(
+                        f"no chunk within {self.first_token_timeout:g}s of the request")
+                if hedge_at is not None and time.monotonic() >= hedge_at:
+                    self._count("hedges")
+                    attempts.append(self._start(params))
+                    hedge_at = None
+        finally:
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancel()
+
+    def _finish(self, attempt: _Attempt, primary: _Attempt, params: dict):
+        result = attempt.future.result()  # raises the error of a failed request
+        self.latencies.append(time.monotonic() - attempt.started)
+        if attempt is not primary:
+            self._count("hedge_wins")
+        if params.get("stream"):
+            first, iterator = result
+            return _resume(first, iterator)
+        return result
+
+
+class AsyncResilientClient(_Resilience):
+    """`ResilientClient` for an `AsyncOpenAI` client; losing requests are cancelled."""
+
+    async def create(self, **params):
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(params)
+            except Exception as error:
+                if not self._should_retry(attempt, error):
+                    raise
+                await asyncio.sleep(self.backoff(attempt, error))
+                attempt += 1
+
+    async def _request(self, params: dict):
+        self._count("requests")
+        result = await self.client.chat.completions.create(**params)
+        if not params.get("stream"):
+            return result
+        try:
+            iterator = result.__aiter__()
+            try:
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                first = _NOTHING
+        except BaseException:
+            await _aclose(result)
+            raise
+        return first, iterator, result
+
+    async def _hedged(self, params: dict):
+        loop = asyncio.get_running_loop()
+        deadline = None
+        if params.get("stream") and self.first_token_timeout is not None:
+            deadline = loop.time() + self.first_token_timeout
+        started = {}
+        tasks: List[asyncio.Task] = []
+
+        def start():
+            task = asyncio.ensure_future(self._request(params))
+            started[task] = loop.time()
+            tasks.append(task)
+
+        start()
+        primary = tasks[0]
+        hedge_at = self.hedge_delay()
+        if hedge_at is not None:
+            hedge_at += started[primary]
+
+        try:
+            while True:
+                timeouts = [t - loop.time() for t in (deadline, hedge_at) if t is not None]
+                await asyncio.wait(
+                    [task for task in tasks if not task.done()],
+                    timeout=max(0.0, min(timeouts)) if timeouts else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                finished = [task for task in tasks if task.done()]
+                # the first success, or the last failure once nothing is left running
+                for task in finished:
+                    if task.exception() is None or len(finished) == len(tasks):
+                        tasks.remove(task)
+                        result = task.result()  # raises the error of a failed request
+                        self.latencies.append(loop.time() - started[task])
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        if params.get("stream"):
+                            first, iterator, _ = result
+                            return _aresume(first, iterator)
+                        return result
+                if deadline is not None and loop.time() >= deadline:
+                    self._count("first_token_timeouts")
+                    raise FirstTokenTimeout(
+                        f"no chunk within {self.first_token_timeout:g}s of the request")
+                if hedge_at is not None and loop.time() >= hedge_at:
+                    self._count("hedges")
+                    start()
+                    hedge_at = None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None and params.get("stream"):
+                    await _aclose(task.result()[2])
+
+
+async def _aclose(stream) -> None:
+    close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+    if close is not None:
+        try:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            pass
@@ -0,0 +1,159 @@
+# Standard library imports
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class RouteDecision(NamedTuple):
+    route: str
+    confidence: float
+
+
+@dataclass
+class RouterStats:
+    requests: int = 0
+    hits: int = 0
+    route_seconds: float = 0.0
+
+    @property
+    def fallbacks(self) -> int:
+        return self.requests - self.hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    def saved_seconds(self, orchestrator_seconds: float) -> float:
+        """Latency saved if each skipped orchestrator hop takes `orchestrator_seconds`."""
+        return self.hits * orchestrator_seconds - self.route_seconds
+
+
+class Router:
+    """
+    Local pre-router consulted before the orchestrator LLM.
+
+    `classify` returns a route name with a confidence, or None. `route` applies
+    the confidence threshold and keeps hit statistics; a None result means the
+    message should go to the orchestrator as usual.
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        self.stats = RouterStats()
+
+    def classify(self, message: str) -> Optional[RouteDecision]:
+        return None
+
+    def route(self, message: str) -> Optional[RouteDecision]:
+        start = time.perf_counter()
+        decision = self.classify(message)
+        self.stats.route_seconds += time.perf_counter() - start
+        self.stats.requests += 1
+        if decision is None or decision.confidence < self.threshold:
+            return None
+        self.stats.hits += 1
+        return decision
+
+
+# (pattern, weight) per route; patterns are matched case-insensitively
+DEFAULT_RULES: Dict[str, List[Tuple[str, float]]] = {
+    "search": [
+        (r"^(please\s+)?(search|google|look\s*up)\b", 3.0),
+        (r"\bsearch (the web|online|for)\b", 2.0),
+        (r"\b(latest|current|today'?s|recent) (news|price|release|version|weather|score)", 2.0),
+        (r"\bweather (in|for|today)\b", 2.0),
+        (r"\bfind (me )?(websites?|articles?|information|info) (about|on)\b", 2.0),
+    ],
+    "terminal": [
+        (r"^(please\s+)?run\b", 2.0),
+        (r"`[^`]+`", 1.0),
+        (r"\b(in|from|using) (the )?(terminal|shell|command line)\b", 3.0),
+        (r"^(list|show) (the )?(files|folders|directories|processes)\b", 3.0),
+        (r"\b(disk (usage|space)|running processes)\b", 2.0),
+        (r"^(ls|cd|pwd|mkdir|rm|cp|mv|cat|grep|find|du|df|ps|top|kill|git|pip|brew|npm|python3?)\s", 3.0),
+        (r"\b(pip|brew|npm) install\b", 2.0),
+    ],
+    "applescript": [
+        (r"\bapplescript\b", 3.0),
+        (r"^(please\s+)?(open|launch|quit|close) (the )?(app|application|safari|finder|mail|music|notes|calendar|messages|spotify|chrome)\b", 3.0),
+        (r"\b(set|turn (up|down)|mute|unmute) (the )?(system )?volume\b", 3.0),
+        (r"\b(show|display|send) (a )?(notification|dialog)\b", 3.0),
+        (r"\b(dark mode|screen brightness|empty (the )?trash)\b", 2.0),
+    ],
+    "instructor": [
+        (r"^(please\s+)?(explain|describe|summari[sz]e|compare)\b", 3.0),
+        (r"^(what|why|how)( is| are| does| do| should| would| can)\b", 2.0),
+        (r"\b(difference between|best practices?|pros and cons)\b", 2.0),
+        (r"^(hi|hello|hey|thanks|thank you)\b", 3.0),
+        (r"\b(review|refactor|debug) (my|this) (code|function|class)\b", 2.0),
+    ],
+}
+
+
+# a route with guards is only scored when one of them matches. The terminal
+# rules key off words like "find", "top" or "run" that start plenty of
+# questions, so it also needs the message to look like a command line
+COMMAND_SHAPE = [
+    r"`[^`]+`",                                   # backticks
+    r"(^|\s)--?[a-z0-9][\w-]*(\s|$)",              # flags: -la, --version, -5
+    r"(^|\s)(~|\.{1,2})?/[\w.~-]",                 # paths: ~/x, ./x, /etc
+    r"\.(py|sh|md|txt|json|ya?ml|toml|cfg|ini|log|csv|js|ts)\b",  # file names
+    r"\S\s*(\||&&|>>?|<)\s*\S",                    # pipes, chaining, redirects
+    r"^(please\s+)?(run\s+)?(git|pip3?|npm|brew|cargo|docker)\s+"
+    r"(status|log|diff|add|commit|push|pull|clone|checkout|branch|install|uninstall|list|update|upgrade|build|ps)\b",
+    r"^(ls|pwd|df|du|ps|whoami|uptime)$",
+    r"^(mkdir|rmdir|touch|rm|cd|cat|ls)\s+[\w.~/-]+$",
+]
+
+DEFAULT_GUARDS: Dict[str, List[str]] = {
+    "terminal": COMMAND_SHAPE,
+}
+
+class KeywordRouter(Router):
+    """
+    Rule-based router over weighted regular expressions.
+
+    Each route scores the sum of the weights of its matching rules, or 0 when
+    it has `guards` and none of them match. A message is routed only when the
+    best route scores at least `min_score` and has at least `threshold` of
+    the total score, so messages matching several routes or only weak rules
+    fall back to the orchestrator.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[Dict[str, List[Tuple[str, float]]]] = None,
+        threshold: float = 0.8,
+        min_score: float = 3.0,
+        guards: Optional[Dict[str, List[str]]] = None,
+    ):
+        super().__init__(threshold)
+        self.min_score = min_score
+        self.rules = {
+            route: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in patterns]
+            for route, patterns in (rules or DEFAULT_RULES).items()
+        }
+        self.guards = {
+            route: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+            for route, patterns in (DEFAULT_GUARDS if guards is None else guards).items()
+        }
+
+    def scores(self, message: str) -> Dict[str, float]:
+        text = message.strip()
+        scores = {}
+        for route, patterns in self.rules.items():
+            guards = self.guards.get(route)
+            if guards and not any(guard.search(text) for guard in guards):
+                scores[route] = 0.0
+                continue
+            scores[route] = sum(weight for pattern, weight in patterns if pattern.search(text))
+        return scores
+
+    def classify(self, message: str) -> Optional[RouteDecision]:
+        scores = self.scores(message)
+        route, best = max(scores.items(), key=lambda item: item[1])
+        total = sum(scores.values())
+        if best < self.min_score:
+            return None
+        return RouteDecision(route, best / total)
@@ -0,0 +1,360 @@
+# Standard library imports
+import asyncio
+import contextlib
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# priority classes, most urgent first
+INTERACTIVE = "interactive"
+DEFAULT = "default"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, DEFAULT, BATCH)
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("swarm_priority", default=None)
+_session: contextvars.ContextVar = contextvars.ContextVar("swarm_session", default=None)
+
+
+@contextlib.contextmanager
+def scheduling(priority: Optional[str] = None, session: Optional[str] = None) -> Iterator[None]:
+    """
+    Model requests made inside the block are queued as `priority` and, for
+    fair queuing, as requests of `session`. Applies to the current thread or
+    asyncio task (and tasks it starts).
+    """
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}, not {priority!r}")
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    if session is not None:
+        tokens.append((_session, _session.set(session)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class TokenBucket:
+    """`per_minute` units a minute, refilled continuously, up to `burst` at once."""
+
+    def __init__(self, per_minute: float, burst: float):
+        self.rate = per_minute / 60.0
+        self.capacity = burst
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken; more than the capacity waits for a full bucket."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        # may go below zero, so a large request or an underestimate delays
+        # the requests after it
+        self.level = min(self.capacity, self.level - amount)
+
+
+class _Waiter:
+    __slots__ = ("cost", "priority", "session", "enqueued", "granted", "wake")
+
+    def __init__(self, cost: int, priority: str, session, wake: Callable[[], None]):
+        self.cost = cost
+        self.priority = priority
+        self.session = session
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.wake = wake
+
+
+class Scheduler:
+    """
+    Client-side rate limiting and ordering of model requests.
+
+    One scheduler is shared by every client in front of the same API key
+    (see `RateLimitedClient`), from any number of threads and event loops.
+    A request goes when both token buckets allow it: `requests_per_minute`,
+    and `tokens_per_minute` charged with an estimate of the request's prompt
+    tokens plus `max_tokens` (or `completion_tokens`). The estimate is
+    corrected with the reported usage when a completion comes back, or when
+    a stream's last chunk reports it (`stream_options.include_usage`).
+    Bursts are capped at `burst_seconds` of the limits, as providers enforce
+    per-minute limits over shorter periods too.
+
+    Waiting requests are served by priority class (`scheduling(priority=)`,
+    else interactive for streams and default otherwise); a class is only
+    served when the classes before it have nothing queued. Within a class,
+    sessions take turns, one request each, so one busy session doesn't hold
+    up the others.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        completion_tokens: int = 512,
+        burst_seconds: float = 1.0,
+        window: int = 1024,
+    ):
+        self.requests = self.tokens = None
+        if requests_per_minute:
+            self.requests = TokenBucket(
+                requests_per_minute, max(1.0, requests_per_minute / 60 * burst_seconds))
+        if tokens_per_minute:
+            self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60 * burst_seconds)
+        self.completion_tokens = completion_tokens
+        # per class: session -> its waiting requests, in turn order
+        self._queues: Dict[str, "OrderedDict[Any, deque]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._depth = dict.fromkeys(PRIORITIES, 0)
+        self._granted = dict.fromkeys(PRIORITIES, 0)
+        # seconds each of the recent requests of a class spent queued
+        self._waits = {p: deque(maxlen=window) for p in PRIORITIES}
+        self._tool_sizes: "OrderedDict[int, tuple]" = OrderedDict()
+        self.estimated_tokens = 0
+        self.reported_tokens = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, params: dict) -> int:
+        """Prompt tokens at ~4 characters a token, plus the completion allowance."""
+        chars = 0
+        messages = params.get("messages") or ()
+        for message in messages:
+            content = message.get("content")
+            if content:
+                chars += len(content) if isinstance(content, str) else len(json.dumps(content))
+            for tool_call in message.get("tool_calls") or ():
+                chars += len(tool_call["function"]["arguments"]) + len(tool_call["function"]["name"])
+        tools = params.get("tools")
+        if tools:
+            chars += self._tools_size(tools)
+        completion = (
+            params.get("max_completion_tokens") or params.get("max_tokens") or self.completion_tokens)
+        return chars // 4 + 4 * len(messages) + completion
+
+    def _tools_size(self, tools: List[dict]) -> int:
+        # agents reuse one compiled tools list, so its size is worked out once
+        with self._lock:
+            cached = self._tool_sizes.get(id(tools))
+            if cached is not None and cached[0] is tools:
+                self._tool_sizes.move_to_end(id(tools))
+                return cached[1]
+        size = len(json.dumps(tools))
+        with self._lock:
+            self._tool_sizes[id(tools)] = (tools, size)
+            if len(self._tool_sizes) > 64:
+                self._tool_sizes.popitem(last=False)
+        return size
+
+    def _waiter(self, params: dict, wake: Callable[[], None]) -> _Waiter:
+        priority = _priority.get() or (INTERACTIVE if params.get("stream") else DEFAULT)
+        return _Waiter(self.estimate(params), priority, _session.get(), wake)
+
+    def _enqueue(self, waiter: _Waiter) -> Optional[float]:
+        with self._lock:
+            queue = self._queues[waiter.priority]
+            if waiter.session not in queue:
+                queue[waiter.session] = deque()
+            queue[waiter.session].append(waiter)
+            self._depth[waiter.priority] += 1
+            return self._dispatch(time.monotonic())
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """
+        Grants queued requests in order while the buckets allow. Returns the
+        seconds until the next one can go, or None when nothing is queued.
+        Call with the lock held.
+        """
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue:
+                session, waiters = next(iter(queue.items()))
+                waiter = waiters[0]
+                delay = max(
+                    self.requests.wait_time(1, now) if self.requests else 0.0,
+                    self.tokens.wait_time(waiter.cost, now) if self.tokens else 0.0,
+                )
+                if delay > 0:
+                    return delay
+                if self.requests:
+                    self.requests.take(1)
+                if self.tokens:
+                    self.tokens.take(waiter.cost)
+                waiters.popleft()
+                # the session goes to the back of the turn order
+                del queue[session]
+                if waiters:
+                    queue[session] = waiters
+                self._depth[priority] -= 1
+                self._granted[priority] += 1
+                self._waits[priority].append(now - waiter.enqueued)
+                self.estimated_tokens += waiter.cost
+                waiter.granted = True
+                waiter.wake()
+        return None
+
+    def _poll(self, waiter: _Waiter) -> Optional[float]:
+        """Dispatches on behalf of a waiter whose wait ran out; returns its next wait."""
+        with self._lock:
+            return None if waiter.granted else self._dispatch(time.monotonic())
+
+    def _cancel(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.granted:
+                return
+            queue = self._queues[waiter.priority]
+            waiters = queue.get(waiter.session)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del queue[waiter.session]
+                self._depth[waiter.priority] -= 1
+
+    def acquire(self, params: dict) -> int:
+        """Blocks until the request may be sent; returns the tokens charged for it."""
+        event = threading.Event()
+        waiter = self._waiter(params, event.set)
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.granted:
+                event.wait(delay)
+                delay = self._poll(waiter)
+        finally:
+            self._cancel(waiter)
+        return waiter.cost
+
+    async def aacquire(self, params: dict) -> int:
+        """`acquire` for asyncio: waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._waiter(params, wake)
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.granted:
+                await asyncio.wait((granted,), timeout=delay)
+                delay = self._poll(waiter)
+        finally:
+            self._cancel(waiter)
+        return waiter.cost
+
+    def settle(self, cost: int, completion) -> None:
+        """Corrects the token bucket with the usage reported for a request charged `cost`."""
+        usage = getattr(completion, "usage", None)
+        if usage is None:
+            return
+        with self._lock:
+            self.reported_tokens += usage.total_tokens
+            if self.tokens:
+                self.tokens.take(usage.total_tokens - cost)
+                self._dispatch(time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {}
+            for priority in PRIORITIES:
+                ordered = sorted(self._waits[priority])
+
+                def percentile(fraction):
+                    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+                stats[priority] = {
+                    "queued": self._depth[priority],
+                    "sessions_waiting": len(self._queues[priority]),
+                    "granted": self._granted[priority],
+                    "wait_p50": percentile(0.5),
+                    "wait_p99": percentile(0.99),
+                    "wait_max": ordered[-1] if ordered else None,
+                }
+            stats["estimated_tokens"] = self.estimated_tokens
+            stats["reported_tokens"] = self.reported_tokens
+            return stats
+
+
+def with_stream_usage(params: dict) -> Tuple[dict, bool]:
+    """
+    `params` asking for the usage at the end of the stream, and whether the
+    caller had not asked for it (so the usage-only chunk isn't theirs to see).
+    """
+    options = params.get("stream_options") or {}
+    if options.get("include_usage"):
+        return params, False
+    return {**params, "stream_options": {**options, "include_usage": True}}, True
+
+
+def settled_stream(stream, scheduler: "Scheduler", cost: int, hide_usage: bool = False):
+    """Yields the chunks of `stream`, settling `cost` with the usage its last chunk reports."""
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            scheduler.settle(cost, chunk)
+            if hide_usage and not chunk.choices:
+                continue
+        yield chunk
+
+
+async def asettled_stream(stream, scheduler: "Scheduler", cost: int, hide_usage: bool = False):
+    """`settled_stream` for an async stream."""
+    async for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            scheduler.settle(cost, chunk)
+            if hide_usage and not chunk.choices:
+                continue
+        yield chunk
+
+
+class RateLimitedClient:
+    """
+    Wraps a chat client so every request first waits its turn in `scheduler`.
+
+    It has the client's `chat.completions.create(**params)`, so it can be
+    passed as `Swarm(client=...)`. Put it in front of a `ResilientClient`,
+    not behind it, so time spent queued here doesn't count against the
+    first-token deadline or the hedging latencies.
+
+    With a token limit, streamed requests ask for their usage
+    (`stream_options.include_usage`) to settle the estimate; the usage-only
+    chunk that adds is passed on only to callers that asked for it too.
+    """
+
+    def __init__(self, client, scheduler: Scheduler):
+        self.client = client
+        self.scheduler = scheduler
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **params):
+        cost = self.scheduler.acquire(params)
+        if not (params.get("stream") and self.scheduler.tokens):
+            result = self.client.chat.completions.create(**params)
+            self.scheduler.settle(cost, result)
+            return result
+        # a stream reports its usage in its last chunk, with include_usage
+        params, hide_usage = with_stream_usage(params)
+        result = self.client.chat.completions.create(**params)
+        return settled_stream(result, self.scheduler, cost, hide_usage)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.client.stats() if hasattr(self.client, "stats") else {}
+        return {**stats, "scheduler": self.scheduler.stats()}
+
+
+class AsyncRateLimitedClient(RateLimitedClient):
+    """`RateLimitedClient` for an async client; may share its scheduler with sync ones."""
+
+    async def create(self, **params):
+        cost = await self.scheduler.aacquire(params)
+        if not (params.get("stream") and self.scheduler.tokens):
+            result = await self.client.chat.completions.create(**params)
+            self.scheduler.settle(cost, result)
+            return result
+        params, hide_usage = with_stream_usage(params)
+        result = await self.client.chat.completions.create(**params)
+        return asettled_stream(result, self.scheduler, cost, hide_usage)
@@ -0,0 +1,489 @@
+# Standard library imports
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+# Local imports
+from .agents.search_store import search_store
+from .completion_cache import READ_WRITE, RECORD, REPLAY, CompletionCache, DiskBackend
+from .controller import AgentController
+from .resilience import ResilientClient
+from .core import Swarm
+from .routing import KeywordRouter, Router
+from .scheduler import INTERACTIVE, RateLimitedClient, Scheduler, scheduling
+from .session_store import SessionStore
+
+
+class Session:
+    __slots__ = ("controller", "lock", "last_used")
+
+    def __init__(self, controller: AgentController):
+        self.controller = controller
+        # one message at a time per conversation
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    @property
+    def session_id(self) -> str:
+        return self.controller.state.session_id
+
+    @property
+    def busy(self) -> bool:
+        return self.lock.locked()
+
+
+class SessionManager:
+    """
+    LRU of per-session controllers.
+
+    `factory(session_id)` builds a controller: a fresh one for None, or one
+    resuming `session_id` from `store`. Controllers should share one `Swarm`
+    (and so one pooled model client). At most `max_sessions` sessions are
+    kept in memory, least recently used first out, and sessions idle for
+    longer than `idle_timeout` seconds are dropped by `evict_idle`. Sessions
+    with a message in progress are never evicted. `on_evict(session)` is
+    called for every dropped session.
+
+    With a `store`, evicted sessions stay on disk and are resumed on their
+    next request, by this process or any other sharing the store.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Optional[str]], AgentController],
+        max_sessions: int = 1024,
+        idle_timeout: float = 1800.0,
+        on_evict: Optional[Callable[[Session], None]] = None,
+        store: Optional[SessionStore] = None,
+    ):
+        self.factory = factory
+        self.store = store
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+        self.resumed = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def create(self) -> Session:
+        session = Session(self.factory(None))
+        with self._lock:
+            self.sessions[session.session_id] = session
+            self.created += 1
+            evicted = self._evict_overflow()
+        self._evicted(evicted)
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+                session.last_used = time.monotonic()
+                return session
+        if not self._stored(session_id):
+            return None
+
+        resumed = Session(self.factory(session_id))
+        with self._lock:
+            session = self.sessions.setdefault(session_id, resumed)
+            if session is resumed:
+                self.resumed += 1
+                evicted = self._evict_overflow()
+            else:
+                evicted = []
+        self._evicted(evicted)
+        return session
+
+    def drop(self, session_id: str) -> bool:
+        """Ends a session, deleting it from the store as well."""
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        stored = self._stored(session_id)
+        if stored:
+            self.store.delete(session_id)
+        if session is not None:
+            self._evicted([session])
+        return session is not None or stored
+
+    def _stored(self, session_id: str) -> bool:
+        if self.store is None:
+            return False
+        try:
+            return self.store.exists(session_id)
+        except ValueError:
+            return False
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drops sessions idle for longer than `idle_timeout`; returns how many."""
+        deadline = (now if now is not None else time.monotonic()) - self.idle_timeout
+        with self._lock:
+            evicted = [
+                session for session in self.sessions.values()
+                if session.last_used < deadline and not session.busy
+            ]
+            for session in evicted:
+                del self.sessions[session.session_id]
+        self._evicted(evicted)
+        return len(evicted)
+
+    def _evict_overflow(self):
+        evicted = []
+        if len(self.sessions) <= self.max_sessions:
+            return evicted
+        # never the session just added, which is the most recently used
+        for session in list(self.sessions.values())[:-1]:
+            if len(self.sessions) <= self.max_sessions:
+                break
+            if not session.busy:
+                del self.sessions[session.session_id]
+                evicted.append(session)
+        return evicted
+
+    def _evicted(self, sessions) -> None:
+        self.evicted += len(sessions)
+        if self.on_evict:
+            for session in sessions:
+                self.on_evict(session)
+
+
+class SessionServer(ThreadingHTTPServer):
+    """
+    HTTP front-end serving many `AgentController` sessions.
+
+        POST   /sessions                  -> 201 {"session_id": ...}
+        POST   /sessions/<id>/messages    {"message": ..., "stream": true}
+        GET    /sessions/<id>             -> controller state
+        DELETE /sessions/<id>
+        GET    /stats
+
+    Streamed replies are Server-Sent Events: one `data: {"content": ...}`
+    event per chunk and a final `event: done` carrying the session state.
+    Each chunk is written as soon as the controller yields it, and the
+    controller is only pulled for the next chunk once the write went through,
+    so a slow reader slows its own conversation instead of buffering output
+    on the server. A reader that stalls for `write_timeout` seconds, or
+    disconnects, ends the run. At most `max_streams` messages are processed
+    at once; further requests get 503 with Retry-After.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        sessions: SessionManager,
+        max_streams: int = 64,
+        write_timeout: float = 30.0,
+        reap_interval: float = 60.0,
+        swarm: Optional[Swarm] = None,
+    ):
+        super().__init__(address, SessionRequestHandler)
+        self.sessions = sessions
+        # only read for the model client's and completion cache's stats
+        self.swarm = swarm
+        self.max_streams = max_streams
+        self.write_timeout = write_timeout
+        self.reap_interval = reap_interval
+        self.active_streams = 0
+        self.rejected = 0
+        self._streams = threading.BoundedSemaphore(max_streams)
+        self._stats_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._reaper = threading.Thread(target=self._reap, name="swarm-session-reaper", daemon=True)
+        self._reaper.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def acquire_stream(self) -> bool:
+        if not self._streams.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            return False
+        with self._stats_lock:
+            self.active_streams += 1
+        return True
+
+    def release_stream(self) -> None:
+        with self._stats_lock:
+            self.active_streams -= 1
+        self._streams.release()
+
+    def stats(self) -> Dict:
+        stats = {
+            "sessions": len(self.sessions),
+            "created": self.sessions.created,
+            "evicted": self.sessions.evicted,
+            "resumed": self.sessions.resumed,
+            "active_streams": self.active_streams,
+            "rejected": self.rejected,
+            # lets load generators compute CPU per session from outside
+            "cpu_seconds": time.process_time(),
+        }
+        if self.swarm is not None:
+            # retries and hedges of a ResilientClient
+            if hasattr(self.swarm.client, "stats"):
+                stats["client"] = self.swarm.client.stats()
+            if self.swarm.completion_cache is not None:
+                stats["completion_cache"] = self.swarm.completion_cache.stats()
+            # prompt tokens and provider prompt cache hits
+            stats["usage"] = self.swarm.usage.stats()
+            if self.swarm.instruction_cache is not None:
+                stats["instruction_cache"] = self.swarm.instruction_cache.stats()
+        return stats
+
+    def _reap(self) -> None:
+        while not self._stopped.wait(self.reap_interval):
+            self.sessions.evict_idle()
+
+    def server_close(self) -> None:
+        self._stopped.set()
+        super().server_close()
+
+
+class SessionRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: SessionServer
+
+    def setup(self):
+        # bounds blocked writes to slow readers as well as idle keep-alive reads
+        self.timeout = self.server.write_timeout
+        super().setup()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts == ["stats"]:
+            return self.send_json(200, self.server.stats())
+        if len(parts) == 2 and parts[0] == "sessions":
+            session = self.server.sessions.get(parts[1])
+            if session is None:
+                return self.send_json(404, {"error": "unknown session"})
+            return self.send_json(200, session.controller.get_state())
+        self.send_json(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "sessions" and self.server.sessions.drop(parts[1]):
+            return self.send_json(200, {"session_id": parts[1]})
+        self.send_json(404, {"error": "unknown session"})
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        try:
+            body = self.read_json()
+        except ValueError:
+            return self.send_json(400, {"error": "invalid JSON body"})
+
+        if parts == ["sessions"]:
+            session = self.server.sessions.create()
+            return self.send_json(201, {"session_id": session.session_id})
+
+        if len(parts) != 3 or parts[0] != "sessions" or parts[2] != "messages":
+            return self.send_json(404, {"error": "not found"})
+        message = body.get("message")
+        if not isinstance(message, str) or not message:
+            return self.send_json(400, {"error": "'message' must be a non-empty string"})
+        session = self.server.sessions.get(parts[1])
+        if session is None:
+            return self.send_json(404, {"error": "unknown session"})
+        if not self.server.acquire_stream():
+            return self.send_json(503, {"error": "server busy"}, {"Retry-After": "1"})
+        try:
+            if not session.lock.acquire(blocking=False):
+                return self.send_json(409, {"error": "session is busy"})
+            reply = None
+            try:
+                # a user is waiting on either: ahead of batch work, and in
+                # turn with the other sessions
+                with scheduling(priority=INTERACTIVE, session=session.session_id):
+                    if body.get("stream", True):
+                        self.stream_reply(session, message)
+                    else:
+                        reply = {
+                            "reply": session.controller.handle_message(message),
+                            "state": session.controller.get_state(),
+                        }
+            finally:
+                session.last_used = time.monotonic()
+                session.lock.release()
+        finally:
+            self.server.release_stream()
+        if reply is not None:
+            self.send_json(200, reply)
+
+    def stream_reply(self, session: Session, message: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        chunks = session.controller.handle_message_stream(message)
+        try:
+            for chunk in chunks:
+                self.write_chunk(f"data: {json.dumps({'content': chunk})}\n\n".encode())
+            state = json.dumps(session.controller.get_state())
+            self.write_chunk(f"event: done\ndata: {state}\n\n".encode())
+            self.write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            # the reader went away or stalled: stop generating for it
+            self.close_connection = True
+        finally:
+            chunks.close()
+
+    def write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError("expected a JSON object")
+        return body
+
+    def send_json(self, status: int, payload: dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def release_session_resources(session: Session) -> None:
+    """Frees what the agents keep per session: stored search results and the shell."""
+    search_store.drop_session(session.session_id)
+    # the terminal agent holds nothing if it was never used; don't import it just to check
+    terminal_agent = sys.modules.get(f"{__package__}.agents.terminal_agent")
+    if terminal_agent is not None:
+        terminal_agent.shell_pool.close(session.session_id)
+
+
+def build_server(
+    address=("127.0.0.1", 8000),
+    swarm: Optional[Swarm] = None,
+    router: Optional[Router] = None,
+    max_sessions: int = 1024,
+    idle_timeout: float = 1800.0,
+    max_streams: int = 64,
+    write_timeout: float = 30.0,
+    store_path: Optional[str] = None,
+) -> SessionServer:
+    """
+    Builds a server whose sessions share one `Swarm` and, if given, one
+    pre-router.
+
+    With `store_path`, conversations are persisted there and survive
+    eviction and restarts.
+    """
+    swarm = swarm or Swarm()
+    store = SessionStore(store_path) if store_path else None
+    sessions = SessionManager(
+        lambda session_id: AgentController(
+            swarm=swarm, router=router, store=store, session_id=session_id),
+        max_sessions=max_sessions,
+        idle_timeout=idle_timeout,
+        on_evict=release_session_resources,
+        store=store,
+    )
+    return SessionServer(
+        address,
+        sessions,
+        max_streams=max_streams,
+        write_timeout=write_timeout,
+        reap_interval=min(60.0, idle_timeout / 2),
+        swarm=swarm,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve AgentController sessions over HTTP/SSE.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-sessions", type=int, default=1024)
+    parser.add_argument("--idle-timeout", type=float, default=1800.0)
+    parser.add_argument("--max-streams", type=int, default=64)
+    parser.add_argument("--write-timeout", type=float, default=30.0)
+    parser.add_argument("--store", help="directory to persist sessions in")
+    parser.add_argument("--completion-cache", help="directory to record model completions in")
+    parser.add_argument(
+        "--cache-mode", choices=(READ_WRITE, RECORD, REPLAY), default=READ_WRITE,
+        help="replay serves recorded completions only and never calls the model")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument(
+        "--first-token-timeout", type=float,
+        help="retry a stream whose first chunk takes longer than this many seconds")
+    parser.add_argument(
+        "--hedge-percentile", type=float,
+        help="send a second request when the first is slower than this percentile, e.g. 0.95")
+    parser.add_argument(
+        "--requests-per-minute", type=float,
+        help="client-side limit on model requests, shared by all sessions")
+    parser.add_argument(
+        "--tokens-per-minute", type=float,
+        help="client-side limit on estimated prompt + completion tokens")
+    parser.add_argument(
+        "--stream-usage", action="store_true",
+        help="ask for token usage at the end of streams, to report prompt cache hits")
+    parser.add_argument(
+        "--pre-router", action="store_true",
+        help="send messages that clearly match one agent straight to it, skipping the orchestrator")
+    args = parser.parse_args()
+
+    from openai import OpenAI
+
+    client = ResilientClient(
+        OpenAI(max_retries=0),
+        max_retries=args.max_retries,
+        first_token_timeout=args.first_token_timeout,
+        hedge_percentile=args.hedge_percentile,
+    )
+    if args.requests_per_minute or args.tokens_per_minute:
+        client = RateLimitedClient(client, Scheduler(args.requests_per_minute, args.tokens_per_minute))
+    cache = None
+    if args.completion_cache:
+        cache = CompletionCache(DiskBackend(args.completion_cache), mode=args.cache_mode)
+    swarm = Swarm(client=client, completion_cache=cache, stream_usage=args.stream_usage)
+    server = build_server(
+        (args.host, args.port),
+        swarm=swarm,
+        router=KeywordRouter() if args.pre_router else None,
+        max_sessions=args.max_sessions,
+        idle_timeout=args.idle_timeout,
+        max_streams=args.max_streams,
+        write_timeout=args.write_timeout,
+        store_path=args.store,
+    )
+    print(f"Serving on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
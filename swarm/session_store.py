@@ -0,0 +1,201 @@
+# Standard library imports
+import json
+import os
+import re
+import struct
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+# one little-endian uint64 byte offset into the log per message
+OFFSET = struct.Struct("<Q")
+
+SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+def _default(value):
+    # `Message`s are written as the dicts they read as; str keeps other odd
+    # values (datetimes, SDK objects) from failing a turn
+    return dict(value) if isinstance(value, Mapping) else str(value)
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":"), default=_default).encode() + b"\n"
+
+
+class SessionStore:
+    """
+    Durable, append-only store of conversation messages.
+
+    Every session in the `root` directory has three files:
+
+        <id>.jsonl      one compact JSON message per line, only ever appended
+        <id>.idx        the byte offset of each line as a little-endian uint64
+        <id>.snap.json  the latest snapshot of the session's other state
+
+    Appends write the new lines to the log first and their offsets to the
+    index second, so a crash can leave at most unindexed or torn lines at the
+    end of the log. They are reindexed or truncated the first time the
+    session is touched again. Reading the last `n` messages costs one read
+    of the index tail and one read of the log tail, whatever the session
+    length.
+
+    Snapshots are replaced atomically. `snapshot_due` reports whether
+    `snapshot_every` messages were appended since the last one. A session
+    must have at most one writer at a time, in any process.
+    """
+
+    def __init__(self, root: str, snapshot_every: int = 50, fsync: bool = False):
+        self.root = root
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.bytes_written = 0
+        self._snapshot_counts: Dict[str, int] = {}
+        self._recovered = set()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, session_id: str, suffix: str) -> str:
+        if not SESSION_ID.match(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.root, session_id + suffix)
+
+    def exists(self, session_id: str) -> bool:
+        return os.path.exists(self._path(session_id, ".jsonl"))
+
+    def session_ids(self) -> Iterator[str]:
+        for name in os.listdir(self.root):
+            if name.endswith(".jsonl"):
+                yield name[: -len(".jsonl")]
+
+    def count(self, session_id: str) -> int:
+        self._recover(session_id)
+        try:
+            return os.path.getsize(self._path(session_id, ".idx")) // OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, session_id: str, messages: List[dict]) -> int:
+        """Appends messages to the session log; returns the session's message count."""
+        self._recover(session_id)
+        log_path, idx_path = self._path(session_id, ".jsonl"), self._path(session_id, ".idx")
+        if not messages:
+            return self.count(session_id)
+
+        lines = [_encode(message) for message in messages]
+        with open(log_path, "ab") as log:
+            start = log.tell()
+            log.write(b"".join(lines))
+            self._sync(log)
+        offsets = []
+        for line in lines:
+            offsets.append(OFFSET.pack(start))
+            start += len(line)
+        with open(idx_path, "ab") as idx:
+            idx.write(b"".join(offsets))
+            self._sync(idx)
+            count = idx.tell() // OFFSET.size
+        self.bytes_written += sum(map(len, lines)) + OFFSET.size * len(lines)
+        return count
+
+    def read(self, session_id: str, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+        """Messages `start` to `stop` (slice semantics, negative indices allowed)."""
+        count = self.count(session_id)
+        start, stop, _ = slice(start, stop).indices(count)
+        if start >= stop:
+            return []
+        with open(self._path(session_id, ".idx"), "rb") as idx:
+            idx.seek(start * OFFSET.size)
+            first = OFFSET.unpack(idx.read(OFFSET.size))[0]
+            end = None
+            if stop < count:
+                idx.seek(stop * OFFSET.size)
+                end = OFFSET.unpack(idx.read(OFFSET.size))[0]
+        with open(self._path(session_id, ".jsonl"), "rb") as log:
+            log.seek(first)
+            data = log.read() if end is None else log.read(end - first)
+        return [json.loads(line) for line in data.split(b"\n")[: stop - start]]
+
+    def tail(self, session_id: str, n: int) -> List[dict]:
+        """The last `n` messages of a session."""
+        return self.read(session_id, -n) if n > 0 else []
+
+    def snapshot_due(self, session_id: str, count: int) -> bool:
+        last = self._snapshot_counts.get(session_id)
+        if last is None:
+            snapshot = self.load_snapshot(session_id)
+            last = self._snapshot_counts[session_id] = snapshot["messages"] if snapshot else -1
+        return last < 0 or count - last >= self.snapshot_every
+
+    def save_snapshot(self, session_id: str, count: int, data: Dict[str, Any]) -> None:
+        path = self._path(session_id, ".snap.json")
+        body = json.dumps({"messages": count, "state": data}, default=_default).encode()
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+            self._sync(f)
+        os.replace(tmp, path)
+        self.bytes_written += len(body)
+        self._snapshot_counts[session_id] = count
+
+    def load_snapshot(self, session_id: str) -> Optional[dict]:
+        """Returns {"messages": count at snapshot time, "state": data}, or None."""
+        try:
+            with open(self._path(session_id, ".snap.json"), "rb") as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def delete(self, session_id: str) -> None:
+        for suffix in (".jsonl", ".idx", ".snap.json"):
+            try:
+                os.remove(self._path(session_id, suffix))
+            except FileNotFoundError:
+                pass
+        self._snapshot_counts.pop(session_id, None)
+        with self._lock:
+            self._recovered.discard(session_id)
+
+    def _sync(self, f) -> None:
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def _recover(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._recovered:
+                return
+            self._recovered.add(session_id)
+        log_path, idx_path = self._path(session_id, ".jsonl"), self._path(session_id, ".idx")
+        if not os.path.exists(log_path):
+            return
+        with open(log_path, "r+b") as log, open(idx_path, "a+b") as idx:
+            log_size = log.seek(0, os.SEEK_END)
+            count = idx.seek(0, os.SEEK_END) // OFFSET.size
+            idx.truncate(count * OFFSET.size)
+
+            # drop index entries whose line is missing or torn
+            last = 0
+            while count:
+                idx.seek((count - 1) * OFFSET.size)
+                last = OFFSET.unpack(idx.read(OFFSET.size))[0]
+                log.seek(last)
+                if last < log_size and log.readline().endswith(b"\n"):
+                    break
+                count -= 1
+                last = 0
+            idx.truncate(count * OFFSET.size)
+
+            # index complete lines written after the last indexed one
+            log.seek(last)
+            if count:
+                log.readline()
+            offsets, position = [], log.tell()
+            for line in iter(log.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                offsets.append(OFFSET.pack(position))
+                position += len(line)
+            log.truncate(position)
+            idx.seek(0, os.SEEK_END)
+            idx.write(b"".join(offsets))
@@ -1,13 +1,15 @@
-from openai.types.chat import ChatCompletionMessage
-from openai.types.chat.chat_completion_message_tool_call import (
-    ChatCompletionMessageToolCall,
-    Function,
-)
-from typing import List, Callable, Union, Optional
+from typing import TYPE_CHECKING, List, Callable, Union, Optional
 
 # Third-party imports
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessage
+    from openai.types.chat.chat_completion_message_tool_call import (
+        ChatCompletionMessageToolCall,
+        Function,
+    )
+
 AgentFunction = Callable[[], Union[str, "Agent", dict]]
 
 
@@ -34,8 +36,32 @@ class Result(BaseModel):
         value (str): The result value as a string.
         agent (Agent): The agent instance, if applicable.
         context_variables (dict): A dictionary of context variables.
+        transfer (bool): Hand off to `agent` directly. When every tool call of a
+            turn is a transfer, the tool call and its result are not kept in
+            history and the target agent starts from the conversation as it
+            was before the call, plus any text the caller said with it.
     """
 
     value: str = ""
     agent: Optional[Agent] = None
     context_variables: dict = {}
+    transfer: bool = False
+
+
+# Re-exported OpenAI types. Importing openai takes most of the package's
+# import time, so it is deferred until one of them is used.
+_OPENAI_TYPES = {
+    "ChatCompletionMessage": "openai.types.chat",
+    "ChatCompletionMessageToolCall": "openai.types.chat.chat_completion_message_tool_call",
+    "Function": "openai.types.chat.chat_completion_message_tool_call",
+}
+
+
+def __getattr__(name: str):
+    if name in _OPENAI_TYPES:
+        import importlib
+
+        value = getattr(importlib.import_module(_OPENAI_TYPES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,218 @@
+# Standard library imports
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Span:
+    """
+    A timed phase of the run loop.
+
+    The base class is the shared no-op span handed out by the default `Tracer`,
+    so instrumentation points cost a method call when tracing is disabled.
+    """
+
+    __slots__ = ()
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def end(self, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.end(error=repr(exc))
+        else:
+            self.end()
+
+
+NOOP_SPAN = Span()
+
+
+class Tracer:
+    """
+    Instrumentation hooks for `Swarm` and `AsyncSwarm`.
+
+    The loop emits these spans, each with an explicit parent:
+
+        swarm.run            agent, stream / turns, final_agent
+          swarm.turn         agent, turn / tool_calls
+            swarm.build_params   agent, tools
+            swarm.request        model, stream / prompt_tokens, completion_tokens
+            swarm.stream         agent / time_to_first_token (s from turn start), chunks
+            swarm.tool           tool, tool_call_id
+          swarm.handoff      (event) from_agent, to_agent
+
+    This base class records nothing. Subclasses set `enabled = True` and
+    override `start_span` and `event`.
+    """
+
+    enabled = False
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        return NOOP_SPAN
+
+    def event(self, name: str, parent: Optional[Span] = None, **attributes) -> None:
+        pass
+
+
+@dataclass
+class RecordedSpan(Span):
+    name: str
+    parent: Optional["RecordedSpan"]
+    attributes: Dict[str, Any]
+    start: float
+    finish: Optional[float] = None
+    tracer: Optional["RecordingTracer"] = field(default=None, repr=False)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.finish is None else self.finish - self.start
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, **attributes) -> None:
+        if self.finish is not None:
+            return
+        self.attributes.update(attributes)
+        self.finish = time.perf_counter()
+        self.tracer.spans.append(self)
+        if self.tracer.on_end:
+            self.tracer.on_end(self)
+
+
+class RecordingTracer(Tracer):
+    """
+    Keeps finished spans in memory and optionally calls `on_end(span)` for each.
+
+    Events are recorded as zero-length spans.
+    """
+
+    enabled = True
+
+    def __init__(self, on_end: Optional[Callable[[RecordedSpan], None]] = None):
+        self.on_end = on_end
+        self.spans: List[RecordedSpan] = []
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> RecordedSpan:
+        return RecordedSpan(
+            name=name,
+            parent=parent if isinstance(parent, RecordedSpan) else None,
+            attributes=attributes,
+            start=time.perf_counter(),
+            tracer=self,
+        )
+
+    def event(self, name: str, parent: Optional[Span] = None, **attributes) -> None:
+        self.start_span(name, parent, **attributes).end()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns count and total seconds per span name."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            entry = totals.setdefault(span.name, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += span.duration or 0.0
+        return totals
+
+
+class _OpenTelemetrySpan(Span):
+    __slots__ = ("span",)
+
+    def __init__(self, span):
+        self.span = span
+
+    def set(self, **attributes) -> None:
+        self.span.set_attributes(_otel_attributes(attributes))
+
+    def end(self, **attributes) -> None:
+        if attributes:
+            self.set(**attributes)
+        self.span.end()
+
+
+def _otel_attributes(attributes: dict) -> dict:
+    # OpenTelemetry rejects None values
+    return {f"swarm.{k}": v for k, v in attributes.items() if v is not None}
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Exports the run loop spans through OpenTelemetry.
+
+    Requires the `opentelemetry-api` package; uses the global tracer provider
+    unless an OpenTelemetry tracer is given.
+    """
+
+    enabled = True
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("swarm")
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        context = None
+        if isinstance(parent, _OpenTelemetrySpan):
+            context = self._trace.set_span_in_context(parent.span)
+        return _OpenTelemetrySpan(
+            self.tracer.start_span(name, context=context, attributes=_otel_attributes(attributes))
+        )
+
+    def event(self, name: str, parent: Optional[Span] = None, **attributes) -> None:
+        if isinstance(parent, _OpenTelemetrySpan):
+            parent.span.add_event(name, _otel_attributes(attributes))
+
+
+def cached_tokens(usage) -> int:
+    """Prompt tokens the provider served from its prompt cache, 0 if not reported."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
+
+
+def usage_attributes(usage) -> dict:
+    """Token counts from a completion's `usage`, if the API reported one."""
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": cached_tokens(usage),
+    }
+
+
+class UsageStats:
+    """Running token totals of the completions the API reported usage for."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, usage) -> None:
+        if usage is None:
+            return
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+            self.cached_tokens += cached_tokens(usage)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            # share of prompt tokens that were prompt cache hits
+            "cache_hit_rate": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+        }
@@ -1,5 +1,17 @@
+import functools
 import inspect
+import json
+import threading
+from collections import OrderedDict, defaultdict
 from datetime import datetime
+from typing import Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Tuple
+
+from .message import Message
+
+__CTX_VARS_NAME__ = "context_variables"
+# agent functions taking this parameter get a `write(text, stream="stdout")`
+# callable that streams progress output while the tool runs
+__OUTPUT_NAME__ = "stream_output"
 
 
 def debug_print(debug: bool, *args: str) -> None:
@@ -10,22 +22,129 @@ def debug_print(debug: bool, *args: str) -> None:
     print(f"\033[97m[\033[90m{timestamp}\033[97m]\033[90m {message}\033[0m")
 
 
-def merge_fields(target, source):
-    for key, value in source.items():
-        if isinstance(value, str):
-            target[key] += value
-        elif value is not None and isinstance(value, dict):
-            merge_fields(target[key], value)
+def delta_to_dict(delta) -> dict:
+    """Converts a streamed `ChoiceDelta` into the plain dict yielded to callers."""
+    tool_calls = delta.tool_calls
+    if tool_calls is not None:
+        tool_calls = [
+            {
+                "index": tool_call.index,
+                "id": tool_call.id,
+                "type": tool_call.type,
+                "function": {
+                    "name": tool_call.function.name if tool_call.function else None,
+                    "arguments": tool_call.function.arguments if tool_call.function else None,
+                },
+            }
+            for tool_call in tool_calls
+        ]
+    return {
+        "content": delta.content,
+        "function_call": None,
+        "refusal": getattr(delta, "refusal", None),
+        "role": delta.role,
+        "tool_calls": tool_calls,
+    }
+
 
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+class StreamAccumulator:
+    """
+    Assembles an assistant message from streamed deltas in linear time.
+
+    Content and tool call fields are appended to per-field buffers and joined
+    once in `message()`, instead of growing strings with `+=` on every chunk.
+
+    With `detect_tool_calls`, it also notices when a tool call is complete
+    before the stream ends: either the next tool call has started, or its
+    arguments have closed into valid JSON. `pop_ready()` returns those calls;
+    with `in_order`, only once every call before them has been returned, so
+    they come out in the order of the message's tool calls.
+    """
+
+    def __init__(self, sender: str, detect_tool_calls: bool = False, in_order: bool = False):
+        self.sender = sender
+        self.content = []
+        self.tool_calls = {}
+        self.detect_tool_calls = detect_tool_calls
+        self.in_order = in_order
+        self._ready = []
+        self._completed = set()
+        # calls returned so far by pop_ready with in_order
+        self._released = 0
+
+    def _complete(self, index) -> None:
+        if index not in self._completed:
+            self._completed.add(index)
+            self._ready.append(index)
+
+    def add(self, delta) -> None:
+        if delta.content:
+            self.content.append(delta.content)
+        for tool_call in delta.tool_calls or ():
+            buffers = self.tool_calls.get(tool_call.index)
+            if buffers is None:
+                if self.detect_tool_calls:
+                    # a new call starting means the earlier ones are complete
+                    for index in self.tool_calls:
+                        self._complete(index)
+                buffers = self.tool_calls[tool_call.index] = {
+                    "id": [], "type": [], "name": [], "arguments": []
+                }
+            if tool_call.id:
+                buffers["id"].append(tool_call.id)
+            if tool_call.type:
+                buffers["type"].append(tool_call.type)
+            function = tool_call.function
+            if function is not None:
+                if function.name:
+                    buffers["name"].append(function.name)
+                if function.arguments:
+                    buffers["arguments"].append(function.arguments)
+                    # only try to parse when the arguments could have just closed
+                    if (
+                        self.detect_tool_calls
+                        and tool_call.index not in self._completed
+                        and function.arguments.rstrip().endswith("}")
+                        and _is_json("".join(buffers["arguments"]))
+                    ):
+                        self._complete(tool_call.index)
+
+    def tool_call(self, index) -> dict:
+        buffers = self.tool_calls[index]
+        return {
+            "function": {
+                "arguments": "".join(buffers["arguments"]),
+                "name": "".join(buffers["name"]),
+            },
+            "id": "".join(buffers["id"]),
+            "type": "".join(buffers["type"]),
+        }
 
-def merge_chunk(final_response: dict, delta: dict) -> None:
-    delta.pop("role", None)
-    merge_fields(final_response, delta)
+    def pop_ready(self) -> List[dict]:
+        """Returns the tool calls completed since the last call, in stream order."""
+        if not self._ready:
+            return []
+        ready, self._ready = self._ready, []
+        if self.in_order:
+            ready = []
+            for index in list(self.tool_calls)[self._released:]:
+                if index not in self._completed:
+                    break
+                ready.append(index)
+            self._released += len(ready)
+        return [self.tool_call(index) for index in ready]
 
-    tool_calls = delta.get("tool_calls")
-    if tool_calls and len(tool_calls) > 0:
-        index = tool_calls[0].pop("index")
-        merge_fields(final_response["tool_calls"][index], tool_calls[0])
+    def message(self) -> Message:
+        tool_calls = [self.tool_call(index) for index in self.tool_calls]
+        return Message("assistant", "".join(self.content), self.sender, tool_calls)
 
 
 def function_to_json(func) -> dict:
@@ -85,3 +204,189 @@ def function_to_json(func) -> dict:
             },
         },
     }
+
+
+class CompiledTools(NamedTuple):
+    """Model-facing tool schemas and dispatch table for a set of agent functions."""
+
+    tools: List[dict]
+    function_map: Dict[str, Callable]
+    context_aware: FrozenSet[str]
+    streaming: FrozenSet[str]
+
+
+def _parameter_names(func: Callable) -> FrozenSet[str]:
+    try:
+        return frozenset(inspect.signature(func).parameters)
+    except (TypeError, ValueError):
+        return frozenset()
+
+
+_cached_parameter_names = functools.lru_cache(maxsize=1024)(_parameter_names)
+
+
+def parameter_names(func: Callable) -> FrozenSet[str]:
+    """The names of the parameters of `func` (not its local variables)."""
+    try:
+        return _cached_parameter_names(func)
+    except TypeError:
+        return _parameter_names(func)
+
+
+def _takes(name: str, functions: Tuple[Callable, ...]) -> FrozenSet[str]:
+    return frozenset(f.__name__ for f in functions if name in parameter_names(f))
+
+
+def _compile_tools(functions: Tuple[Callable, ...]) -> CompiledTools:
+    tools = [function_to_json(f) for f in functions]
+    # hide context_variables and stream_output from model
+    for tool in tools:
+        params = tool["function"]["parameters"]
+        for hidden in (__CTX_VARS_NAME__, __OUTPUT_NAME__):
+            params["properties"].pop(hidden, None)
+            if hidden in params["required"]:
+                params["required"].remove(hidden)
+
+    return CompiledTools(
+        tools=tools,
+        function_map={f.__name__: f for f in functions},
+        context_aware=_takes(__CTX_VARS_NAME__, functions),
+        streaming=_takes(__OUTPUT_NAME__, functions),
+    )
+
+
+_cached_compile_tools = functools.lru_cache(maxsize=256)(_compile_tools)
+
+
+def compile_tools(functions) -> CompiledTools:
+    """
+    Returns the context-stripped tool schemas and function map for `functions`.
+
+    Results are cached on the identities of the functions, so reassigning or
+    mutating `Agent.functions` yields a fresh entry. The returned lists and
+    dicts are shared between callers and must not be mutated.
+    """
+    key = tuple(functions)
+    try:
+        return _cached_compile_tools(key)
+    except TypeError:
+        # unhashable callables can't be cached, build them every time
+        return _compile_tools(key)
+
+
+_MISSING = object()
+
+
+class _RecordingContext(defaultdict):
+    """The context as callable instructions see it, noting which keys they read."""
+
+    def __init__(self, context: Mapping):
+        super().__init__(str, context)
+        self.context = context
+        # key -> the value it had in the context (or _MISSING), in read order
+        self.reads: Dict = {}
+        # set when the instructions looked at the whole mapping
+        self.whole = False
+
+    def _read(self, key) -> None:
+        if key not in self.reads:
+            self.reads[key] = self.context.get(key, _MISSING)
+
+    def __getitem__(self, key):
+        self._read(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self._read(key)
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        self._read(key)
+        return super().__contains__(key)
+
+
+def _reads_all(method):
+    def read_all(self, *args, **kwargs):
+        self.whole = True
+        return method(self, *args, **kwargs)
+
+    return read_all
+
+
+for _name in ("__iter__", "__len__", "__repr__", "__eq__", "__ne__", "__or__",
+              "keys", "values", "items", "copy", "pop", "popitem", "setdefault", "update"):
+    setattr(_RecordingContext, _name, _reads_all(getattr(defaultdict, _name)))
+
+
+class InstructionCache:
+    """
+    Memoizes callable `Agent.instructions` on the context keys they read.
+
+    The first call runs the instructions on a context that records its reads.
+    Later calls whose context has the same values for those keys get the
+    same text back without running the instructions, so the system prompt is
+    byte-identical from turn to turn. Instructions must be pure functions of
+    the context for this to hold: one that reads the clock or a global
+    keeps returning its first text. Results aren't cached when the
+    instructions look at the whole context (iterate it, format it, copy it)
+    or read a value that isn't hashable. At most `maxsize` texts and the key
+    shapes of `maxsize` instructions are kept, least recently used first out.
+    """
+
+    def __init__(self, maxsize: int = 1024, shapes_per_function: int = 8):
+        self.maxsize = maxsize
+        self.shapes_per_function = shapes_per_function
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        # instructions -> the tuples of keys they have been seen to read
+        self._shapes: "OrderedDict[Callable, List[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, instructions: Callable, context: Mapping) -> str:
+        try:
+            hash(instructions)
+        except TypeError:
+            return instructions(defaultdict(str, context))
+        with self._lock:
+            shapes = self._shapes.get(instructions, ())
+            if shapes:
+                self._shapes.move_to_end(instructions)
+            for keys in shapes:
+                key = (instructions, keys, tuple(context.get(k, _MISSING) for k in keys))
+                try:
+                    text = self._entries.get(key)
+                except TypeError:
+                    break
+                if text is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return text
+            self.misses += 1
+
+        recording = _RecordingContext(context)
+        text = instructions(recording)
+        if recording.whole:
+            return text
+        keys, values = tuple(recording.reads), tuple(recording.reads.values())
+        key = (instructions, keys, values)
+        try:
+            hash(key)
+        except TypeError:
+            return text
+        with self._lock:
+            shapes = self._shapes.setdefault(instructions, [])
+            self._shapes.move_to_end(instructions)
+            if keys not in shapes:
+                shapes.insert(0, keys)
+                del shapes[self.shapes_per_function:]
+            while len(self._shapes) > self.maxsize:
+                self._shapes.popitem(last=False)
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return text
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,71 @@
+import asyncio
+
+from benchmarks.fake_client import AsyncFakeOpenAI, FakeOpenAI, ScriptedResponder
+from swarm import Agent, Result, Swarm
+from swarm.async_core import AsyncSwarm
+
+
+def tool_call(call_id: str, name: str, arguments: str) -> dict:
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+
+
+helper = Agent(name="Helper")
+
+
+def lookup(query: str, context_variables: dict):
+    return Result(value=f"found {query}", context_variables={"query": query})
+
+
+def hand_off():
+    return helper
+
+
+SCRIPT = [
+    {"content": "Looking.", "tool_calls": [tool_call("call_1", "lookup", '{"query": "a"}')]},
+    {"content": None, "tool_calls": [tool_call("call_2", "hand_off", "{}")]},
+    {"content": "Done."},
+]
+
+AGENT = Agent(name="Main", functions=[lookup, hand_off])
+
+
+def summary(response):
+    return (
+        [(m["role"], m.get("content"), m.get("sender")) for m in response.messages],
+        response.agent.name,
+        response.context_variables,
+    )
+
+
+def run_sync(stream: bool):
+    swarm = Swarm(client=FakeOpenAI(ScriptedResponder(SCRIPT)))
+    messages = [{"role": "user", "content": "hi"}]
+    if not stream:
+        return swarm.run(AGENT, messages, {"user": "x"})
+    for chunk in swarm.run(AGENT, messages, {"user": "x"}, stream=True):
+        if "response" in chunk:
+            return chunk["response"]
+
+
+async def run_async(stream: bool):
+    swarm = AsyncSwarm(client=AsyncFakeOpenAI(ScriptedResponder(SCRIPT)))
+    messages = [{"role": "user", "content": "hi"}]
+    if not stream:
+        return await swarm.run(AGENT, messages, {"user": "x"})
+    async for chunk in await swarm.run(AGENT, messages, {"user": "x"}, stream=True):
+        if "response" in chunk:
+            return chunk["response"]
+
+
+def test_async_matches_sync():
+    for stream in (False, True):
+        expected = summary(run_sync(stream))
+        assert expected[1] == "Helper"
+        assert expected[2] == {"user": "x", "query": "a"}
+        assert summary(asyncio.run(run_async(stream))) == expected
+
+
+def test_async_swarm_initializes_base():
+    swarm = AsyncSwarm(client=AsyncFakeOpenAI())
+    assert swarm.tool_executor is swarm.tool_executor
+    assert swarm.usage.stats()["requests"] == 0
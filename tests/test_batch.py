@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from benchmarks.fake_client import AsyncFakeOpenAI, FakeOpenAI
+from swarm import Agent, Swarm
+from swarm.async_core import AsyncSwarm
+from swarm.batch import ASYNCIO, THREADS, BatchRunner
+
+
+class AskedResponder:
+    """Answers each question and notes which ones the model was asked."""
+
+    def __init__(self):
+        self.asked = []
+
+    def __call__(self, request: dict) -> dict:
+        question = request["messages"][-1]["content"]
+        self.asked.append(question)
+        return {"content": f"answer to {question}"}
+
+
+def write_input(path, n: int) -> None:
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": f"q{i}", "messages": [{"role": "user", "content": f"q{i}"}]}) + "\n")
+            if i == 3:
+                f.write("\n")
+
+
+def read_output(path) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def runner(mode: str, responder: AskedResponder) -> BatchRunner:
+    if mode == ASYNCIO:
+        swarm = AsyncSwarm(client=AsyncFakeOpenAI(responder))
+    else:
+        swarm = Swarm(client=FakeOpenAI(responder))
+    return BatchRunner(swarm, agent=Agent(), mode=mode, concurrency=3, checkpoint_every=2)
+
+
+@pytest.mark.parametrize("mode", [THREADS, ASYNCIO])
+def test_resume_skips_finished_ids(tmp_path, mode):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_input(input_path, 12)
+
+    first = AskedResponder()
+    stats = runner(mode, first).run(str(input_path), str(output_path), limit=5)
+    assert stats["ran"] == 5 and len(first.asked) == 5
+
+    second = AskedResponder()
+    stats = runner(mode, second).run(str(input_path), str(output_path))
+    assert stats["ran"] == 7
+    assert sorted(first.asked + second.asked) == sorted(f"q{i}" for i in range(12))
+
+    records = read_output(output_path)
+    assert sorted(record["id"] for record in records) == sorted(f"q{i}" for i in range(12))
+    assert all(r["messages"][-1]["content"] == f"answer to {r['id']}" for r in records)
+
+    third = AskedResponder()
+    stats = runner(mode, third).run(str(input_path), str(output_path))
+    assert stats["ran"] == 0 and third.asked == []
+    assert len(read_output(output_path)) == 12
+
+
+def test_resume_without_checkpoint_drops_torn_result(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_input(input_path, 8)
+    runner(THREADS, AskedResponder()).run(str(input_path), str(output_path), limit=4)
+    finished = {record["id"] for record in read_output(output_path)}
+
+    # a crash before the next checkpoint, in the middle of writing a result
+    (tmp_path / "out.jsonl.checkpoint").unlink()
+    with open(output_path, "ab") as f:
+        f.write(b'{"line":7,"id":"q6","agent"')
+
+    resumed = AskedResponder()
+    stats = runner(THREADS, resumed).run(str(input_path), str(output_path))
+    assert set(resumed.asked).isdisjoint(finished)
+    assert stats["ran"] == 4
+    assert sorted(record["id"] for record in read_output(output_path)) == [f"q{i}" for i in range(8)]
@@ -0,0 +1,108 @@
+import threading
+import time
+
+from benchmarks.fake_brave import FakeBraveServer
+from swarm.agents import brave_client
+from swarm.agents.brave_client import BraveSearchClient, SearchCache
+
+
+class StaleMissCache(SearchCache):
+    """Makes `late`'s first lookup a miss that is read before `leader_done` is set."""
+
+    def __init__(self, late: str, leader_done: threading.Event):
+        super().__init__()
+        self.late = late
+        self.leader_done = leader_done
+        self.stale = True
+
+    def get(self, key):
+        if threading.current_thread().name == self.late and self.stale:
+            self.stale = False
+            value = super().get(key)
+            self.leader_done.wait(5)
+            return value
+        return super().get(key)
+
+
+def test_search_after_a_finished_leader_is_served_from_cache():
+    leader_done = threading.Event()
+    with FakeBraveServer() as server:
+        client = BraveSearchClient(base_url=server.base_url, cache=StaleMissCache("late", leader_done))
+        results = []
+        late = threading.Thread(
+            target=lambda: results.append(client.search({"q": "tampa"})), name="late")
+        late.start()
+        results.append(client.search({"q": "tampa"}))
+        leader_done.set()
+        late.join()
+    assert results[0] is results[1]
+    assert client.requests == server.requests == 1
+
+
+def test_repeated_searches_are_served_from_cache():
+    with FakeBraveServer() as server:
+        client = BraveSearchClient(base_url=server.base_url)
+        first = client.search({"q": "Tampa  weather", "count": 5})
+        assert client.search({"q": "tampa weather", "count": "5"}) is first
+        assert len(first["web"]["results"]) == 5
+        client.search({"q": "tampa weather", "count": 10})
+    assert client.requests == server.requests == 2
+
+
+def test_cached_searches_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(brave_client.time, "time", lambda: now[0])
+    with FakeBraveServer() as server:
+        client = BraveSearchClient(base_url=server.base_url, cache=SearchCache(ttl=60))
+        client.search({"q": "tampa"})
+        now[0] += 59
+        client.search({"q": "tampa"})
+        assert server.requests == 1
+        now[0] += 2
+        client.search({"q": "tampa"})
+    assert server.requests == 2
+
+
+def test_cache_evicts_least_recently_used():
+    with FakeBraveServer() as server:
+        client = BraveSearchClient(base_url=server.base_url, cache=SearchCache(maxsize=2))
+        for query in ("a", "b", "a", "c"):
+            client.search({"q": query})
+        assert server.requests == 3
+        client.search({"q": "a"})
+        assert server.requests == 3
+        client.search({"q": "b"})
+    assert server.requests == 4
+    assert len(client.cache.entries) == 2
+
+
+def test_cache_persists_to_sqlite(tmp_path):
+    path = str(tmp_path / "search.db")
+    with FakeBraveServer() as server:
+        first = BraveSearchClient(base_url=server.base_url, cache=SearchCache(path=path))
+        expected = first.search({"q": "tampa"})
+        second = BraveSearchClient(base_url=server.base_url, cache=SearchCache(path=path))
+        assert second.search({"q": "tampa"}) == expected
+    assert second.requests == 0 and server.requests == 1
+
+
+def test_concurrent_identical_searches_share_one_request():
+    with FakeBraveServer(latency=0.2) as server:
+        client = BraveSearchClient(base_url=server.base_url)
+        start = threading.Barrier(8)
+        results = []
+
+        def search():
+            start.wait()
+            results.append(client.search({"q": "tampa"}))
+
+        threads = [threading.Thread(target=search) for _ in range(8)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    assert client.requests == server.requests == 1
+    assert elapsed < 1.0
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_client import FakeOpenAI, ScriptedResponder
+from swarm import Agent, Swarm
+from swarm.completion_cache import (
+    REPLAY, RECORD, CacheMissError, CompletionCache, DiskBackend, MemoryBackend, completion_key,
+)
+
+
+class OfflineOpenAI:
+    """A client that fails the test if the model is called."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **params):
+        raise AssertionError("the model was called in replay mode")
+
+
+def lookup(query: str):
+    return f"found {query}"
+
+
+def run(swarm: Swarm, stream: bool, content: str = "look it up"):
+    response = swarm.run(Agent(functions=[lookup]), [{"role": "user", "content": content}], stream=stream)
+    if not stream:
+        return [], response
+    events = list(response)
+    return events[:-1], events[-1]["response"]
+
+
+def script():
+    return ScriptedResponder([
+        {"content": "Looking.", "tool_calls": [{"id": "call_1", "type": "function",
+                                                "function": {"name": "lookup", "arguments": '{"query": "a"}'}}]},
+        {"content": "It was found."},
+    ])
+
+
+def test_record_then_replay_round_trips(tmp_path):
+    for stream in (False, True):
+        root = str(tmp_path / str(stream))
+        recording = CompletionCache(DiskBackend(root), mode=RECORD)
+        events, recorded = run(Swarm(client=FakeOpenAI(script()), completion_cache=recording), stream)
+        assert recording.stores == 2
+
+        replaying = CompletionCache(DiskBackend(root), mode=REPLAY)
+        replayed_events, replayed = run(Swarm(client=OfflineOpenAI(), completion_cache=replaying), stream)
+        assert replayed_events == events
+        assert replayed.messages == recorded.messages
+        assert replayed.messages[-1]["content"] == "It was found."
+        assert replaying.stats()["hits"] == 2 and replaying.misses == 0
+        if stream:
+            assert len(events) > 4
+
+
+def test_replay_miss_raises_without_calling_the_model(tmp_path):
+    backend = DiskBackend(str(tmp_path))
+    run(Swarm(client=FakeOpenAI(script()), completion_cache=CompletionCache(backend)), False)
+
+    replaying = CompletionCache(backend, mode=REPLAY)
+    for stream in (False, True):
+        with pytest.raises(CacheMissError) as error:
+            run(Swarm(client=OfflineOpenAI(), completion_cache=replaying), stream, "something else")
+        assert error.value.key in str(error.value)
+    assert replaying.misses == 2 and replaying.hits == 0
+
+
+def test_unfinished_stream_is_not_recorded():
+    cache = CompletionCache(MemoryBackend())
+    params = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}], "stream": True}
+    stream, cached = cache.get_or_create(FakeOpenAI(lambda request: {"content": "a long reply"}), params)
+    assert not cached
+    next(stream)
+    stream.close()
+    assert len(cache.backend) == 0
+    stream, _ = cache.get_or_create(FakeOpenAI(lambda request: {"content": "a long reply"}), params)
+    list(stream)
+    assert len(cache.backend) == 1 and cache.get_or_create(OfflineOpenAI(), params)[1]
+
+
+def test_key_ignores_field_order_and_unset_fields():
+    a = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "tools": None, "timeout": 5}
+    b = {"messages": [{"content": "hi", "role": "user"}], "model": "m"}
+    assert completion_key(a) == completion_key(b)
+    assert completion_key(b) != completion_key(dict(b, stream=True))
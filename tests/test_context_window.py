@@ -0,0 +1,84 @@
+from swarm.context_window import ContextWindow, TokenCounter
+
+
+class FlatCounter(TokenCounter):
+    """Every message costs 10 tokens; counts how many were tokenized."""
+
+    def __init__(self):
+        self.encoding = None
+        self.counted = 0
+
+    def count_message(self, message: dict) -> int:
+        self.counted += 1
+        return 10
+
+
+def tool_round(n: int, replies: int) -> list:
+    calls = [{"id": f"call_{n}_{i}", "type": "function",
+              "function": {"name": "lookup", "arguments": "{}"}} for i in range(replies)]
+    return [
+        {"role": "user", "content": f"question {n}"},
+        {"role": "assistant", "content": None, "tool_calls": calls},
+        *({"role": "tool", "tool_call_id": call["id"], "content": "found"} for call in calls),
+        {"role": "assistant", "content": f"answer {n}"},
+    ]
+
+
+def assert_tool_replies_follow_their_call(window: list) -> None:
+    called = set()
+    for message in window:
+        if message["role"] == "tool":
+            assert message["tool_call_id"] in called
+        for call in message.get("tool_calls") or ():
+            called.add(call["id"])
+
+
+def test_select_keeps_tool_calls_with_their_replies():
+    history = []
+    for n in range(12):
+        history.extend(tool_round(n, replies=n % 4))
+    # every budget from tighter than a round to several rounds, and every cut point
+    for max_tokens in range(20, 200, 10):
+        window = ContextWindow(max_tokens=max_tokens, reserve_tokens=0, counter=FlatCounter())
+        for end in range(1, len(history) + 1):
+            selected = window.select(history[:end])
+            assert selected == history[window._start:end]
+            assert 10 * len(selected) <= max_tokens
+            assert_tool_replies_follow_their_call(selected)
+
+
+def test_select_counts_only_new_messages_and_trims_in_steps():
+    counter = FlatCounter()
+    window = ContextWindow(max_tokens=100, reserve_tokens=0, counter=counter, trim_to=0.5)
+    history, starts = [], []
+    for n in range(30):
+        history.append({"role": "user", "content": f"message {n}"})
+        window.select(history)
+        starts.append(window._start)
+    assert counter.counted == 30
+    # the window start holds until the budget is exceeded, then drops to half of it
+    assert starts[:10] == [0] * 10
+    assert starts[10:16] == [6] * 6
+    assert starts[16] == 12
+
+
+def test_select_summarizes_dropped_messages():
+    summarized = []
+
+    def summarizer(previous, dropped):
+        summarized.append([m["content"] for m in dropped])
+        return f"{previous or ''}+{len(dropped)}"
+
+    window = ContextWindow(
+        max_tokens=60, reserve_tokens=0, counter=FlatCounter(), summarizer=summarizer, trim_to=0.5)
+    history = [{"role": "user", "content": str(n)} for n in range(6)]
+    assert window.select(history) == history
+    history.append({"role": "user", "content": "6"})
+    selected = window.select(history)
+    assert selected[0]["role"] == "system" and selected[0]["content"].endswith("+4")
+    assert selected[1:] == history[4:]
+    assert summarized == [["0", "1", "2", "3"]]
+    # appending within the budget neither moves the window nor summarizes again
+    history.append({"role": "user", "content": "7"})
+    assert window.select(history)[1:] == history[4:]
+    assert len(summarized) == 1
@@ -0,0 +1,21 @@
+from benchmarks.fake_client import FakeOpenAI
+from swarm import Swarm
+from swarm.controller import AgentController
+from swarm.message import Message
+from swarm.session_store import SessionStore
+
+
+def test_history_is_json_safe_and_resumes_as_messages(tmp_path):
+    swarm = Swarm(client=FakeOpenAI(lambda request: {"content": "Hi there."}))
+    store = SessionStore(str(tmp_path))
+    controller = AgentController(swarm=swarm, store=store, session_id="s1")
+    assert controller.handle_message("hello")
+    assert all(type(message) is Message for message in controller.state.history)
+    sent = [dict(message) for message in controller.state.history]
+
+    resumed = AgentController(swarm=swarm, store=store, session_id="s1")
+    assert all(type(message) is Message for message in resumed.state.history)
+    assert [dict(message) for message in resumed.state.history] == sent
+    # the internal fields are kept in history but never sent to the model
+    assert resumed.state.history[-1]["sender"] == "OrchestratorAgent"
+    assert "sender" not in resumed.state.history[-1].wire()
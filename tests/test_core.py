@@ -0,0 +1,101 @@
+import json
+from types import SimpleNamespace
+
+from benchmarks.fake_client import FakeOpenAI, ScriptedResponder
+from swarm import Agent, Result, Swarm
+
+
+class NoUsageOpenAI(FakeOpenAI):
+    """Completions without a `usage` attribute, as some compatible clients return."""
+
+    def create(self, **params):
+        completion = super().create(**params)
+        if params.get("stream"):
+            return completion
+        return SimpleNamespace(choices=completion.choices)
+
+
+def test_completion_without_usage():
+    swarm = Swarm(client=NoUsageOpenAI(lambda request: {"content": "hi"}))
+    response = swarm.run(Agent(), [{"role": "user", "content": "hello"}])
+    assert response.messages[-1]["content"] == "hi"
+    assert swarm.usage.stats()["requests"] == 0
+
+
+def test_stream_options_only_when_asked():
+    client = FakeOpenAI(lambda request: {"content": "hi"})
+    list(Swarm(client=client).run(Agent(), [{"role": "user", "content": "hello"}], stream=True))
+    assert "stream_options" not in client.last_request
+    list(Swarm(client=client, stream_usage=True).run(
+        Agent(), [{"role": "user", "content": "hello"}], stream=True))
+    assert client.last_request["stream_options"] == {"include_usage": True}
+
+
+def test_response_messages_are_json_safe():
+    def lookup(query: str):
+        return f"found {query}"
+
+    script = ScriptedResponder([
+        {"tool_calls": [{"id": "call_1", "type": "function",
+                         "function": {"name": "lookup", "arguments": '{"query": "a"}'}}]},
+        {"content": "Done."},
+    ])
+    response = Swarm(client=FakeOpenAI(script)).run(
+        Agent(functions=[lookup]), [{"role": "user", "content": "hi"}])
+    assert json.loads(json.dumps(response.messages)) == response.messages
+    assert [m["role"] for m in response.messages] == ["assistant", "tool", "assistant"]
+    assert json.loads(response.model_dump_json(exclude={"agent"}))["messages"] == response.messages
+
+
+def test_transfer_keeps_streamed_content():
+    helper = Agent(name="Helper")
+
+    def delegate(request: str):
+        return Result(value="Routing you to the helper.", agent=helper, transfer=True)
+
+    script = ScriptedResponder([
+        {"content": "Let me get the helper.", "tool_calls": [{
+            "id": "call_1", "type": "function",
+            "function": {"name": "delegate", "arguments": '{"request": "hi"}'}}]},
+        {"content": "Helper here."},
+    ])
+    agent = Agent(name="Main", functions=[delegate])
+    for stream in (False, True):
+        script.reset()
+        swarm = Swarm(client=FakeOpenAI(script))
+        messages = [{"role": "user", "content": "hi"}]
+        if stream:
+            chunks = list(swarm.run(agent, messages, stream=True))
+            response = chunks[-1]["response"]
+        else:
+            response = swarm.run(agent, messages)
+        assert [(m["role"], m["content"], m.get("sender")) for m in response.messages] == [
+            ("assistant", "Let me get the helper.", "Main"),
+            ("assistant", "Helper here.", "Helper"),
+        ]
+        assert not response.messages[0].get("tool_calls")
+        assert response.agent is helper
+
+
+def test_run_copies_messages_and_context_shallowly():
+    def track(task: str, context_variables: dict):
+        # in place: reaches the caller's object, which is shared, not copied
+        context_variables["active_tasks"][task] = "started"
+        # through the result: replaces the key in the run's copy only
+        return Result(value="tracking", context_variables={"last_task": task, "user": "bob"})
+
+    script = ScriptedResponder([
+        {"tool_calls": [{"id": "call_1", "type": "function",
+                         "function": {"name": "track", "arguments": '{"task": "t1"}'}}]},
+        {"content": "Tracking it."},
+    ])
+    active_tasks = {}
+    context = {"user": "alice", "active_tasks": active_tasks}
+    messages = [{"role": "user", "content": "track t1"}]
+    response = Swarm(client=FakeOpenAI(script)).run(Agent(functions=[track]), messages, context)
+
+    assert context == {"user": "alice", "active_tasks": {"t1": "started"}}
+    assert context["active_tasks"] is active_tasks
+    assert response.context_variables["active_tasks"] is active_tasks
+    assert response.context_variables["user"] == "bob"
+    assert messages == [{"role": "user", "content": "track t1"}]
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletionChunk
+
+from swarm import Agent, Swarm
+from swarm.async_core import AsyncSwarm
+
+
+def chunk(delta: dict) -> ChatCompletionChunk:
+    return ChatCompletionChunk.model_validate({
+        "id": "chatcmpl-0", "object": "chat.completion.chunk", "created": 0, "model": "fake",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+    })
+
+
+def call_delta(index: int, arguments: str, name: str = None) -> dict:
+    call = {"index": index, "function": {"arguments": arguments}}
+    if name:
+        call.update(id=f"call_{index}", type="function")
+        call["function"]["name"] = name
+    return {"tool_calls": [call]}
+
+
+# the second call streams (and its arguments close) while the first's are still open
+INTERLEAVED = [
+    {"role": "assistant", "content": ""},
+    call_delta(0, '{"name": ', "create"),
+    call_delta(1, '{"name": "report.txt"}', "append"),
+    call_delta(0, '"report.txt"}'),
+]
+
+
+class InterleavingOpenAI:
+    """Streams INTERLEAVED, then answers with text once the tools have run."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+        self.requests = 0
+
+    def chunks(self, **params):
+        self.requests += 1
+        if self.requests == 1:
+            return [chunk(delta) for delta in INTERLEAVED]
+        return [chunk({"role": "assistant", "content": "Done."})]
+
+    def create(self, **params):
+        assert params["stream"]
+        return iter(self.chunks(**params))
+
+
+class AsyncInterleavingOpenAI(InterleavingOpenAI):
+    async def create(self, **params):
+        chunks = self.chunks(**params)
+
+        async def stream():
+            for item in chunks:
+                yield item
+
+        return stream()
+
+
+def file_agent(log: list) -> Agent:
+    files = {}
+    lock = threading.Lock()
+
+    def create(name: str):
+        time.sleep(0.05)
+        with lock:
+            files[name] = ""
+            log.append("create")
+        return "created"
+
+    def append(name: str):
+        with lock:
+            log.append("append")
+            if name not in files:
+                return "no such file"
+            files[name] += "line"
+        return "appended"
+
+    return Agent(name="Files", functions=[create, append], parallel_tool_calls=False)
+
+
+def tool_results(response) -> list:
+    return [m["content"] for m in response.messages if m["role"] == "tool"]
+
+
+def test_serial_calls_run_in_order_when_streamed_out_of_order():
+    log = []
+    swarm = Swarm(client=InterleavingOpenAI())
+    events = list(swarm.run(file_agent(log), [{"role": "user", "content": "hi"}], stream=True))
+    assert log == ["create", "append"]
+    assert tool_results(events[-1]["response"]) == ["created", "appended"]
+
+
+def test_async_serial_calls_run_in_order_when_streamed_out_of_order():
+    log = []
+
+    async def run():
+        stream = await AsyncSwarm(client=AsyncInterleavingOpenAI()).run(
+            file_agent(log), [{"role": "user", "content": "hi"}], stream=True)
+        return [item async for item in stream]
+
+    events = asyncio.run(run())
+    assert log == ["create", "append"]
+    assert tool_results(events[-1]["response"]) == ["created", "appended"]
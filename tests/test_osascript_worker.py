@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+from swarm.agents.osascript_worker import SpawnBackend, WorkerPool, WorkerUnavailable
+
+STUB = [sys.executable, os.path.join(os.path.dirname(__file__), "..", "benchmarks", "stub_osascript.py")]
+
+# interpreters that can't run scripts: missing, exiting at once, or not speaking the protocol
+BROKEN = [
+    ["/nonexistent/osascript"],
+    [sys.executable, "-c", "import sys; sys.exit('JavaScript error')"],
+    [sys.executable, "-c", "print('ready')"],
+]
+
+
+@pytest.mark.parametrize("command", BROKEN)
+def test_pool_falls_back_when_worker_fails_to_start(command):
+    pool = WorkerPool(size=1, command=command, fallback=SpawnBackend(STUB), start_timeout=5)
+    try:
+        for _ in range(2):
+            result = pool.run('return "hello"')
+            assert result.ok and result.output == "hello"
+        assert pool.stats()["fallback"].startswith("Script interpreter")
+    finally:
+        pool.close()
+
+
+def test_pool_without_fallback_raises():
+    pool = WorkerPool(size=1, command=BROKEN[1])
+    with pytest.raises(WorkerUnavailable, match="JavaScript error"):
+        pool.run('return "hello"')
+
+
+def test_script_crash_does_not_fall_back():
+    pool = WorkerPool(size=1, command=STUB, fallback=SpawnBackend(STUB))
+    try:
+        assert pool.run('return "hello"').output == "hello"
+        assert not pool.run("crash").ok
+        assert pool.run('return "again"').output == "again"
+        stats = pool.stats()
+        assert stats["fallback"] is None and stats["restarts"] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+
+import openai
+import pytest
+from openai import AsyncOpenAI, OpenAI
+
+from benchmarks.fake_server import FakeCompletionServer, echo_responder
+from swarm.resilience import AsyncResilientClient, FirstTokenTimeout, ResilientClient
+
+MESSAGES = [{"role": "user", "content": "Say something reasonably long, please."}]
+
+
+class DelayedResponder:
+    """Echoes, after sleeping `delays[n]` seconds on the n-th request (no delay past the end)."""
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request: dict) -> dict:
+        with self._lock:
+            n, self.calls = self.calls, self.calls + 1
+        if n < len(self.delays):
+            time.sleep(self.delays[n])
+        return echo_responder(request)
+
+
+def stream_text(client) -> str:
+    stream = client.chat.completions.create(model="fake", messages=MESSAGES, stream=True)
+    return "".join(chunk.choices[0].delta.content or "" for chunk in stream)
+
+
+def resilient(server: FakeCompletionServer, **options) -> ResilientClient:
+    client = OpenAI(base_url=server.base_url, api_key="fake", max_retries=0)
+    return ResilientClient(client, backoff_base=0.01, **options)
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retries_rate_limits_and_server_errors(status):
+    # with this seed the first request fails and the second goes through
+    with FakeCompletionServer(error_rate=0.5, error_status=status, seed=1) as server:
+        client = resilient(server)
+        completion = client.chat.completions.create(model="fake", messages=MESSAGES)
+    assert completion.choices[0].message.content.startswith("echo:")
+    assert server.requests == 2 and server.errors == 1
+    assert client.stats()["retries"] == 1 and client.failures == 0
+
+
+def test_gives_up_after_max_retries_and_on_client_errors():
+    with FakeCompletionServer(error_rate=1.0, error_status=503) as server:
+        client = resilient(server, max_retries=2)
+        with pytest.raises(openai.InternalServerError):
+            stream_text(client)
+    assert server.requests == 3 and client.retries == 2 and client.failures == 1
+
+    with FakeCompletionServer(error_rate=1.0, error_status=400) as server:
+        client = resilient(server)
+        with pytest.raises(openai.BadRequestError):
+            stream_text(client)
+    assert server.requests == 1 and client.retries == 0
+
+
+def test_first_token_deadline_abandons_a_stalled_stream():
+    with FakeCompletionServer(responder=DelayedResponder([1.0])) as server:
+        client = resilient(server, first_token_timeout=0.2)
+        start = time.perf_counter()
+        assert stream_text(client).startswith("echo:")
+        elapsed = time.perf_counter() - start
+    assert elapsed < 0.8
+    assert server.requests == 2
+    assert client.first_token_timeouts == 1 and client.retries == 1
+
+    with FakeCompletionServer(responder=DelayedResponder([1.0])) as server:
+        client = resilient(server, first_token_timeout=0.2, max_retries=0)
+        with pytest.raises(FirstTokenTimeout):
+            stream_text(client)
+
+
+def test_hedge_answers_first_when_the_primary_is_slow():
+    # three quick requests set the hedging threshold, then the primary stalls
+    responder = DelayedResponder([0, 0, 0, 1.0])
+    with FakeCompletionServer(responder=responder, latency=0.05) as server:
+        client = resilient(server, hedge_percentile=0.5, hedge_min_samples=3)
+        for _ in range(3):
+            stream_text(client)
+        assert client.stats()["hedges"] == 0
+        start = time.perf_counter()
+        assert stream_text(client).startswith("echo:")
+        elapsed = time.perf_counter() - start
+    assert elapsed < 0.8
+    assert server.requests == 5
+    assert client.hedges == 1 and client.hedge_wins == 1
+
+
+def test_async_client_retries_and_hedges():
+    async def run(server, **options):
+        client = AsyncResilientClient(
+            AsyncOpenAI(base_url=server.base_url, api_key="fake", max_retries=0),
+            backoff_base=0.01, **options)
+        texts = []
+        for _ in range(4):
+            stream = await client.chat.completions.create(model="fake", messages=MESSAGES, stream=True)
+            texts.append("".join([chunk.choices[0].delta.content or "" async for chunk in stream]))
+        return client, texts
+
+    with FakeCompletionServer(error_rate=0.5, error_status=429, seed=1) as server:
+        client, texts = asyncio.run(run(server))
+    assert all(text.startswith("echo:") for text in texts)
+    assert client.retries == server.errors > 0
+
+    responder = DelayedResponder([0, 0, 0, 1.0])
+    with FakeCompletionServer(responder=responder, latency=0.05) as server:
+        start = time.perf_counter()
+        client, texts = asyncio.run(run(server, hedge_percentile=0.5, hedge_min_samples=3))
+        elapsed = time.perf_counter() - start
+    assert all(text.startswith("echo:") for text in texts)
+    assert elapsed < 1.0
+    assert client.hedges == 1 and client.hedge_wins == 1
@@ -0,0 +1,35 @@
+import pytest
+
+from swarm.routing import KeywordRouter
+
+
+@pytest.mark.parametrize("message", [
+    "find me a good restaurant in Tampa",
+    "top 10 movies of 2024",
+    "git is confusing, can you explain branches?",
+    "run me through how OAuth works",
+    "python is my favourite language",
+    "cat videos are the best",
+])
+def test_questions_are_not_routed_to_the_terminal(message):
+    decision = KeywordRouter().route(message)
+    assert decision is None or decision.route != "terminal"
+
+
+@pytest.mark.parametrize("message", [
+    "ls -la ~/Downloads",
+    "run `python --version`",
+    "git log -5",
+    "pip install requests",
+    "cat the contents of README.md",
+    "ps aux | grep python",
+])
+def test_commands_are_routed_to_the_terminal(message):
+    decision = KeywordRouter().route(message)
+    assert decision is not None and decision.route == "terminal"
+
+
+def test_single_weak_rule_is_not_enough():
+    # one 2.0 rule is the whole score, so the share alone would be 1.0
+    assert KeywordRouter().route("What's the current price of bitcoin?") is None
+    assert KeywordRouter(min_score=2.0).route("What's the current price of bitcoin?").route == "search"
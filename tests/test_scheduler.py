@@ -0,0 +1,74 @@
+import asyncio
+
+from openai.types.chat import ChatCompletionChunk
+
+from benchmarks.fake_client import AsyncFakeOpenAI, FakeOpenAI
+from swarm import Agent, Swarm
+from swarm.async_core import AsyncSwarm
+from swarm.scheduler import AsyncRateLimitedClient, RateLimitedClient, Scheduler
+
+USAGE = {"prompt_tokens": 900, "completion_tokens": 100, "total_tokens": 1000}
+
+
+def usage_chunk() -> ChatCompletionChunk:
+    return ChatCompletionChunk.model_validate({
+        "id": "chatcmpl-usage", "object": "chat.completion.chunk", "created": 0,
+        "model": "fake", "choices": [], "usage": USAGE,
+    })
+
+
+class UsageStreamOpenAI(FakeOpenAI):
+    """Ends streams with a usage chunk when asked to, as the API does."""
+
+    def create(self, **params):
+        result = super().create(**params)
+        if params.get("stream") and (params.get("stream_options") or {}).get("include_usage"):
+            return (chunk for chunks in (result, [usage_chunk()]) for chunk in chunks)
+        return result
+
+
+class AsyncUsageStreamOpenAI(AsyncFakeOpenAI, UsageStreamOpenAI):
+    pass
+
+
+def test_streamed_request_settles_with_stream_usage():
+    # a slow refill, so the bucket level shows what was charged
+    scheduler = Scheduler(tokens_per_minute=600, burst_seconds=600)
+    swarm = Swarm(client=RateLimitedClient(UsageStreamOpenAI(lambda request: {"content": "hi"}), scheduler))
+    chunks = list(swarm.run(Agent(), [{"role": "user", "content": "hello"}], stream=True))
+    assert chunks[-1]["response"].messages[-1]["content"] == "hi"
+    stats = scheduler.stats()
+    assert stats["reported_tokens"] == 1000 != stats["estimated_tokens"]
+    # charged the estimate up front, then corrected to the reported usage
+    assert abs(scheduler.tokens.level - (6000 - 1000)) < 5
+
+
+def test_async_streamed_request_settles_with_stream_usage():
+    scheduler = Scheduler(tokens_per_minute=60_000)
+    client = AsyncRateLimitedClient(AsyncUsageStreamOpenAI(lambda request: {"content": "hi"}), scheduler)
+
+    async def run():
+        stream = await AsyncSwarm(client=client).run(
+            Agent(), [{"role": "user", "content": "hello"}], stream=True)
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(run())
+    assert chunks[-1]["response"].messages[-1]["content"] == "hi"
+    assert scheduler.stats()["reported_tokens"] == 1000
+
+
+def test_scheduler_asks_for_stream_usage_itself():
+    scheduler = Scheduler(tokens_per_minute=60_000)
+    provider = UsageStreamOpenAI(lambda request: {"content": "hi"})
+    client = RateLimitedClient(provider, scheduler)
+    chunks = list(client.chat.completions.create(
+        model="fake", messages=[{"role": "user", "content": "hello"}], stream=True))
+    assert provider.last_request["stream_options"] == {"include_usage": True}
+    assert scheduler.stats()["reported_tokens"] == 1000
+    # the caller didn't ask for the usage-only chunk, so it doesn't get it
+    assert all(chunk.choices for chunk in chunks)
+
+    chunks = list(client.chat.completions.create(
+        model="fake", messages=[{"role": "user", "content": "hello"}], stream=True,
+        stream_options={"include_usage": True}))
+    assert chunks[-1].usage.total_tokens == 1000 and not chunks[-1].choices
@@ -0,0 +1,35 @@
+import importlib
+
+from benchmarks.fake_brave import FakeBraveServer
+from swarm.agents.brave_client import BraveSearchClient, SearchCache
+from swarm.agents.orchestrator_agent import get_search_results, instructor_agent
+from swarm.agents.search_store import search_store
+
+# the package re-exports the agent under the module's name, so fetch the module itself
+brave_search_agent = importlib.import_module("swarm.agents.brave_search_agent")
+
+
+def test_search_results_round_trip(monkeypatch):
+    context = {"session_id": "test-round-trip"}
+    with FakeBraveServer() as server:
+        monkeypatch.setattr(brave_search_agent, "search_client", BraveSearchClient(
+            base_url=server.base_url, cache=SearchCache(maxsize=0)))
+        first = brave_search_agent.perform_web_search("first query", count=2, context_variables=context)
+        context.update(first.context_variables)
+        second = brave_search_agent.perform_web_search("second query", count=2, context_variables=context)
+        context.update(second.context_variables)
+
+    assert get_search_results in instructor_agent.functions
+    assert first.context_variables["search_id"] in first.value
+
+    latest = get_search_results(context_variables=context)
+    assert "second query - result 1" in latest and "first query" not in latest
+    earlier = get_search_results(first.context_variables["search_id"], context)
+    assert "🔍 first query - result 0\n🌐 https://example.com/0?q=first+query" in earlier
+
+    # results are per session
+    other = get_search_results(context["search_id"], {"session_id": "test-other"})
+    assert other.startswith("No stored results")
+
+    search_store.drop_session("test-round-trip")
+    assert get_search_results(context_variables=context).startswith("No stored results")
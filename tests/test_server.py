@@ -0,0 +1,71 @@
+import json
+import threading
+
+import pytest
+import requests
+
+from benchmarks.fake_client import FakeOpenAI
+from swarm import Swarm
+from swarm.server import build_server
+
+REPLY = "Hello there, this reply arrives in several chunks."
+
+
+@pytest.fixture
+def server():
+    client = FakeOpenAI(lambda request: {"content": REPLY}, chunk_size=8)
+    server = build_server(("127.0.0.1", 0), swarm=Swarm(client=client))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def read_events(response) -> list:
+    """The (event, data) pairs of a Server-Sent Events response, as they arrive."""
+    events, event, data = [], "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data.append(line[len("data: "):])
+        elif not line and data:
+            events.append((event, json.loads("\n".join(data))))
+            event, data = "message", []
+    return events
+
+
+def test_streamed_reply_round_trip(server):
+    created = requests.post(f"{server.url}/sessions")
+    assert created.status_code == 201
+    session_id = created.json()["session_id"]
+
+    with requests.post(f"{server.url}/sessions/{session_id}/messages",
+                       json={"message": "hi"}, stream=True) as response:
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "text/event-stream"
+        events = read_events(response)
+
+    chunks = [data["content"] for event, data in events if event == "message"]
+    assert len(chunks) > 1 and "".join(chunks) == REPLY
+    event, state = events[-1]
+    assert event == "done"
+    assert state["history_length"] == 1
+    assert requests.get(f"{server.url}/sessions/{session_id}").json() == state
+
+    reply = requests.post(f"{server.url}/sessions/{session_id}/messages",
+                          json={"message": "again", "stream": False}).json()
+    assert reply["reply"] == REPLY and reply["state"]["history_length"] == 2
+
+    assert requests.delete(f"{server.url}/sessions/{session_id}").status_code == 200
+    assert requests.get(f"{server.url}/sessions/{session_id}").status_code == 404
+    assert requests.get(f"{server.url}/stats").json()["created"] == 1
+
+
+def test_bad_requests(server):
+    session_id = requests.post(f"{server.url}/sessions").json()["session_id"]
+    messages = f"{server.url}/sessions/{session_id}/messages"
+    assert requests.post(messages, data="[1]").status_code == 400
+    assert requests.post(messages, json={"message": ""}).status_code == 400
+    assert requests.post(f"{server.url}/sessions/missing/messages",
+                         json={"message": "hi"}).status_code == 404
@@ -0,0 +1,69 @@
+import os
+
+from benchmarks.fake_client import FakeOpenAI
+from swarm import Swarm
+from swarm.controller import AgentController
+from swarm.session_store import OFFSET, SessionStore
+
+
+def messages(n: int, start: int = 0) -> list:
+    return [{"role": "user", "content": f"message {i}"} for i in range(start, start + n)]
+
+
+def log_path(store: SessionStore, session_id: str) -> str:
+    return os.path.join(store.root, f"{session_id}.jsonl")
+
+
+def test_torn_last_line_is_dropped_on_recovery(tmp_path):
+    store = SessionStore(str(tmp_path))
+    assert store.append("s1", messages(3)) == 3
+    # a crash in the middle of the next append: part of a line, not indexed
+    with open(log_path(store, "s1"), "ab") as log:
+        log.write(b'{"role":"user","cont')
+
+    recovered = SessionStore(str(tmp_path))
+    assert recovered.count("s1") == 3
+    assert recovered.read("s1") == messages(3)
+    assert recovered.append("s1", messages(1, start=3)) == 4
+    assert recovered.read("s1") == messages(4)
+    assert SessionStore(str(tmp_path)).tail("s1", 2) == messages(2, start=2)
+
+
+def test_recovery_reindexes_lines_and_drops_entries_of_torn_ones(tmp_path):
+    store = SessionStore(str(tmp_path))
+    store.append("s1", messages(3))
+    path = log_path(store, "s1")
+    # the log write of an append went through but its index write did not
+    with open(path, "ab") as log:
+        log.write(b'{"role":"user","content":"message 3"}\n')
+    assert SessionStore(str(tmp_path)).read("s1") == messages(4)
+
+    # the last indexed line lost its tail
+    os.truncate(path, os.path.getsize(path) - 5)
+    recovered = SessionStore(str(tmp_path))
+    assert recovered.read("s1") == messages(3)
+    assert os.path.getsize(os.path.join(str(tmp_path), "s1.idx")) == 3 * OFFSET.size
+
+
+def test_controller_resumes_window_and_snapshot(tmp_path):
+    swarm = Swarm(client=FakeOpenAI(lambda request: {"content": "ok"}))
+    store = SessionStore(str(tmp_path), snapshot_every=2)
+    controller = AgentController(swarm=swarm, store=store, session_id="s1")
+    controller.current_context["user"] = "alice"
+    controller.state.active_tasks["t1"] = "started"
+    for turn in range(5):
+        assert controller.handle_message(f"turn {turn}") == "ok"
+    count = store.count("s1")
+    snapshot = store.load_snapshot("s1")
+    # due on the first append, then every other message
+    assert count == snapshot["messages"] == 5
+    assert snapshot["state"]["current_context"]["user"] == "alice"
+
+    resumed = AgentController(
+        swarm=swarm, store=SessionStore(str(tmp_path)), session_id="s1", resume_window=2)
+    assert [dict(m) for m in resumed.state.history] == store.tail("s1", 2)
+    assert resumed.state.resumed_from == count - 2
+    assert resumed.get_state()["history_length"] == count
+    assert resumed.current_context["user"] == "alice"
+    assert resumed.current_context["session_id"] == "s1"
+    assert resumed.state.active_tasks == {"t1": "started"}
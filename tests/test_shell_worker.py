@@ -0,0 +1,65 @@
+import importlib
+import json
+
+import pytest
+
+from swarm.agents.shell_worker import ShellPool, ShellWorker
+
+
+def test_syntax_error_keeps_the_shell():
+    worker = ShellWorker(cwd="/")
+    try:
+        assert worker.run("cd /tmp && export GREETING=hello").exit_code == 0
+        result = worker.run('echo "abc', timeout=5)
+        assert result.exit_code == 2
+        assert not result.timed_out
+        assert result.duration < 2
+        result = worker.run('echo "$GREETING" "$PWD"; echo \'single quoted\'')
+        assert result.stdout == "hello /tmp\nsingle quoted\n"
+        assert worker.restarts == 0
+    finally:
+        worker.close()
+
+
+def test_heredoc():
+    worker = ShellWorker()
+    try:
+        result = worker.run("cat <<'EOF'\nline 'one'\n$HOME\nEOF\necho after", timeout=5)
+        assert result.exit_code == 0
+        assert result.stdout == "line 'one'\n$HOME\nafter\n"
+        # an unterminated heredoc ends with the command instead of eating the framing
+        result = worker.run("cat <<EOF\nhi", timeout=5)
+        assert not result.timed_out
+        assert result.stdout.startswith("hi")
+        assert worker.run("echo ok").stdout == "ok\n"
+        assert worker.restarts == 0
+    finally:
+        worker.close()
+
+
+def test_runs_without_a_conversation_get_their_own_shell():
+    pool = ShellPool(cwd="/")
+    try:
+        with pool.session(None) as worker:
+            assert worker.run("cd /tmp && export GREETING=hello").exit_code == 0
+        assert not worker.alive
+        assert pool.run(None, 'echo "$GREETING" "$PWD"').stdout == " /\n"
+        assert len(pool) == 0
+        with pytest.raises(ValueError):
+            pool.worker(None)
+
+        # a conversation's shell keeps its state
+        pool.run("s1", "cd /tmp")
+        assert pool.run("s1", "pwd").stdout == "/tmp\n"
+        assert len(pool) == 1
+    finally:
+        pool.close_all()
+
+
+def test_terminal_agent_without_session_id_shares_no_state():
+    terminal_agent = importlib.import_module("swarm.agents.terminal_agent")
+    terminal_agent.run_terminal_command("export GREETING=hello", "Y", {})
+    result = terminal_agent.run_terminal_command('echo "[$GREETING]"', "Y", {})
+    assert json.loads(result.value) == {"assistant": "Instructor"}
+    assert result.context_variables["last_output"] == "[]"
+    assert len(terminal_agent.shell_pool) == 0
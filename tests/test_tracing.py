@@ -0,0 +1,83 @@
+import asyncio
+
+from benchmarks.fake_client import AsyncFakeOpenAI, FakeOpenAI, ScriptedResponder
+from swarm import Agent, Result, Swarm
+from swarm.async_core import AsyncSwarm
+from swarm.tracing import RecordingTracer
+
+
+def tree(tracer: RecordingTracer, parent=None) -> list:
+    """The recorded spans under `parent` as (name, children) pairs, in start order."""
+    children = sorted((s for s in tracer.spans if s.parent is parent), key=lambda s: s.start)
+    return [(span.name, tree(tracer, span)) for span in children]
+
+
+def handoff_turn():
+    helper = Agent(name="Helper")
+
+    def lookup(query: str):
+        return Result(value=f"found {query}", agent=helper)
+
+    script = ScriptedResponder([
+        {"tool_calls": [{"id": "call_1", "type": "function",
+                         "function": {"name": "lookup", "arguments": '{"query": "a"}'}}]},
+        {"content": "Done."},
+    ])
+    return Agent(name="Main", functions=[lookup]), script
+
+
+def expected_tree(stream: bool) -> list:
+    streamed = [("swarm.stream", [])] if stream else []
+    return [("swarm.run", [
+        ("swarm.turn", [
+            ("swarm.build_params", []), ("swarm.request", []), *streamed, ("swarm.tool", []),
+        ]),
+        ("swarm.handoff", []),
+        ("swarm.turn", [("swarm.build_params", []), ("swarm.request", []), *streamed]),
+    ])]
+
+
+def assert_attributes(tracer: RecordingTracer, stream: bool) -> None:
+    spans = {}
+    for span in tracer.spans:
+        spans.setdefault(span.name, []).append(span)
+    assert all(span.finish is not None for span in tracer.spans)
+    [run] = spans["swarm.run"]
+    assert run.attributes == {"agent": "Main", "stream": stream, "turns": 2, "final_agent": "Helper"}
+    assert [t.attributes["tool_calls"] for t in spans["swarm.turn"]] == [1, 0]
+    [tool] = spans["swarm.tool"]
+    assert tool.attributes == {"tool": "lookup", "tool_call_id": "call_1"}
+    [handoff] = spans["swarm.handoff"]
+    assert (handoff.attributes["from_agent"], handoff.attributes["to_agent"]) == ("Main", "Helper")
+    if stream:
+        assert all(s.attributes["time_to_first_token"] >= 0 for s in spans["swarm.stream"])
+
+
+def test_recording_tracer_sees_tool_calling_turn():
+    agent, script = handoff_turn()
+    for stream in (False, True):
+        script.reset()
+        tracer = RecordingTracer()
+        response = Swarm(client=FakeOpenAI(script), tracer=tracer).run(
+            agent, [{"role": "user", "content": "hi"}], stream=stream)
+        if stream:
+            list(response)
+        assert tree(tracer) == expected_tree(stream)
+        assert_attributes(tracer, stream)
+
+
+def test_async_recording_tracer_sees_tool_calling_turn():
+    agent, script = handoff_turn()
+
+    async def run(tracer: RecordingTracer, stream: bool):
+        response = await AsyncSwarm(client=AsyncFakeOpenAI(script), tracer=tracer).run(
+            agent, [{"role": "user", "content": "hi"}], stream=stream)
+        if stream:
+            return [item async for item in response]
+
+    for stream in (False, True):
+        script.reset()
+        tracer = RecordingTracer()
+        asyncio.run(run(tracer, stream))
+        assert tree(tracer) == expected_tree(stream)
+        assert_attributes(tracer, stream)
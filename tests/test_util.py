@@ -0,0 +1,141 @@
+import itertools
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+from benchmarks.fake_client import FakeOpenAI, ScriptedResponder
+from swarm import Agent, Swarm
+from swarm.util import InstructionCache, StreamAccumulator, compile_tools
+
+
+def test_instructions_are_called_every_turn_by_default():
+    ticks = itertools.count()
+
+    def instructions(context_variables):
+        return f"tick {next(ticks)}"
+
+    client = FakeOpenAI(lambda request: {"content": "ok"})
+    swarm = Swarm(client=client)
+    agent = Agent(instructions=instructions)
+    for expected in ("tick 0", "tick 1"):
+        swarm.run(agent, [{"role": "user", "content": "hi"}])
+        assert client.last_request["messages"][0]["content"] == expected
+
+
+def test_instruction_cache_bounds_shapes():
+    cache = InstructionCache(maxsize=2)
+    functions = [lambda context_variables, i=i: f"{i} {context_variables['user']}" for i in range(5)]
+    for function in functions:
+        assert cache(function, {"user": "a"}) == cache(function, {"user": "a"})
+    assert len(cache._shapes) == 2 and len(cache._entries) == 2
+    assert list(cache._shapes) == functions[-2:]
+    assert cache.stats()["hits"] == 5
+
+
+def test_tools_keep_declared_order():
+    def zeta():
+        pass
+
+    def alpha():
+        pass
+
+    names = [tool["function"]["name"] for tool in compile_tools([zeta, alpha]).tools]
+    assert names == ["zeta", "alpha"]
+
+
+def test_local_named_like_an_injected_parameter():
+    def report(text: str):
+        stream_output = text.upper()
+        context_variables = {}
+        return stream_output + str(context_variables)
+
+    compiled = compile_tools([report])
+    assert not compiled.streaming and not compiled.context_aware
+
+    script = ScriptedResponder([
+        {"tool_calls": [{"id": "call_1", "type": "function",
+                         "function": {"name": "report", "arguments": '{"text": "ok"}'}}]},
+        {"content": "Done."},
+    ])
+    for stream in (False, True):
+        script.reset()
+        swarm = Swarm(client=FakeOpenAI(script))
+        response = swarm.run(Agent(functions=[report]), [{"role": "user", "content": "hi"}], stream=stream)
+        if stream:
+            response = list(response)[-1]["response"]
+        assert response.messages[1]["content"] == "OK{}"
+
+
+def test_compiled_tools_follow_agent_functions():
+    def lookup(query: str):
+        return f"found {query}"
+
+    def ping(context_variables: dict):
+        return "pong"
+
+    def tool_names(request):
+        return [tool["function"]["name"] for tool in request.get("tools", [])]
+
+    agent = Agent(functions=[lookup])
+    assert compile_tools(agent.functions) is compile_tools(list(agent.functions))
+
+    client = FakeOpenAI(lambda request: {"content": "ok"})
+    swarm = Swarm(client=client)
+    swarm.run(agent, [{"role": "user", "content": "hi"}])
+    assert tool_names(client.last_request) == ["lookup"]
+
+    agent.functions.append(ping)
+    compiled = compile_tools(agent.functions)
+    assert compiled.context_aware == {"ping"} and set(compiled.function_map) == {"lookup", "ping"}
+    swarm.run(agent, [{"role": "user", "content": "hi"}])
+    assert tool_names(client.last_request) == ["lookup", "ping"]
+
+    agent.functions = [ping]
+    swarm.run(agent, [{"role": "user", "content": "hi"}])
+    assert tool_names(client.last_request) == ["ping"]
+
+
+def call_delta(index: int, arguments: str, name: str = None) -> ChoiceDelta:
+    call = {"index": index, "function": {"arguments": arguments}}
+    if name:
+        call.update(id=f"call_{index}", type="function")
+        call["function"]["name"] = name
+    return ChoiceDelta.model_validate({"tool_calls": [call]})
+
+
+def test_stream_accumulator_reassembles_message():
+    accumulator = StreamAccumulator("Agent")
+    for delta in [
+        ChoiceDelta(role="assistant", content="Looking "),
+        ChoiceDelta(content="that up."),
+        call_delta(0, '{"query": ', "lookup"),
+        call_delta(1, '{"to": "bo', "notify"),
+        call_delta(0, '"swarm"}'),
+        call_delta(1, 'b"}'),
+        ChoiceDelta(content=None),
+    ]:
+        accumulator.add(delta)
+
+    message = accumulator.message()
+    assert message["content"] == "Looking that up."
+    assert message["sender"] == "Agent"
+    assert message["tool_calls"] == [
+        {"id": "call_0", "type": "function",
+         "function": {"name": "lookup", "arguments": '{"query": "swarm"}'}},
+        {"id": "call_1", "type": "function",
+         "function": {"name": "notify", "arguments": '{"to": "bob"}'}},
+    ]
+
+
+def test_stream_accumulator_reports_calls_as_they_complete():
+    accumulator = StreamAccumulator("Agent", detect_tool_calls=True)
+    accumulator.add(call_delta(0, '{"query": ', "lookup"))
+    assert accumulator.pop_ready() == []
+    accumulator.add(call_delta(0, '"a}b"'))
+    assert accumulator.pop_ready() == []
+    accumulator.add(call_delta(0, "}"))
+    assert [call["function"]["arguments"] for call in accumulator.pop_ready()] == ['{"query": "a}b"}']
+    # a call whose arguments never close is complete once the next one starts
+    accumulator.add(call_delta(1, "", "ping"))
+    accumulator.add(call_delta(2, "{}", "pong"))
+    assert [call["function"]["name"] for call in accumulator.pop_ready()] == ["ping", "pong"]
+    assert accumulator.pop_ready() == []